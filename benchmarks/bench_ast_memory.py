@@ -0,0 +1,63 @@
+"""Measures the memory taken by the ast of a large program
+
+The program is parsed as a whole, and the memory still allocated after
+parsing is what keeping its ast around costs.
+
+Usage:
+    python -m benchmarks.bench_ast_memory [--functions N] [-O LEVEL]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from pygolang import lexer_setup, optimizer, parser_setup
+from pygolang.io_callback import IO
+
+FUNC_TEMPLATE = """func f{n}_helper(a int, b int, c int) int {{
+    return a * b - c
+}}
+func f{n}(a int, b int) int {{
+    var c int = a * {n} + b
+    if c > {n} {{
+        c = c - {n}
+    }} else {{
+        c = c + (a - b) * 2
+    }}
+    return c + f{n}_helper(a, b, c)
+}}
+"""
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--functions', type=int, default=1000)
+    arg_parser.add_argument(
+        '-O', dest='optimization_level', type=int, choices=optimizer.LEVELS,
+        default=0)
+    args = arg_parser.parse_args()
+
+    io = IO()
+    source = ''.join(FUNC_TEMPLATE.format(n=n) for n in range(args.functions))
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoProgramParser(io, {})
+    code_optimizer = optimizer.Optimizer(args.optimization_level)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    code = code_optimizer.optimize(parser.parse(source))
+
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    node_count = optimizer.count_nodes(code)
+    print(f"{args.functions * 2} functions, -O{args.optimization_level}")
+    print(f"{'nodes':<16}{node_count:>10}")
+    print(f"{'ast size':<16}{size / 1024 / 1024:>8.1f}MB")
+    print(f"{'bytes per node':<16}{size / node_count:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
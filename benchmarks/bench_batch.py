@@ -0,0 +1,61 @@
+"""Throughput of `pygolang.batch` on a CPU bound corpus, by worker count
+
+Every program of the corpus computes a fibonacci number recursively. They
+are run one after the other in this process, then by the batch executor
+with 1, 2, 4... workers, up to the number of cores.
+
+Usage:
+    python -m benchmarks.bench_batch [--programs N] [--engine ENGINE]
+"""
+import argparse
+import os
+import time
+
+from pygolang import ast_runner, interpreter
+from pygolang.batch import run_batch
+
+PROGRAM = """
+func fib(n int) int {{
+    if n < 2 {{
+        return n
+    }}
+    return fib(n - 1) + fib(n - 2)
+}}
+rule := {rule}
+fib(14 + rule % 3)
+"""
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--programs', type=int, default=400)
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES, default=ast_runner.ENGINE_CLOSURE)
+    args = arg_parser.parse_args()
+    corpus = [PROGRAM.format(rule=rule) for rule in range(args.programs)]
+    cores = os.cpu_count() or 1
+
+    print(f"{args.programs} programs, {args.engine} engine, {cores} cores")
+    start = time.perf_counter()
+    for source in corpus:
+        interpreter.run_program(source, args.engine)
+    sequential = args.programs / (time.perf_counter() - start)
+    print(f"{'in process':<14}{sequential:>9.0f} programs/s")
+
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        for _, result in run_batch(corpus, max_workers=workers, engine=args.engine):
+            assert result.error is None, result.error
+        throughput = args.programs / (time.perf_counter() - start)
+        print(
+            f"{f'{workers} workers':<14}{throughput:>9.0f} programs/s"
+            f"{throughput / sequential:>8.2f}x"
+        )
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Statements per second run by the tree engine in long conditional bodies
+
+The tree engine gives the blocks declaring names a run-time scope, for
+the time they run. Blocks which don't declare any run in the scopes of
+their function. Both kinds of blocks are timed, in a function called
+over and over again, along with the scopes allocated.
+
+Usage:
+    python -m benchmarks.bench_block_scopes [--statements N] [--calls N]
+"""
+import argparse
+import time
+
+import pygolang
+from pygolang import ast, ast_runner
+from pygolang.io_callback import IO
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def make_source(statements, declaring, calls):
+    body = '\n'.join(f'        x = x + {index} % 7' for index in range(statements))
+    declaration = '        y := x\n' if declaring else ''
+    return f"""
+func f(x int) int {{
+    if x >= 0 {{
+{declaration}{body}
+    }}
+    return x
+}}
+func repeat(n int) int {{
+    total := 0
+    for i := range n {{
+        total += f(i)
+    }}
+    return total
+}}
+repeat({calls})
+"""
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--statements', type=int, default=50)
+    arg_parser.add_argument('--calls', type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    created = []
+
+    class CountedScope(ast.BlockRuntimeScope):
+        def __init__(self, scope_dict):
+            created.append(1)
+            super().__init__(scope_dict)
+
+    ast.BlockRuntimeScope = CountedScope
+    print(f"{args.calls} calls, running {args.statements} statements each")
+    for name, declaring in [('no declarations', False), ('declaring a name', True)]:
+        created.clear()
+        source = make_source(args.statements, declaring, args.calls)
+        start = time.perf_counter()
+        pygolang.run_source(source, io=NullIO(), engine=ast_runner.ENGINE_TREE)
+        seconds = time.perf_counter() - start
+        statements = args.calls * args.statements
+        print(
+            f"{name:<18}{statements / seconds / 1000:>9.0f}K statements/s"
+            f"{len(created):>9} scopes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Writes to stdout when printing lots of values, with and without buffering
+
+Values are printed the way the engines print them: their pygo repr, then a
+newline. The output goes to a stream made like the stdout of a process
+writing to a pipe, which counts the writes that would be system calls.
+
+- IO: flushes after every write
+- BufferedIO, interactive: flushes after every line
+- BufferedIO: flushes when its buffer is full
+
+A real program printing the values of many statements is run too.
+
+Usage:
+    python -m benchmarks.bench_buffered_output [--values N]
+"""
+import argparse
+import io
+import time
+
+import pygolang
+from pygolang import ast
+from pygolang.io_callback import IO, BufferedIO
+
+
+class CountingFile(io.RawIOBase):
+    """Stands for a file descriptor: every write is a system call"""
+
+    def __init__(self):
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes += 1
+        return len(data)
+
+
+def make_stdout():
+    raw = CountingFile()
+    return raw, io.TextIOWrapper(io.BufferedWriter(raw), write_through=False)
+
+
+IMPLEMENTATIONS = [
+    ('IO', lambda stdout: IO(stdout=stdout)),
+    ('BufferedIO, interactive', lambda stdout: BufferedIO(stdout=stdout, interactive=True)),
+    ('BufferedIO', lambda stdout: BufferedIO(stdout=stdout, interactive=False)),
+]
+
+
+def print_values(make_io, values):
+    raw, stdout = make_stdout()
+    pygo_io = make_io(stdout)
+    start = time.perf_counter()
+    for value in range(values):
+        pygo_io.to_stdout(ast.Int(value).to_pygo_repr())
+        pygo_io.newline()
+    pygo_io.flush()
+    return time.perf_counter() - start, raw.writes
+
+
+def run_program(make_io, statements):
+    raw, stdout = make_stdout()
+    source = '\n'.join(f'{value} * 2' for value in range(statements))
+    start = time.perf_counter()
+    pygolang.run_source(source, io=make_io(stdout))
+    return time.perf_counter() - start, raw.writes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--values', type=int, default=1000000)
+    arg_parser.add_argument('--statements', type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    print(f"{args.values} values printed")
+    for name, make_io in IMPLEMENTATIONS:
+        seconds, writes = print_values(make_io, args.values)
+        print(f"{name:<26}{writes:>10} writes{seconds * 1000:>10.0f}ms")
+
+    print(f"program of {args.statements} statements")
+    for name, make_io in IMPLEMENTATIONS:
+        seconds, writes = run_program(make_io, args.statements)
+        print(f"{name:<26}{writes:>10} writes{seconds * 1000:>10.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Measures the overhead of calling a trivial function
+
+The snippet is a sum of calls to a function which returns its argument,
+so nearly all of the time goes into making the calls.
+
+Usage:
+    python -m benchmarks.bench_calls [--calls N] [--repeat N]
+"""
+import argparse
+import timeit
+
+from pygolang import ast_runner, lexer_setup, optimizer, parser_setup
+from pygolang.io_callback import IO
+
+FUNCS = [
+    "func id(x int) int { return x }",
+    "func first(x int, y int) int { return x }",
+]
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def calls_per_second(engine, snippet, calls, repeat):
+    io = NullIO()
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=engine)
+    code_optimizer = optimizer.Optimizer()
+
+    for func in FUNCS:
+        runner.run(code_optimizer.optimize(parser.parse(func)))
+
+    code = code_optimizer.optimize(parser.parse(
+        ' + '.join([snippet] * calls)))
+    best = min(timeit.repeat(lambda: runner.run(code), number=repeat, repeat=5))
+    return calls * repeat / best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--calls', type=int, default=50)
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    snippets = {'1 param': 'id(1)', '2 params': 'first(1, 2)'}
+
+    print(f"{'engine':<12}" + ''.join(f"{name:>16}" for name in snippets))
+    for engine in ast_runner.ENGINES:
+        row = f"{engine:<12}"
+        for snippet in snippets.values():
+            rate = calls_per_second(engine, snippet, args.calls, args.repeat)
+            row += f"{rate / 1000:>11.0f}k/s"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""An echo server written in pygo, against one using a python thread per
+connection
+
+Every client connection sends messages one at a time, waiting for each to
+be echoed back before sending the next. The clients are asyncio
+connections, all in one thread, so the servers are measured under the same
+load.
+
+- pygo: goroutines on the stackless engine, one per connection, waiting for
+  their sockets through the scheduler's event loop. One thread serves all
+  the connections
+- threads: `socketserver.ThreadingTCPServer`, a thread per connection
+
+Usage:
+    python -m benchmarks.bench_echo_server [--connections N] [--messages N]
+"""
+import argparse
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+from pygolang import interpreter
+from pygolang.io_callback import IO
+from pygolang.scheduler import Scheduler
+
+ECHO_SERVER = """
+func echo(conn int, done chan int) int {{
+    s := read(conn, 4096)
+    if s == "" {{
+        closefd(conn)
+        done <- 1
+        return 0
+    }}
+    write(conn, s)
+    return echo(conn, done)
+}}
+
+func serve(listener int, connections int, done chan int) int {{
+    if connections == 0 {{
+        return 0
+    }}
+    go echo(accept(listener), done)
+    return serve(listener, connections - 1, done)
+}}
+
+func wait(done chan int, connections int) int {{
+    if connections == 0 {{
+        return 0
+    }}
+    <-done
+    return wait(done, connections - 1)
+}}
+
+done := make(chan int)
+go serve(listen("tcp", "127.0.0.1:{port}"), {connections}, done)
+wait(done, {connections})
+"""
+
+MESSAGE = b'x' * 64
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                return
+            self.request.sendall(data)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def client(port, messages):
+    # The server might not be listening yet
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            break
+        except ConnectionRefusedError:
+            await asyncio.sleep(0.01)
+
+    for _ in range(messages):
+        writer.write(MESSAGE)
+        await reader.readexactly(len(MESSAGE))
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_clients(port, connections, messages):
+    await asyncio.gather(*[client(port, messages) for _ in range(connections)])
+
+
+def bench_pygo(connections, messages):
+    port = free_port()
+    scheduler = Scheduler()
+    source = ECHO_SERVER.format(port=port, connections=connections)
+    server = threading.Thread(
+        target=interpreter.run_source,
+        args=(source,),
+        kwargs=dict(io=NullIO(), engine='stackless', scheduler=scheduler),
+    )
+    server.start()
+
+    start = time.perf_counter()
+    asyncio.run(run_clients(port, connections, messages))
+    server.join()
+    seconds = time.perf_counter() - start
+
+    report = scheduler.format_report()
+    scheduler.shutdown()
+    return seconds, 1, report
+
+
+def bench_threads(connections, messages):
+    port = free_port()
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', port), EchoHandler)
+    server.request_queue_size = connections
+    serving = threading.Thread(target=server.serve_forever)
+    serving.start()
+    peak_threads = 0
+
+    async def count_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        counter = asyncio.ensure_future(count_threads())
+        await run_clients(port, connections, messages)
+        counter.cancel()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    seconds = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    serving.join()
+    # Not counting the main thread, which runs the clients
+    return seconds, peak_threads - 1, None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--connections', type=int, default=200)
+    arg_parser.add_argument('--messages', type=int, default=50)
+    args = arg_parser.parse_args()
+    total = args.connections * args.messages
+
+    print(f"{args.connections} connections, {args.messages} messages each")
+    for name, bench in [('pygo', bench_pygo), ('threads', bench_threads)]:
+        seconds, threads, report = bench(args.connections, args.messages)
+        print(
+            f"{name:<10}{total / seconds / 1000:>9.1f}k messages/s"
+            f"{threads:>7} server threads"
+        )
+        if report:
+            print(report)
+
+
+if __name__ == '__main__':
+    main()
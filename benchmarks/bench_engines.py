@@ -0,0 +1,81 @@
+"""Compares the execution engines on arithmetic and call heavy snippets
+
+Only the execution is measured: every snippet is parsed once, and then the
+resulting ast is run over and over again.
+
+Usage:
+    python -m benchmarks.bench_engines [--repeat N] [-O LEVEL]
+"""
+import argparse
+import timeit
+
+from pygolang import ast_runner, lexer_setup, optimizer, parser_setup
+from pygolang.io_callback import IO
+
+SETUP_CODE = [
+    "a := 3",
+    "b := 7",
+    "func poly(x int, y int) int { return x * x + 2 * x * y - y * y + 7 }",
+    "func twice(x int) int { return poly(x, x) + poly(x, 1) }",
+]
+
+SNIPPETS = {
+    'arithmetic': "a * b + (a - b) * (a + b) / 2 + a % 2 - b * 3 + a * a * a",
+    'boolean': "((a < b) && (b > 2)) || (a == b && a != 1) || !(a >= b)",
+    'calls': "twice(a) + twice(b) + poly(a, b)",
+    'constants': "(2 * 3 + 4 * (5 - 1)) * (7 - 2) + a - 10 / 5",
+}
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def bench_engine(engine, repeat, optimization_level):
+    io = NullIO()
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=engine)
+    code_optimizer = optimizer.Optimizer(optimization_level)
+
+    for line in SETUP_CODE:
+        runner.run(code_optimizer.optimize(parser.parse(line)))
+
+    results = {}
+    for name, snippet in SNIPPETS.items():
+        code = code_optimizer.optimize(parser.parse(snippet))
+        results[name] = min(
+            timeit.repeat(lambda: runner.run(code), number=repeat, repeat=5)
+        )
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--repeat', type=int, default=2000)
+    arg_parser.add_argument(
+        '-O', dest='optimization_level', type=int, choices=optimizer.LEVELS,
+        default=optimizer.DEFAULT_LEVEL)
+    args = arg_parser.parse_args()
+
+    timings = {
+        engine: bench_engine(engine, args.repeat, args.optimization_level)
+        for engine in ast_runner.ENGINES
+    }
+
+    print(f"-O{args.optimization_level}")
+    baseline = timings[ast_runner.ENGINE_TREE]
+    print(f"{'snippet':<12}" + ''.join(f"{e:>14}" for e in timings) + f"{'speedup':>10}")
+    for name in SNIPPETS:
+        row = f"{name:<12}"
+        for engine in timings:
+            row += f"{timings[engine][name] / args.repeat * 1e6:>12.2f}us"
+        fastest = min(timings[e][name] for e in timings)
+        row += f"{baseline[name] / fastest:>9.1f}x"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Compares goroutines on the scheduler with python threads
+
+- ping-pong: two goroutines passing a value back and forth over unbuffered
+  channels, against two threads doing the same over `queue.Queue`s. Every
+  round trip is two context switches
+- starting: goroutines which block on a channel, until the last one is
+  started, against threads which block on an event
+
+The goroutines run python generators directly on a `Scheduler`, to measure
+the scheduler alone, and a pygo program on the stackless engine.
+
+Usage:
+    python -m benchmarks.bench_goroutines [--round-trips N] [--spawn N]
+"""
+import argparse
+import queue
+import threading
+import time
+import tracemalloc
+
+from pygolang import ast, interpreter
+from pygolang.io_callback import IO
+from pygolang.scheduler import Channel, Scheduler
+
+PING_PONG = """
+func echo(in chan int, out chan int, n int) int {{
+    if n == 0 {{
+        return 0
+    }}
+    out <- <-in + 1
+    return echo(in, out, n - 1)
+}}
+
+func ping(out chan int, in chan int, n int) int {{
+    if n == 0 {{
+        return 0
+    }}
+    out <- n
+    <-in
+    return ping(out, in, n - 1)
+}}
+
+a := make(chan int)
+b := make(chan int)
+go echo(a, b, {round_trips})
+ping(a, b, {round_trips})
+"""
+
+INT_CHAN = ast.ChanType(ast.IntType)
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def ping_pong_generators(round_trips):
+    scheduler = Scheduler()
+    a, b = Channel(INT_CHAN), Channel(INT_CHAN)
+
+    def echo():
+        for _ in range(round_trips):
+            value = yield from scheduler.receive(a)
+            yield from scheduler.send(b, value)
+
+    def ping():
+        for n in range(round_trips):
+            yield from scheduler.send(a, n)
+            yield from scheduler.receive(b)
+
+    scheduler.spawn(echo())
+    scheduler.run(ping())
+
+
+def ping_pong_pygo(round_trips):
+    interpreter.run_source(
+        PING_PONG.format(round_trips=round_trips), io=NullIO(),
+        engine='stackless')
+
+
+def ping_pong_threads(round_trips):
+    a, b = queue.Queue(), queue.Queue()
+
+    def echo():
+        for _ in range(round_trips):
+            b.put(a.get())
+
+    thread = threading.Thread(target=echo)
+    thread.start()
+    for n in range(round_trips):
+        a.put(n)
+        b.get()
+    thread.join()
+
+
+def spawn_goroutines(count):
+    scheduler = Scheduler()
+    ready, start = Channel(INT_CHAN), Channel(INT_CHAN)
+    done = Channel(INT_CHAN, count)
+
+    def wait():
+        yield from scheduler.receive(start)
+        yield from scheduler.send(done, 0)
+
+    def starter():
+        yield from scheduler.receive(ready)
+        scheduler.close(start)
+
+    def main():
+        for _ in range(count):
+            scheduler.spawn(wait())
+        scheduler.spawn(starter())
+
+        # The goroutines only run once this one blocks. They run in order,
+        # so they all block before the starter unblocks them
+        yield from scheduler.send(ready, 0)
+        for _ in range(count):
+            yield from scheduler.receive(done)
+
+    scheduler.run(main())
+
+
+def spawn_threads(count):
+    event = threading.Event()
+    threads = [threading.Thread(target=event.wait) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    event.set()
+    for thread in threads:
+        thread.join()
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--round-trips', type=int, default=20000)
+    arg_parser.add_argument('--spawn', type=int, default=2000)
+    args = arg_parser.parse_args()
+    round_trips = args.round_trips
+
+    print(f"ping-pong, {round_trips} round trips")
+    for name, func in [
+        ('generators', ping_pong_generators),
+        ('pygo', ping_pong_pygo),
+        ('threads', ping_pong_threads),
+    ]:
+        seconds = timed(lambda: func(round_trips))
+        print(f"{name:<12}{round_trips / seconds / 1000:>9.1f}k round trips/s")
+
+    count = args.spawn
+    print(f"\nstarting {count}, all blocked until the last one starts")
+    for name, func in [('goroutines', spawn_goroutines), ('threads', spawn_threads)]:
+        seconds = timed(lambda: func(count))
+        memory = peak_memory(lambda: func(count))
+        print(
+            f"{name:<12}{seconds * 1000:>9.1f}ms"
+            f"{memory / count:>9.0f} bytes each (python heap)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Summing the ints up to N with for loops, on every engine
+
+- counting: `for i := 0; i < n; i++`, which runs on a python range (see
+  `ast.get_counting_loop`)
+- while: `for i < n { ... i++ }`, which evaluates the condition and the
+  increment on every iteration
+- recursion: the sum written as a recursive function, the only way before
+  there were loops. Only the stackless engine recurses this deep, and it's
+  run on a tenth of N, not to take minutes
+Plain python's `for` is there as the baseline. The tree engine takes
+minutes for 10 million ints, so it only runs when asked for.
+
+Usage:
+    python -m benchmarks.bench_loops [--count N] [--engines tree,closure]
+"""
+import argparse
+import time
+
+import pygolang
+from pygolang import ast_runner
+from pygolang.io_callback import IO
+
+COUNTING = """
+func sum(n int) int {
+    total := 0
+    for i := 0; i < n; i++ {
+        total += i
+    }
+    return total
+}
+"""
+
+WHILE = """
+func sum(n int) int {
+    total := 0
+    i := 0
+    for i < n {
+        total += i
+        i++
+    }
+    return total
+}
+"""
+
+RECURSION = """
+func sum_from(i int, n int, total int) int {
+    if i == n {
+        return total
+    }
+    return sum_from(i + 1, n, total + i)
+}
+func sum(n int) int {
+    return sum_from(0, n, 0)
+}
+"""
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def python_sum(count):
+    total = 0
+    for i in range(count):
+        total += i
+    return total
+
+
+def run_pygo(source, engine, count):
+    state = pygolang.run_source(source + f"result := sum({count})", io=NullIO(), engine=engine)
+    return state['result'][0].value
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=10_000_000)
+    arg_parser.add_argument(
+        '--engines', default=','.join(
+            e for e in ast_runner.ENGINES if e != ast_runner.ENGINE_TREE),
+        help="comma separated")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    python_sum(args.count)
+    python_seconds = time.perf_counter() - start
+    print(f"sum of {args.count} ints")
+    print(f"{'python':<24}{python_seconds:>9.2f}s{args.count / python_seconds / 1e6:>9.1f}M/s")
+
+    for engine in args.engines.split(','):
+        loops = [('counting', COUNTING, args.count), ('while', WHILE, args.count)]
+        if engine == ast_runner.ENGINE_STACKLESS:
+            loops.append(('recursion', RECURSION, args.count // 10))
+
+        for name, source, count in loops:
+            start = time.perf_counter()
+            assert run_pygo(source, engine, count) == count * (count - 1) // 2
+            seconds = time.perf_counter() - start
+            print(
+                f"{f'{engine} {name}':<24}{seconds:>9.2f}s"
+                f"{count / seconds / 1e6:>9.1f}M/s")
+
+
+if __name__ == '__main__':
+    main()
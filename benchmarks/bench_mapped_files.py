@@ -0,0 +1,105 @@
+"""Memory taken by reading a big file, and time taken by slicing it
+
+- python read(): the file read in a `bytes`
+- pygo readfile(): the file memory mapped, by a program taking slices of it
+
+The memory is the peak of what python allocated (`tracemalloc`): the pages
+of a mapped file are in the page cache of the OS, not in the process.
+
+Then the slices: many `[]byte` slices of 64K, against slicing `bytes`, which
+copies them.
+
+Usage:
+    python -m benchmarks.bench_mapped_files [--megabytes N]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pygolang
+from pygolang import ast_runner
+from pygolang.io_callback import IO
+
+SLICE_SIZE = 64 * 1024
+
+SUM_SLICES = """
+data := readfile("{path}")
+func sum(data []byte, total int) int {{
+    if len(data) < {size} {{
+        return total
+    }}
+    return sum(data[{size}:], total + len(data[:{size}]))
+}}
+sum(data, 0)
+"""
+
+
+def python_read(path):
+    with open(path, 'rb') as data_file:
+        return len(data_file.read())
+
+
+def pygo_readfile(path):
+    stdout = io.StringIO()
+    pygolang.run_source(
+        f'len(readfile("{path}"))', io=IO(stdout=stdout),
+        engine=ast_runner.ENGINE_STACKLESS)
+    return int(stdout.getvalue())
+
+
+def slice_bytes(data, slices):
+    total = 0
+    for start in range(0, slices * SLICE_SIZE, SLICE_SIZE):
+        total += len(data[start:start + SLICE_SIZE])
+    return total
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--megabytes', type=int, default=64)
+    args = arg_parser.parse_args()
+    size = args.megabytes * 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'data.bin')
+        with open(path, 'wb') as data_file:
+            data_file.write(os.urandom(size))
+
+        print(f"{args.megabytes} MiB file")
+        for name, read in [
+                ('python read()', python_read),
+                ('pygo readfile()', pygo_readfile)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            assert read(path) == size
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<18}{peak / 1024 / 1024:>9.1f} MiB{seconds * 1000:>9.0f}ms")
+
+        slices = size // SLICE_SIZE
+        print(f"{slices} slices of {SLICE_SIZE // 1024}K")
+        with open(path, 'rb') as data_file:
+            data = data_file.read()
+        # `[]byte` values are memoryviews, sliced without copying
+        for name, sequence in [('bytes', data), ('memoryview', memoryview(data))]:
+            start = time.perf_counter()
+            assert slice_bytes(sequence, slices) == slices * SLICE_SIZE
+            seconds = time.perf_counter() - start
+            print(f"{name:<18}{seconds * 1000:>9.1f}ms")
+
+        stdout = io.StringIO()
+        start = time.perf_counter()
+        pygolang.run_source(
+            SUM_SLICES.format(path=path, size=SLICE_SIZE),
+            io=IO(stdout=stdout), engine=ast_runner.ENGINE_STACKLESS)
+        seconds = time.perf_counter() - start
+        assert int(stdout.getvalue()) == slices * SLICE_SIZE
+        print(f"{'pygo sum(data)':<18}{seconds * 1000:>9.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
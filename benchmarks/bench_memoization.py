@@ -0,0 +1,59 @@
+"""Runs naive recursive fib, with and without memoizing pure functions
+
+Usage:
+    python -m benchmarks.bench_memoization [--n N] [--engine ENGINE]
+"""
+import argparse
+import time
+
+from pygolang import ast_runner, lexer_setup, parser_setup
+from pygolang.io_callback import IO
+from pygolang.memoization import Memoizer
+
+FIB = """func fib(n int) int {
+    if n < 2 {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}"""
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def run_fib(n, engine, memoizer):
+    io = NullIO()
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=engine, memoizer=memoizer)
+
+    runner.run(parser.parse(FIB))
+    code = parser.parse(f'fib({n})')
+
+    start = time.perf_counter()
+    runner.run(code)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--n', type=int, default=22)
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES, default=ast_runner.ENGINE_CLOSURE)
+    args = arg_parser.parse_args()
+
+    plain = run_fib(args.n, args.engine, None)
+    memoizer = Memoizer()
+    memoized = run_fib(args.n, args.engine, memoizer)
+
+    print(f"fib({args.n}), {args.engine} engine")
+    print(f"{'plain':<10}{plain * 1000:>10.2f}ms")
+    print(f"{'memoized':<10}{memoized * 1000:>10.2f}ms  ({plain / memoized:.0f}x)")
+    print(memoizer.format_report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Time to parse a program made of many source files, by worker count
+
+The synthetic program has a few functions in every file, calling the ones
+of the file before. It's parsed:
+- as a single source, with all the files joined, by one parser
+- by `pygolang.multifile.parse_files`, in this process (1 worker), then
+  with 2, 4... worker processes, up to the number of cores
+
+Usage:
+    python -m benchmarks.bench_multifile_parse [--files N] [--functions N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pygolang import lexer_setup, parser_setup
+from pygolang.io_callback import BufferIO
+from pygolang.multifile import parse_files
+
+FUNCTION = """
+func f{file}_{index}(a int, b int) int {{
+    total := a
+    if b > {index} {{
+        total = total + f{previous}_{index}(b, a) * 2
+    }} else {{
+        total = total - b % 7
+    }}
+    return total + {index}
+}}
+"""
+
+FIRST_FUNCTION = """
+func f0_{index}(a int, b int) int {{
+    return a - b + {index}
+}}
+"""
+
+
+def make_source(file, functions):
+    template = FIRST_FUNCTION if file == 0 else FUNCTION
+    source = ''.join(
+        template.format(file=file, previous=file - 1, index=index)
+        for index in range(functions)
+    )
+    return source + f"x{file} := f{file}_0({file}, 3)\n"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--files', type=int, default=200)
+    arg_parser.add_argument('--functions', type=int, default=10)
+    args = arg_parser.parse_args()
+    sources = [make_source(file, args.functions) for file in range(args.files)]
+    cores = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for file, source in enumerate(sources):
+            paths.append(os.path.join(tmp_dir, f'file{file}.go'))
+            with open(paths[-1], 'w') as source_file:
+                source_file.write(source)
+
+        print(
+            f"{args.files} files, {sum(map(len, sources)) // 1024} KiB, "
+            f"{cores} cores")
+
+        io = BufferIO()
+        lexer = lexer_setup.PyGoLexer(io)
+        parser = parser_setup.PyGoProgramParser(io, {})
+        start = time.perf_counter()
+        parser.parse(''.join(sources), lexer=lexer.lexer)
+        sequential = time.perf_counter() - start
+        print(f"{'one parser':<14}{sequential * 1000:>9.0f}ms")
+
+        workers = 1
+        while True:
+            start = time.perf_counter()
+            parse_files(paths, max_workers=workers)
+            seconds = time.perf_counter() - start
+            print(
+                f"{f'{workers} workers':<14}{seconds * 1000:>9.0f}ms"
+                f"{sequential / seconds:>8.2f}x"
+            )
+            if workers >= cores:
+                break
+            workers = min(workers * 2, cores)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Measures how the cost of looking up names grows with the nesting depth
+
+A chain of functions f0 ... fN is created, where every function calls the
+previous one, and then reads a module level name and its parameter several
+times. With scope lists, every call pushes another scope to search through,
+so looking up names gets slower the deeper the call is. With frame slots,
+lookups cost the same at any depth.
+
+Usage:
+    python -m benchmarks.bench_name_lookup
+"""
+import argparse
+import timeit
+
+from pygolang import ast_runner, lexer_setup, parser_setup
+from pygolang.io_callback import IO
+
+LOOKUPS = "x + g + x + g + x + g + x + g"
+DEPTHS = (1, 4, 16, 32)
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def build_chain(depth):
+    code = ["g := 1", f"func f0(x int) int {{ return {LOOKUPS} }}"]
+    for level in range(1, depth + 1):
+        code.append(
+            f"func f{level}(x int) int {{ return f{level - 1}(x) + {LOOKUPS} }}"
+        )
+    return code
+
+
+def bench(engine, depth, repeat):
+    io = NullIO()
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=engine)
+
+    for line in build_chain(depth):
+        runner.run(parser.parse(line))
+
+    code = parser.parse(f"f{depth}(1)")
+    best = min(timeit.repeat(lambda: runner.run(code), number=repeat, repeat=5))
+
+    # time per function level, each level doing the same amount of lookups
+    return best / repeat / (depth + 1)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    print("time per call level (8 name lookups each)")
+    print(f"{'depth':<8}" + ''.join(f"{e:>12}" for e in ast_runner.ENGINES))
+    for depth in DEPTHS:
+        row = f"{depth:<8}"
+        for engine in ast_runner.ENGINES:
+            row += f"{bench(engine, depth, args.repeat) * 1e6:>10.2f}us"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Latency of running a small program in isolation, per request
+
+- prefork: a worker forked ahead of time by `pygolang.prefork.PreforkPool`
+- spawn (run): a new `python -m pygolang run prog.go` process
+- spawn (interpreter): a new `python -m pygolang.interpreter` process, with
+  the program's lines on its stdin
+
+Every request runs in a process of its own, either way.
+
+Usage:
+    python -m benchmarks.bench_prefork [--requests N] [--engine ENGINE]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pygolang import ast_runner
+from pygolang.prefork import PreforkPool
+
+PROGRAM = """\
+func fib(n int) int { if n < 2 { return n } return fib(n - 1) + fib(n - 2) }
+x := fib(15)
+x * 2
+"""
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return ", ".join(
+        f"p{int(fraction * 100)} "
+        f"{latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000:.1f}ms"
+        for fraction in (0.5, 0.9, 0.99)
+    )
+
+
+def measure(run, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--requests', type=int, default=100)
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES, default=ast_runner.ENGINE_CLOSURE)
+    args = arg_parser.parse_args()
+    engine_args = ['--engine', args.engine]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'prog.go')
+        with open(path, 'w') as source_file:
+            source_file.write(PROGRAM)
+
+        start = time.perf_counter()
+        with PreforkPool(engine=args.engine) as pool:
+            startup = time.perf_counter() - start
+            prefork = measure(lambda: pool.run(PROGRAM), args.requests)
+            report = pool.format_report()
+
+        spawn_run = measure(lambda: subprocess.run(
+            [sys.executable, '-m', 'pygolang', *engine_args, 'run', path],
+            check=True, capture_output=True), args.requests)
+        spawn_interpreter = measure(lambda: subprocess.run(
+            [sys.executable, '-m', 'pygolang.interpreter', *engine_args],
+            input=PROGRAM, text=True, check=True, capture_output=True),
+            args.requests)
+
+    print(f"{args.requests} requests, {args.engine} engine")
+    print(f"{'prefork':<22}{percentiles(prefork)}")
+    print(f"{'spawn (run)':<22}{percentiles(spawn_run)}")
+    print(f"{'spawn (interpreter)':<22}{percentiles(spawn_interpreter)}")
+    print(f"pool started in {startup * 1000:.1f}ms. {report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compares parsing a program with loading it from the program cache
+
+Usage:
+    python -m benchmarks.bench_program_cache [--functions N] [--runs N]
+"""
+import argparse
+import tempfile
+import time
+
+from pygolang import lexer_setup, parser_setup
+from pygolang.io_callback import IO
+from pygolang.program_cache import ProgramCache
+
+FUNC_TEMPLATE = """func f{n}(a int, b int) int {{
+    var c int = a * {n} + b
+    if c > {n} {{
+        c = c - {n}
+    }} else {{
+        c = c + (a - b) * 2
+    }}
+    return c
+}}"""
+
+
+def best_of(runs, func):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--functions', type=int, default=200)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    io = IO()
+    lexer_setup.PyGoLexer(io)
+    sources = [FUNC_TEMPLATE.format(n=n) for n in range(args.functions)]
+
+    def parse_all(parse):
+        parser = parser_setup.PyGoParser(io, {})
+        for source in sources:
+            parse(parser, source)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProgramCache(cache_dir)
+        parse_all(cache.parse)
+
+        parsed = best_of(args.runs, lambda: parse_all(
+            lambda parser, source: parser.parse(source)))
+        loaded = best_of(args.runs, lambda: parse_all(cache.parse))
+
+    print(f"{args.functions} functions")
+    print(f"{'parsed':<10}{parsed * 1000:>8.1f}ms")
+    print(f"{'cached':<10}{loaded * 1000:>8.1f}ms  ({parsed / loaded:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
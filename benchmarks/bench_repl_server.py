@@ -0,0 +1,160 @@
+"""Load test of the interpreter server (`pygolang.server`)
+
+Opens many sessions at once, each running the same lines one after the
+other, and reports:
+- the latency of the lines: from sending one, to getting the next prompt
+- the memory each session takes in the server, measured with tracemalloc
+
+The server runs in a thread of this process, on its own asyncio loop, and
+the clients on the main thread.
+
+Usage:
+    python -m benchmarks.bench_repl_server [--sessions N] [--engine ENGINE]
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+
+from pygolang import ast_runner
+from pygolang.server import ReplServer
+
+LINES = [
+    'x := 10',
+    'func double(n int) int { return n * 2 }',
+    'y := double(x) + 1',
+    'y * y',
+    'if y > 5 { y = y - 5 }',
+    'double(y)',
+]
+
+PROMPT = ReplServer.PROMPT.encode()
+
+
+class ServerThread:
+    """Runs a server on a loop of its own, in a background thread"""
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        self._thread = threading.Thread(target=self.loop.run_forever)
+
+    def start(self):
+        self._thread.start()
+        listener = self.call(self.server.start_tcp('127.0.0.1', 0))
+        self.port = listener.sockets[0].getsockname()[1]
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+async def open_session(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    await reader.readuntil(PROMPT)
+    return reader, writer
+
+
+async def run_line(reader, writer, line):
+    """
+    :return: the seconds it took to get the next prompt
+    """
+    start = time.perf_counter()
+    writer.write(line.encode() + b'\n')
+    await reader.readuntil(PROMPT)
+    return time.perf_counter() - start
+
+
+async def run_sessions(port, sessions, rounds):
+    """
+    :return: the latencies of all the lines run
+    """
+    latencies = []
+
+    async def session():
+        reader, writer = await open_session(port)
+        for _ in range(rounds):
+            for line in LINES:
+                latencies.append(await run_line(reader, writer, line))
+        writer.close()
+
+    await asyncio.gather(*[session() for _ in range(sessions)])
+    return latencies
+
+
+class NullWriter:
+    def write(self, data):
+        pass
+
+    def is_closing(self):
+        return False
+
+
+def session_memory(engine, sessions):
+    """
+    :return: the bytes a new server allocates for every session, after it
+        ran the lines, in its workers, like it does for connections. Measured
+        without connections, which would count the buffers of the clients too
+    """
+    async def run_lines():
+        server = ReplServer(engine=engine)
+        loop = asyncio.get_running_loop()
+        opened = [server.create_session(NullWriter(), loop) for _ in range(sessions)]
+        for line in LINES:
+            await asyncio.gather(*[
+                asyncio.wrap_future(server.run_line(session, line))
+                for session in opened
+            ])
+        return opened
+
+    tracemalloc.start()
+    opened = asyncio.run(run_lines())
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated / len(opened)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--sessions', type=int, default=200)
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES, default=ast_runner.ENGINE_CLOSURE)
+    args = arg_parser.parse_args()
+
+    server = ReplServer(engine=args.engine)
+    server_thread = ServerThread(server)
+    server_thread.start()
+
+    start = time.perf_counter()
+    latencies = sorted(asyncio.run(
+        run_sessions(server_thread.port, args.sessions, args.rounds)))
+    seconds = time.perf_counter() - start
+
+    print(
+        f"{args.sessions} concurrent sessions, {len(latencies)} lines, "
+        f"{args.engine} engine: {len(latencies) / seconds:.0f} lines/s")
+    print("latency per line: " + ", ".join(
+        f"p{int(fraction * 100)} {percentile(latencies, fraction) * 1000:.2f}ms"
+        for fraction in (0.5, 0.9, 0.99)
+    ) + f", mean {statistics.mean(latencies) * 1000:.2f}ms")
+
+    server_thread.stop()
+    print(server.format_report())
+
+    memory = session_memory(args.engine, args.sessions)
+    print(f"memory per session: {memory / 1024:.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Lines per second read from stdin by pygo programs, against plain python
+
+- python: `for line in stdin`
+- Scanner: the buffer behind the `scan` builtin, driven from python
+- pygo scan(0): a program counting lines with `scan`
+- pygo readline(): the same program, with `readline`, one call per line
+
+The pygo programs run on the stackless engine, the only one doing I/O.
+
+Usage:
+    python -m benchmarks.bench_scanner [--lines N]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import pygolang
+from pygolang import ast_runner
+from pygolang.builtin import SCAN_CHUNK_SIZE, Scanner
+from pygolang.io_callback import BufferedIO
+
+COUNT_SCANNED = """
+func count(n int) int {
+    if scan(0) {
+        return count(n + 1)
+    }
+    return n
+}
+count(0)
+"""
+
+COUNT_READ = """
+func count(n int) int {
+    if readline() != "" {
+        return count(n + 1)
+    }
+    return n
+}
+count(0)
+"""
+
+
+def python_lines(path):
+    with open(path) as stdin:
+        return sum(1 for _ in stdin)
+
+
+def scanner_lines(path):
+    with open(path) as stdin:
+        scanner = Scanner(None)
+        lines = 0
+        while True:
+            found = scanner.next_token()
+            if found is None:
+                scanner.feed(stdin.read(SCAN_CHUNK_SIZE))
+            elif found:
+                lines += 1
+            else:
+                return lines
+
+
+def pygo_lines(source):
+    def count(path):
+        stdout = io.StringIO()
+        with open(path) as stdin:
+            pygolang.run_source(
+                source, io=BufferedIO(stdout=stdout, stdin=stdin),
+                engine=ast_runner.ENGINE_STACKLESS)
+        return int(stdout.getvalue())
+
+    return count
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--lines', type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'input.log')
+        with open(path, 'w') as input_file:
+            for line in range(args.lines):
+                input_file.write(f"2024-01-01 12:00:{line % 60:02} GET /items/{line} 200\n")
+
+        print(f"{args.lines} lines")
+        for name, count in [
+                ('python', python_lines),
+                ('Scanner', scanner_lines),
+                ('pygo scan(0)', pygo_lines(COUNT_SCANNED)),
+                ('pygo readline()', pygo_lines(COUNT_READ))]:
+            start = time.perf_counter()
+            assert count(path) == args.lines
+            seconds = time.perf_counter() - start
+            print(f"{name:<18}{args.lines / seconds:>12.0f} lines/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Memory taken by the elements of slices, and the speed of appending
+
+- bytes per element of a `[]int` and a `[]bool`, made by a pygo program
+  appending to it, against a python list holding an `ast.Int` (or
+  `ast.BoolValue`) per element, the way the boxed engines hold values
+- appends per second, for every engine but the slow `tree` one
+
+Usage:
+    python -m benchmarks.bench_slices [--elements N] [--engines a,b]
+"""
+import argparse
+import time
+import tracemalloc
+
+import pygolang
+from pygolang import ast
+from pygolang.io_callback import BufferIO
+
+FILL = """
+func fill(n int) []{elem_type} {{
+    var s []{elem_type}
+    for i := 0; i < n; i++ {{
+        s = append(s, {elem})
+    }}
+    return s
+}}
+s := fill({count})
+"""
+
+
+def run_fill(elem_type, elem, count, engine):
+    names = pygolang.run_source(
+        FILL.format(elem_type=elem_type, elem=elem, count=count),
+        io=BufferIO(), engine=engine)
+    return names['s'][0]
+
+
+def traced_bytes(func):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    value = func()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--elements', type=int, default=1000000)
+    arg_parser.add_argument(
+        '--engines', default='closure,stackless,unboxed',
+        help="comma separated; `tree` takes minutes for a million elements")
+    args = arg_parser.parse_args()
+    count = args.elements
+
+    print(f"{count} elements, bytes per element")
+    for name, make in [
+            ('[]int', lambda: run_fill('int', 'i * 1000', count, 'unboxed')),
+            ('list of ast.Int', lambda: [ast.Int(i * 1000) for i in range(count)]),
+            ('[]bool', lambda: run_fill('bool', 'i % 2 == 0', count, 'unboxed')),
+            ('list of BoolValue', lambda: [ast.BoolValue(i % 2 == 0) for i in range(count)])]:
+        value, size = traced_bytes(make)
+        print(f"{name:<20}{size / count:>8.1f}")
+        del value
+
+    print("appends per second")
+    for engine in args.engines.split(','):
+        start = time.perf_counter()
+        run_fill('int', 'i', count, engine)
+        seconds = time.perf_counter() - start
+        print(f"{engine:<20}{count / seconds:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Measures interpreter startup time, with and without cached parser tables
+
+Every run starts a new `python -m pygolang.interpreter` process, which
+evaluates one line and exits.
+"cold" runs use an empty cache directory, so the tables are generated.
+"warm" runs use a cache directory which already has them.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pygolang import grammar_cache
+
+
+def run_interpreter(cache_dir):
+    env = dict(os.environ, **{grammar_cache.CACHE_DIR_ENV_VAR: cache_dir})
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'pygolang.interpreter'],
+        input=b'1 + 1\n', env=env, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--runs', type=int, default=10)
+    args = arg_parser.parse_args()
+
+    cold = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(run_interpreter(cache_dir))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        run_interpreter(cache_dir)
+        warm = [run_interpreter(cache_dir) for _ in range(args.runs)]
+
+    baseline = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import ply.yacc'], check=True)
+        baseline.append(time.perf_counter() - start)
+
+    print(f"{'python + import ply':<22}{min(baseline) * 1000:>8.1f}ms")
+    print(f"{'cold main()':<22}{min(cold) * 1000:>8.1f}ms")
+    print(f"{'warm main()':<22}{min(warm) * 1000:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
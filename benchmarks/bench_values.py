@@ -0,0 +1,129 @@
+"""Measures the memory used by run-time values, and how many are allocated
+
+- the bytes taken by every (boxed) pygo int
+- for every engine: the time it takes to run a snippet doing arithmetic,
+  and the number of `ast.Int` objects it allocates while doing so
+- the peak RSS of a process keeping a million ints alive, as pygo values
+  and as the python values the unboxed engine computes with
+
+Usage:
+    python -m benchmarks.bench_values [--repeat N] [--values N]
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+from pygolang import ast, ast_runner, lexer_setup, optimizer, parser_setup
+from pygolang.io_callback import IO
+
+FUNC = "func poly(x int) int { return x * x * x + 2 * x * x - 3 * x + 4 }"
+
+SNIPPET = ' + '.join(f"poly({n}) % 100" for n in range(1, 41))
+
+
+class NullIO(IO):
+    def to_stdout(self, stuff):
+        pass
+
+
+def bytes_per_int(count):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    values = [ast.Int(n) for n in range(10 ** 6, 10 ** 6 + count)]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    del values
+    return size / count
+
+
+def count_int_allocations(func):
+    """
+    :return: the number of `ast.Int` objects created while calling `func`
+    """
+    original_new = ast.Int.__new__
+    allocations = 0
+
+    def counting_new(cls, value):
+        nonlocal allocations
+        new_int = original_new(cls, value)
+        if new_int is not ast.Int._instance_cache.get(value):
+            allocations += 1
+        return new_int
+
+    ast.Int.__new__ = counting_new
+    try:
+        func()
+    finally:
+        ast.Int.__new__ = original_new
+    return allocations
+
+
+def bench_engine(engine, repeat):
+    io = NullIO()
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=engine)
+    code_optimizer = optimizer.Optimizer()
+
+    runner.run(code_optimizer.optimize(parser.parse(FUNC)))
+    code = code_optimizer.optimize(parser.parse(SNIPPET))
+
+    elapsed = min(timeit.repeat(lambda: runner.run(code), number=repeat, repeat=5))
+    allocations = count_int_allocations(lambda: runner.run(code))
+    return elapsed / repeat, allocations
+
+
+def max_rss_kb(kind, count):
+    """Peak RSS of a new process, keeping `count` values of a kind alive"""
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_values',
+         '--keep-alive', kind, '--values', str(count)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return int(output)
+
+
+def keep_alive(kind, count):
+    values = range(10 ** 6, 10 ** 6 + count)
+    if kind == 'boxed':
+        values = [ast.Int(n) for n in values]
+    elif kind == 'unboxed':
+        values = list(values)
+    else:
+        values = None
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    arg_parser.add_argument('--values', type=int, default=10 ** 6)
+    arg_parser.add_argument('--keep-alive', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.keep_alive:
+        keep_alive(args.keep_alive, args.values)
+        return
+
+    print(f"bytes per int: {bytes_per_int(100000):.0f}")
+    print()
+
+    print(f"{'engine':<12}{'time':>12}{'ints allocated':>18}")
+    for engine in ast_runner.ENGINES:
+        elapsed, allocations = bench_engine(engine, args.repeat)
+        print(f"{engine:<12}{elapsed * 10 ** 6:>10.0f}us{allocations:>18}")
+    print()
+
+    baseline = max_rss_kb('none', args.values)
+    for kind in ['boxed', 'unboxed']:
+        rss = max_rss_kb(kind, args.values) - baseline
+        print(f"RSS of {args.values} {kind} ints: {rss / 1024:.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+_INTERPRETER_API = ('run_file', 'run_files', 'run_source')
+
+__all__ = list(_INTERPRETER_API)
+
+
+def __getattr__(name):
+    # Imported on first use: `python -m pygolang.interpreter` would
+    # otherwise find the module already imported, and run it twice
+    if name in _INTERPRETER_API:
+        from pygolang import interpreter
+        return getattr(interpreter, name)
+    raise AttributeError(f"module 'pygolang' has no attribute {name!r}")
@@ -0,0 +1,181 @@
+"""Command line entry point
+
+    python -m pygolang                  starts the interactive interpreter
+    python -m pygolang run prog.go      runs a source file
+    python -m pygolang run a.go b.go    runs a program made of many files
+    python -m pygolang serve --tcp :7000
+                                        serves interpreter sessions
+    python -m pygolang batch a.go b.go  runs many programs, on all the cores
+"""
+import argparse
+import json
+import sys
+
+from pygolang import ast_runner, batch, interpreter, optimizer, server
+from pygolang.memoization import Memoizer
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from pygolang.io_callback import BufferedIO
+from pygolang.program_cache import ProgramCache
+from pygolang.scheduler import Scheduler
+
+
+def run(args):
+    io = BufferedIO(buffer_size=args.buffer_size)
+    program_cache = None if args.no_cache else ProgramCache()
+    code_optimizer = optimizer.Optimizer(args.optimization_level)
+    memoizer = Memoizer() if args.memoize else None
+    scheduler = Scheduler()
+
+    try:
+        if len(args.paths) > 1:
+            interpreter.run_files(
+                args.paths, io=io, engine=args.engine,
+                optimizer=code_optimizer, memoizer=memoizer,
+                scheduler=scheduler, max_workers=args.workers)
+        else:
+            interpreter.run_file(
+                args.paths[0], io=io, engine=args.engine,
+                program_cache=program_cache, optimizer=code_optimizer,
+                memoizer=memoizer, scheduler=scheduler)
+    except (PyGoGrammarError, PyLangRuntimeError) as err:
+        io.to_stderr(f"Error: {err}\n")
+        return 1
+    finally:
+        if args.optimizer_report and code_optimizer.report:
+            io.to_stderr(code_optimizer.format_report() + '\n')
+        if args.memoize_report and memoizer is not None:
+            io.to_stderr(memoizer.format_report() + '\n')
+        if args.scheduler_report:
+            io.to_stderr(scheduler.format_report() + '\n')
+        scheduler.shutdown()
+    return 0
+
+
+def repl(args):
+    interpreter.main(
+        io=BufferedIO(buffer_size=args.buffer_size),
+        engine=args.engine,
+        optimizer=optimizer.Optimizer(args.optimization_level),
+        memoizer=Memoizer() if args.memoize else None)
+    return 0
+
+
+def serve(args):
+    repl_server = server.ReplServer(
+        engine=args.engine,
+        optimizer=optimizer.Optimizer(args.optimization_level),
+        memoizer=Memoizer() if args.memoize else None)
+    server.serve(repl_server, tcp_address=args.tcp, unix_path=args.unix)
+    sys.stderr.write(repl_server.format_report() + '\n')
+    return 0
+
+
+def run_batch(args):
+    """Prints a line of json for every program: its path, and the fields of
+    its `pygolang.interpreter.ProgramResult`
+    """
+    failed = False
+    results = batch.run_batch(
+        paths=args.paths, max_workers=args.workers, chunksize=args.chunksize,
+        timeout=args.timeout, ordered=not args.unordered, engine=args.engine,
+        optimization_level=args.optimization_level)
+
+    for index, result in results:
+        failed = failed or result.error is not None
+        sys.stdout.write(json.dumps({
+            'path': args.paths[index],
+            'stdout': result.stdout,
+            'stderr': result.stderr,
+            'error': result.error,
+            'names': result.names,
+        }) + '\n')
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m pygolang')
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES,
+        default=ast_runner.DEFAULT_ENGINE,
+        help="the engine used to run the code"
+    )
+    arg_parser.add_argument(
+        '-O', dest='optimization_level', type=int, choices=optimizer.LEVELS,
+        default=optimizer.DEFAULT_LEVEL,
+        help="the optimization level: -O0, -O1, -O2 or -O3"
+    )
+    arg_parser.add_argument(
+        '--memoize', action='store_true',
+        help="cache the results of pure functions"
+    )
+    arg_parser.add_argument(
+        '--buffer-size', type=int, default=BufferedIO.DEFAULT_BUFFER_SIZE,
+        help="the characters printed to stdout which are buffered, before "
+             "being written out. When stdout is a terminal, every line is "
+             "written out right away"
+    )
+    arg_parser.set_defaults(command=repl)
+    subparsers = arg_parser.add_subparsers()
+
+    run_parser = subparsers.add_parser(
+        'run', help="run a program, made of one or more source files")
+    run_parser.add_argument('paths', nargs='+')
+    run_parser.add_argument(
+        '--workers', type=int, default=None,
+        help="the number of processes parsing the files of a program made "
+             "of many. Defaults to the number of cores"
+    )
+    run_parser.add_argument(
+        '--no-cache', action='store_true',
+        help="parse the file even if it was parsed before"
+    )
+    run_parser.add_argument(
+        '--optimizer-report', action='store_true',
+        help="print how many nodes each optimization pass removed"
+    )
+    run_parser.add_argument(
+        '--memoize-report', action='store_true',
+        help="print the hits, misses and evictions of the --memoize cache"
+    )
+    run_parser.add_argument(
+        '--scheduler-report', action='store_true',
+        help="print the goroutines spawned, blocked and switched between"
+    )
+    run_parser.set_defaults(command=run)
+
+    serve_parser = subparsers.add_parser(
+        'serve', help="serve interpreter sessions over sockets")
+    address_group = serve_parser.add_mutually_exclusive_group(required=True)
+    address_group.add_argument(
+        '--tcp', metavar='HOST:PORT', help="the tcp address to listen on")
+    address_group.add_argument(
+        '--unix', metavar='PATH', help="the unix socket to listen on")
+    serve_parser.set_defaults(command=serve)
+
+    batch_parser = subparsers.add_parser(
+        'batch', help="run many programs in parallel, printing json lines")
+    batch_parser.add_argument('paths', nargs='+')
+    batch_parser.add_argument(
+        '--workers', type=int, default=None,
+        help="the number of worker processes. Defaults to the number of cores"
+    )
+    batch_parser.add_argument(
+        '--chunksize', type=int, default=batch.DEFAULT_CHUNKSIZE,
+        help="how many programs a worker gets at a time"
+    )
+    batch_parser.add_argument(
+        '--timeout', type=float, default=None,
+        help="seconds after which a program is stopped"
+    )
+    batch_parser.add_argument(
+        '--unordered', action='store_true',
+        help="print the results as soon as they're ready"
+    )
+    batch_parser.set_defaults(command=run_batch)
+
+    args = arg_parser.parse_args(argv)
+    return args.command(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
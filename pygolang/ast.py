@@ -1,8 +1,23 @@
+import array
+import itertools
 import operator
+import sys
+import weakref
 from collections import defaultdict
 
 from pygolang import common_grammar
-from pygolang.errors import PyGoGrammarError
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+
+
+class Node:
+    """Superclass for the nodes of the ast, apart from values
+
+    Programs can be large, and are kept around once parsed, so nodes don't
+    get a __dict__: every subclass lists its attributes in __slots__.
+    Nodes can be weakly referenced, so the engines can keep the code they
+    compiled for them.
+    """
+    __slots__ = ('__weakref__',)
 
 
 class Value:
@@ -12,10 +27,16 @@ class Value:
     Examples: numbers, strings, arrays
     Examples of things NOT leafs: function bodies, assignments
     """
+    # The values created at run-time are tiny and many, so they don't get a
+    # __dict__. Subclasses which don't declare their own __slots__ get one
+    __slots__ = ()
+
     value = None  # Leafs have values
 
 
 class TypedValue(Value):
+    __slots__ = ('value', 'type')
+
     def __init__(self, value, type):
         """
         :param object value:
@@ -29,8 +50,20 @@ class TypedValue(Value):
 
 
 class ReprHelper:
-    def __init__(self, repr_string):
+    def __init__(self, repr_string, global_name=None):
+        """
+        :param str repr_string:
+        :param str|None global_name: the name of the module level variable
+            holding the object, for objects compared by identity. They're
+            pickled by that name, so unpickling doesn't copy them
+        """
         self.repr_string = repr_string
+        self.global_name = global_name
+
+    def __reduce__(self):
+        if self.global_name is None:
+            return ReprHelper, (self.repr_string,)
+        return self.global_name
 
     def __str__(self):
         return self.repr_string
@@ -38,38 +71,112 @@ class ReprHelper:
     __repr__ = __str__
 
 
-class FuncCall:
+class FuncCall(Node):
+    __slots__ = ('func_name', 'type', 'arguments')
+
     def __init__(self, func_name, args, type):
+        """
+        :param str func_name:
+        :param FuncArguments|None args: the arguments, as parsed. Only
+            their flattened list is kept
+        :param Type type: the type the function returns
+        """
         self.func_name = func_name
-        self.args = args
         self.type = type
 
+        # The expressions passed as arguments, in order. Flattened once here,
+        # instead of on every call
+        self.arguments = self.flatten_arguments(args)
+
     def get_signature(self):
         """
         :return: a list [(name, typename), ...] representing the params
             and their types
         """
 
+    def get_flat_arguments(self):
+        """
+        :return: the expressions passed as arguments, in order
+        """
+        return self.arguments
+
+    @staticmethod
+    def flatten_arguments(args):
+        """
+        :param FuncArguments|None args:
+        :rtype: list
+        """
+        # The args_list grammar rule nests the arguments after a comma in
+        # another FuncArguments, so these need to be flattened
+        flat_arguments = []
+
+        def flatten(arg_list):
+            for expression in arg_list:
+                if isinstance(expression.child, FuncArguments):
+                    flatten(expression.child.arg_list)
+                else:
+                    flat_arguments.append(expression.child)
+
+        flatten(args.arg_list if args else [])
+        return flat_arguments
+
+
+class BuiltinCall(Node):
+    """A call to one of the functions in `pygolang.builtin.BUILTINS`"""
+    __slots__ = ('name', 'type', 'arguments')
+
+    def __init__(self, builtin, args):
+        """
+        :param pygolang.builtin.Builtin builtin:
+        :param FuncArguments|None args: the arguments, as parsed
+        """
+        arguments = FuncCall.flatten_arguments(args)
+        if len(arguments) != len(builtin.param_types):
+            raise PyGoGrammarError(
+                f"{builtin.name}() takes {len(builtin.param_types)} "
+                f"arguments, not {len(arguments)}")
+        for param_type, argument in zip(builtin.param_types, arguments):
+            if not param_type.is_assignable_from(argument.type):
+                raise PyGoGrammarError(
+                    f"Can't pass type ({argument.type}) as ({param_type}) to "
+                    f"{builtin.name}()")
+
+        # Only the name is kept, so programs can be pickled
+        self.name = builtin.name
+        self.type = builtin.return_type
+        self.arguments = arguments
+
 
 class FuncCreation(TypedValue):
+    __slots__ = (
+        'name', 'body', 'frame_size', 'params_and_types', 'param_names',
+        '__weakref__',
+    )
+
     def __init__(self, name, params, return_type, body):
         """
         :param str name:
-        :param FuncParams params:
+        :param FuncParams params: the parameters, as parsed. Only the names
+            and types resolved from them are kept
         :param FuncReturnType return_type:
         :param FuncBody body:
         """
         self.name = name
-        self.params = params
-        self.return_type = return_type
         self.body = body
+
+        # Set by the parser, once the function's type scope is closed
+        self.frame_size = 0
+
+        # The signature is resolved once, instead of on every call
+        self.params_and_types = self.get_params_and_types_static(params.params)
+        self.param_names = [name for name, _ in self.params_and_types]
         super(FuncCreation, self).__init__(
             self,
             self.get_func_type(params, return_type)
         )
 
     def get_params_and_types(self):
-        return self.get_params_and_types_static(self.params.params)
+        return self.params_and_types
 
     @staticmethod
     def get_params_and_types_static(params):
@@ -90,16 +197,19 @@ class FuncCreation(TypedValue):
         # if there's no previous token, we push a name
         # if name comes after name, we push a type
         # if name comes after comma, we push a name
-        # TODO - move this logic in the ast.Function, during obj. construction
-        # flatmap function params
+        # flatmap function params. The func_params grammar rule nests them
+        # once for every comma, so they need to be flattened recursively
         flat_param_definitions = []
-        for nested_param in params:
-            if nested_param.type == 'func_params':
-                for single_param in nested_param.value.params:
-                    flat_param_definitions.append(single_param)
-            else:
-                # it's a comma, not a nested param
-                flat_param_definitions.append(nested_param)
+
+        def flatten(nested_params):
+            for nested_param in nested_params:
+                if nested_param.type == 'func_params':
+                    flatten(nested_param.value.params)
+                else:
+                    # it's a name, a type or a comma, not a nested param
+                    flat_param_definitions.append(nested_param)
+
+        flatten(params)
 
         param_names = []
         param_types = []
@@ -135,11 +245,19 @@ class FuncCreation(TypedValue):
         for type_decl in rtype:
             flat_return_type.append(type_decl.value)
 
-        # Create a signature for this function type, based on the types of its
-        # input params, and its returned type
+        return cls.make_func_type(param_types, flat_return_type)
+
+    @staticmethod
+    def make_func_type(param_types, return_types):
+        """Creates the type of the functions with this signature
+
+        :param list[Type] param_types:
+        :param list[Type] return_types:
+        :rtype: Type
+        """
         return Type(
-            f"func ({', '.join(str(e) for e in param_types)}) {', '.join(str(e) for e in flat_return_type)}",
-            rtype=flat_return_type[0] if len(flat_return_type) == 1 else flat_return_type or None
+            f"func ({', '.join(str(e) for e in param_types)}) {', '.join(str(e) for e in return_types)}",
+            rtype=return_types[0] if len(return_types) == 1 else return_types or None
         )
 
     def get_return_type(self, func):
@@ -147,46 +265,90 @@ class FuncCreation(TypedValue):
         :param FuncCreation func:
         :return:
         """
-        return self.return_type.rtype
+        return self.type.rtype
 
 
-class FuncParams:
+class FuncParams(Node):
+    __slots__ = ('params',)
+
     def __init__(self, params):
         self.params = params
 
 
-class FuncReturnType:
+class FuncReturnType(Node):
+    __slots__ = ('rtype',)
+
     def __init__(self, rtype):
         self.rtype = rtype
 
 
-class FuncBody:
+class FuncBody(Node):
+    __slots__ = ('statements',)
+
     def __init__(self, statements):
         self.statements = statements
 
 
-class FuncArguments:
+class FuncArguments(Node):
+    __slots__ = ('arg_list',)
+
     def __init__(self, arg_list):
         self.arg_list = arg_list
 
 
-class Name:
-    def __init__(self, value):
-        self.value = value
+class Name(Node):
+    """A variable, as used in expressions
+
+    Names are interned: there's only one node for every name and slot, no
+    matter how many times it's used, as long as some code uses it. They must
+    not be changed.
+    """
+    __slots__ = ('value', 'slot')
+
+    # {(name, slot): Name}. Weak, so the names of the programs parsed by
+    # long running processes (servers, pools of workers) are dropped with
+    # their programs
+    _instance_cache = weakref.WeakValueDictionary()
+
+    def __new__(cls, value, slot=None):
+        """
+        :param str value: the name
+        :param int|None slot: index of the name in its function's frame,
+            or None for module level (global) names. See `TypeScope`
+        """
+        try:
+            return cls._instance_cache[value, slot]
+        except KeyError:
+            pass
+
+        new_obj = object.__new__(cls)
+        new_obj.value = sys.intern(value)
+        new_obj.slot = slot
+        cls._instance_cache[value, slot] = new_obj
+        return new_obj
+
+    def __init__(self, value, slot=None):
+        # Everything was set by __new__. Interned names must not be changed
+        pass
+
+    def __reduce__(self):
+        return Name, (self.value, self.slot)
 
     def __repr__(self):
         return f"<Name: '{self.value}'>"
 
 
-class Expression:
+class Expression(Node):
+    __slots__ = ('child', 'type')
+
     def __init__(self, child, type_scope):
         """
 
-        :param TypeScope type_scope:
+        :param TypeScope type_scope: only used to find the expression's
+            type, it's not kept
         :param child:
         """
         self.child = child
-        self.type_scope_stack = type_scope
         self.type = self.determine_type(child, type_scope)
 
     def determine_type(self, child, type_scope):
@@ -233,6 +395,8 @@ class Expression:
 class OperatorDelegatorMixin:
     """Used for performing operations using its .value attribute
     """
+    __slots__ = ()
+
     def __add__(self, other):
         return self.__class__(self.value + other.value)
 
@@ -281,9 +445,30 @@ class OperatorDelegatorMixin:
 
 
 class Int(TypedValue, Value, OperatorDelegatorMixin):
+    __slots__ = ()
+
+    # {value: Int}, for the values in `SMALL_INT_RANGE`. Like python does
+    # for its own ints, the small ones (counters, indexes...) are created
+    # once, instead of for every operation producing them. Nothing is added
+    # to it after that
+    _instance_cache = {}
+
+    def __new__(cls, value):
+        cached = cls._instance_cache.get(value)
+        if cached is not None:
+            return cached
+
+        new_obj = object.__new__(cls)
+        new_obj.value = value
+        new_obj.type = IntType
+        return new_obj
+
     def __init__(self, value):
-        self.value = value
-        super(Int, self).__init__(value, IntType)
+        # Everything was set by __new__. Cached ints must not be changed
+        pass
+
+    def __reduce__(self):
+        return Int, (self.value,)
 
     def __repr__(self):
         return f"ast.Int({self.value})"
@@ -292,7 +477,9 @@ class Int(TypedValue, Value, OperatorDelegatorMixin):
         return f"{self.value}"
 
 
-class Operator:
+class Operator(Node):
+    __slots__ = ('operator', 'args_list', 'type', 'operator_pyfunc')
+
     def __init__(self, operator_symbol, operator_token, args_list):
         """
         :param str operator_symbol: the characters of the operator, eg: '+'
@@ -346,26 +533,423 @@ class Operator:
             )
 
 
-class Assignment:
+class LogicalOperator(Operator):
+    """`&&` and `||`. The right operand is only evaluated when needed
+
+    The operands are type checked like for any other operator, but the
+    engines don't use `operator_pyfunc`, they short circuit instead
+    """
+    __slots__ = ('short_circuit_value',)
+
+    def __init__(self, operator_symbol, operator_token, args_list):
+        super(LogicalOperator, self).__init__(
+            operator_symbol, operator_token, args_list)
+
+        # If the left operand evaluates to this, it's also the result
+        if operator_token == common_grammar.OPERATORS.BOOLAND.value:
+            self.short_circuit_value = BoolLiteralFalse
+        else:
+            self.short_circuit_value = BoolLiteralTrue
+
+
+def _index_error(index, length):
+    return PyLangRuntimeError(
+        f"index out of range [{index}] with length {length}")
+
+
+def index_bytes(sequence, index):
+    """The python function of `Index`, on python values
+
+    :param memoryview sequence:
+    :param int index:
+    :rtype: int
+    """
+    if sequence is ValueNotSet:
+        raise _index_error(index, 0)
+    # Negative indexes count from the end in python, not in go
+    if index < 0:
+        raise _index_error(index, len(sequence))
+    try:
+        return sequence[index]
+    except IndexError:
+        raise _index_error(index, len(sequence)) from None
+
+
+def slice_bytes(sequence, low, high=None):
+    """The python function of `Slicing`, on python values
+
+    :param memoryview sequence:
+    :param int low:
+    :param int|None high: None slices up to the end
+    :rtype: memoryview
+    """
+    if sequence is ValueNotSet:
+        sequence = memoryview(b'')
+    length = len(sequence)
+    if high is None:
+        high = length
+    if not 0 <= low <= high <= length:
+        raise PyLangRuntimeError(
+            f"slice bounds out of range [{low}:{high}] with length {length}")
+    return sequence[low:high]
+
+
+def string_length(string):
+    """`len` of a string: its number of bytes, like in go
+
+    :param str string:
+    :rtype: int
+    """
+    return len(string.encode('utf-8', 'surrogateescape'))
+
+
+def slice_length(sequence):
+    """`len` of a slice. The nil slice is empty
+
+    :rtype: int
+    """
+    if sequence is ValueNotSet:
+        return 0
+    return len(sequence)
+
+
+def _unbox_slice(sequence):
+    return sequence if sequence is ValueNotSet else sequence.value
+
+
+def _boxed_index(sequence, index):
+    return Int(index_bytes(_unbox_slice(sequence), index.value))
+
+
+def _boxed_slice(sequence, low, high=None):
+    return ByteSlice(slice_bytes(
+        _unbox_slice(sequence), low.value,
+        None if high is None else high.value))
+
+
+def _boxed_string_length(string):
+    return Int(string_length(string.value))
+
+
+def _boxed_slice_length(sequence):
+    return Int(slice_length(_unbox_slice(sequence)))
+
+
+def slice_capacity(sequence):
+    """`cap` of a slice. A `[]byte` ends where its bytes do
+
+    :rtype: int
+    """
+    if sequence is ValueNotSet:
+        return 0
+    if isinstance(sequence, memoryview):
+        return len(sequence)
+    return sequence.capacity
+
+
+def _boxed_slice_capacity(sequence):
+    return Int(slice_capacity(_unbox_slice(sequence)))
+
+
+def reslice(sequence, low, high=None):
+    """The python function of `Slicing`, on `Slice`s
+
+    Like in go, the new slice shares the buffer of the old one, and can
+    reach past its length, up to its capacity.
+
+    :param Slice sequence:
+    :param int low:
+    :param int|None high: None slices up to the length
+    :rtype: Slice
+    """
+    if sequence is ValueNotSet:
+        length = capacity = 0
+    else:
+        length, capacity = sequence.length, sequence.capacity
+    if high is None:
+        high = length
+    if not 0 <= low <= high <= capacity:
+        raise PyLangRuntimeError(
+            f"slice bounds out of range [{low}:{high}] with capacity {capacity}")
+    if sequence is ValueNotSet:
+        return sequence
+    return Slice(
+        sequence.elements, sequence.buffer, sequence.offset + low,
+        high - low, capacity - low)
+
+
+def _boxed_reslice(sequence, low, high=None):
+    result = reslice(
+        _unbox_slice(sequence), low.value, None if high is None else high.value)
+    return result if result is ValueNotSet else SliceValue(result)
+
+
+def wrap_int64(value):
+    """
+    :param int value:
+    :return: the value, wrapped around like go's 64 bit ints
+    :rtype: int
+    """
+    return (value + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+
+def _store(buffer, position, value):
+    """Sets an element of a buffer, or appends it right after the last one"""
+    try:
+        if position == len(buffer):
+            buffer.append(value)
+        else:
+            buffer[position] = value
+    except OverflowError:
+        _store(buffer, position, wrap_int64(value))
+
+
+
+
+def check_slice_type(sequence, operation):
+    """
+    :param sequence: the expression an operation on slices is applied on
+    :param str operation: the name of the operation, for the error message
+    :rtype: SliceType
+    """
+    type_ = getattr(sequence, 'type', None)
+    if not isinstance(type_, SliceType):
+        raise PyGoGrammarError(
+            f"Invalid operation: {operation} non-slice type ({type_})")
+    return type_
+
+
+def check_int_operand(operand, operation):
+    if getattr(operand, 'type', None) != IntType:
+        raise PyGoGrammarError(
+            f"Invalid operation: {operation} with non-int type "
+            f"({getattr(operand, 'type', None)})")
+
+
+class Index(Operator):
+    """`s[i]`: an element of a slice
+
+    Like all the operations on slices, it's an operator, so the engines run
+    it like any other: by applying `operator_pyfunc` on its operands.
+    """
+    __slots__ = ()
+
+    def __init__(self, sequence, index):
+        """
+        :param sequence: the expression of the slice
+        :param index: the expression of the index
+        """
+        slice_type = check_slice_type(sequence, "index of")
+        check_int_operand(index, "index")
+
+        self.operator = '[]'
+        self.args_list = [sequence, index]
+        if slice_type == BytesType:
+            self.type = IntType
+            self.operator_pyfunc = _boxed_index
+        else:
+            self.type = slice_type.elem_type
+            self.operator_pyfunc = get_slice_elements(slice_type).boxed_index
+
+
+class Slicing(Operator):
+    """`s[low:high]`: a slice of a slice, sharing its elements
+
+    `low` defaults to 0, and a missing `high` to the length of the slice, so
+    there are only 2 operands then.
+    """
+    __slots__ = ()
+
+    def __init__(self, sequence, low=None, high=None):
+        """
+        :param sequence: the expression of the slice
+        :param low: the expression of the first index, or None
+        :param high: the expression of the index after the last, or None
+        """
+        self.type = check_slice_type(sequence, "slice of")
+        low = low if low is not None else Int(0)
+        self.args_list = [sequence, low] + ([high] if high is not None else [])
+        for bound in self.args_list[1:]:
+            check_int_operand(bound, "slice")
+
+        self.operator = '[:]'
+        self.operator_pyfunc = (
+            _boxed_slice if self.type == BytesType else _boxed_reslice)
+
+
+class Len(Operator):
+    """`len(s)`, of a slice or a string"""
+    __slots__ = ()
+
+    def __init__(self, args):
+        """
+        :param FuncArguments args: the arguments of the call, as parsed
+        """
+        arguments = FuncCall.flatten_arguments(args)
+        if len(arguments) != 1:
+            raise PyGoGrammarError(
+                f"len() takes 1 argument, not {len(arguments)}")
+        argument, = arguments
+
+        self.operator = 'len'
+        self.args_list = arguments
+        self.type = IntType
+        if getattr(argument, 'type', None) == StringType:
+            self.operator_pyfunc = _boxed_string_length
+        else:
+            check_slice_type(argument, "len of")
+            self.operator_pyfunc = _boxed_slice_length
+
+
+class Cap(Operator):
+    """`cap(s)`: how long a slice can grow, before `append` copies it"""
+    __slots__ = ()
+
+    def __init__(self, args):
+        """
+        :param FuncArguments args: the arguments of the call, as parsed
+        """
+        arguments = FuncCall.flatten_arguments(args)
+        if len(arguments) != 1:
+            raise PyGoGrammarError(
+                f"cap() takes 1 argument, not {len(arguments)}")
+        check_slice_type(arguments[0], "cap of")
+
+        self.operator = 'cap'
+        self.args_list = arguments
+        self.type = IntType
+        self.operator_pyfunc = _boxed_slice_capacity
+
+
+def check_slice_elements(sequence, operation):
+    """
+    :param sequence: the expression of a slice, whose elements are used
+    :param str operation: the name of the operation, for the error message
+    :rtype: SliceElements
+    """
+    slice_type = check_slice_type(sequence, operation)
+    elements = get_slice_elements(slice_type)
+    if elements is None:
+        raise PyGoGrammarError(
+            f"Invalid operation: {operation} type ({slice_type})")
+    return elements
+
+
+class Append(Operator):
+    """`append(s, x, y...)`: the slice, with the values after its elements
+
+    The values are written in the buffer of the slice, while its capacity
+    allows it. Otherwise, they go in a new buffer, twice as big.
+    """
+    __slots__ = ()
+
+    def __init__(self, args):
+        """
+        :param FuncArguments args: the arguments of the call, as parsed
+        """
+        arguments = FuncCall.flatten_arguments(args)
+        if not arguments:
+            raise PyGoGrammarError("append() takes at least 1 argument, not 0")
+        elements = check_slice_elements(arguments[0], "append to")
+        for value in arguments[1:]:
+            if not elements.type.elem_type.is_assignable_from(value.type):
+                raise PyGoGrammarError(
+                    f"Can't append type ({value.type}) to slice of type "
+                    f"({elements.type})")
+
+        self.operator = 'append'
+        self.args_list = arguments
+        self.type = elements.type
+        self.operator_pyfunc = elements.boxed_append
+
+
+class MakeSlice(Operator):
+    """`make([]T, length)` or `make([]T, length, capacity)`
+
+    The slice starts with `length` zero values. Every evaluation makes a new
+    slice, so this is never folded into a constant.
+    """
+    __slots__ = ()
+
+    def __init__(self, type, length, capacity=None):
+        """
+        :param SliceType type:
+        :param length: the expression of the length
+        :param capacity: the expression of the capacity, or None for as
+            much as the length
+        """
+        elements = get_slice_elements(type)
+        if elements is None:
+            raise PyGoGrammarError(f"Can't make type ({type})")
+        self.args_list = [length] + ([capacity] if capacity is not None else [])
+        for size in self.args_list:
+            check_int_operand(size, "make")
+
+        self.operator = 'make'
+        self.type = elements.type
+        self.operator_pyfunc = elements.boxed_make
+
+
+class SetIndex(Operator):
+    """`s[i] = value`: changes an element of a slice, in its buffer
+
+    It's a statement, evaluating to None. Being an operator, it's run by all
+    the engines like any other.
+    """
+    __slots__ = ()
+
+    def __init__(self, sequence, index, value):
+        """
+        :param sequence: the expression of the slice
+        :param index: the expression of the index
+        :param value: the expression of the new element
+        """
+        elements = check_slice_elements(sequence, "assign to the elements of")
+        check_int_operand(index, "index")
+        if not elements.type.elem_type.is_assignable_from(value.type):
+            raise PyGoGrammarError(
+                f"Can't assign type ({value.type}) to element of slice of "
+                f"type ({elements.type})")
+
+        self.operator = '[]='
+        self.args_list = [sequence, index, value]
+        self.type = None
+        self.operator_pyfunc = elements.boxed_set_index
+
+
+# {name: node class}, for the builtin functions which are operators, run by
+# every engine. Like the other builtins, they're only used for the names
+# the program didn't declare
+BUILTIN_OPERATORS = {
+    'len': Len,
+    'cap': Cap,
+    'append': Append,
+}
+
+
+class Assignment(Node):
+    __slots__ = ('name', 'value', 'slot')
+
     def __init__(self, name, value, type_scope):
         """
 
         :param str name:
         :param TypedValue value:
-        :param TypeScope type_scope:
+        :param TypeScope type_scope: only used for type checking and finding
+            the slot of the name, it's not kept
         """
         self.name = name
         self.value = value
-        self.type_scope = type_scope
+        self.slot = type_scope.get_variable_slot(name)
 
-        self.validate_types()
+        self.validate_types(type_scope)
 
         # raise NotImplementedError(
         #     "TODO implement a type check OR mark as solvable later"
         # )
 
-    def validate_types(self):
-        target_type = self.type_scope.get_variable_type(self.name)
+    def validate_types(self, type_scope):
+        target_type = type_scope.get_variable_type(self.name)
         type_to_assign = self.value.type
 
         if not target_type.is_assignable_from(type_to_assign):
@@ -377,22 +961,72 @@ class Assignment:
         # pass
 
 
-class Statement:
+class Statement(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 
-class InterpreterStart:
+def unwrap_statement(node):
+    """
+    :return: the node wrapped in (possibly several levels of) `Statement`
+    """
+    while isinstance(node, Statement):
+        node = node.value
+    return node
+
+
+def is_control_flow_statement(node):
+    """Tells whether running the statement can end the function it's in
+
+    When run, these statements evaluate to the value returned by a `return`
+    executed in them, or to None if no `return` was executed. This is
+    different from expression statements, whose value is just discarded.
+
+    :param node: a statement, possibly wrapped in `Statement` nodes
+    """
+    return isinstance(
+        unwrap_statement(node),
+        (Return, Conditional, Block, Select, For, ForRange, Break, Continue))
+
+
+class InterpreterStart(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 
-class Root:
-    def __init__(self, value):
+class Program(Node):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements):
+        """A whole source file, parsed in one go
+
+        :param list[InterpreterStart] statements: the top level statements.
+            They run one after the other, just like they would if they were
+            typed in the interpreter
+        """
+        self.statements = statements
+
+
+class Root(Node):
+    __slots__ = ('value', 'frame_size')
+
+    def __init__(self, value, frame_size=0):
+        """
+        :param value:
+        :param int frame_size: number of slots needed by the variables
+            declared in module level blocks
+        """
         self.value = value
+        self.frame_size = frame_size
+
 
+class Return(Node):
+    __slots__ = ('value',)
 
-class Return:
     def __init__(self, value):
         self.value = value
 
@@ -413,6 +1047,12 @@ class AbstractRuntimeScope:
     def __contains__(self, item):
         return item in self._scope_dict
 
+    def as_dict(self):
+        """
+        :return: the dict backing this scope: {name: [value, type]}
+        """
+        return self._scope_dict
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self._scope_dict})"
 
@@ -432,18 +1072,26 @@ class BlockRuntimeScope(AbstractRuntimeScope):
 
 
 class BoolValue(TypedValue, OperatorDelegatorMixin):
+    __slots__ = ()
+
+    # {value: BoolValue}, for true and false only
     _instance_cache = {}
 
     def __new__(cls, value):
         if value not in cls._instance_cache:
             new_obj = object.__new__(cls)
-            cls.__init__(new_obj, value)
+            new_obj.value = value
+            new_obj.type = BoolType
             cls._instance_cache[value] = new_obj
 
         return cls._instance_cache[value]
 
     def __init__(self, value):
-        super(BoolValue, self).__init__(value=value, type=BoolType)
+        # Everything was set by __new__, only once for each of the 2 values
+        pass
+
+    def __reduce__(self):
+        return BoolValue, (self.value,)
 
     def __eq__(self, other):
         if isinstance(other, BoolValue):
@@ -479,17 +1127,63 @@ class Type:
         return hash(self.repr)
 
 
+class ChanType(Type):
+    def __init__(self, elem_type):
+        """
+        :param Type elem_type: the type of the values sent on the channel
+        """
+        super(ChanType, self).__init__(f"chan {elem_type}")
+        self.elem_type = elem_type
+
+
+class SliceType(Type):
+    def __init__(self, elem_type):
+        """
+        :param Type elem_type: the type of the elements of the slice
+        """
+        super(SliceType, self).__init__(f"[]{elem_type}")
+        self.elem_type = elem_type
+
+
 BoolType = Type("bool")
 FuncType = Type("func")  # This needs to be deprecated/removed
 IntType = Type("int")
 StringType = Type("string")
+# Only the element type of `[]byte`. Indexing one gives an int
+ByteType = Type("byte")
+BytesType = SliceType(ByteType)
 
 # SINGLETONS
 BoolLiteralFalse = BoolValue(False)
 BoolLiteralTrue = BoolValue(True)
 
-# Singleton to mark that a variable was only declared, but not initialized
-ValueNotSet = ReprHelper('NotSet')
+# The ints which are only created once. See `Int._instance_cache`
+SMALL_INT_RANGE = range(-128, 1024)
+Int._instance_cache.update(
+    (value, Int(value)) for value in SMALL_INT_RANGE)
+
+# Singleton to mark that a variable was only declared, but not initialized.
+# It's also the nil channel
+ValueNotSet = ReprHelper('NotSet', global_name='ValueNotSet')
+
+# What `break` and `continue` statements evaluate to. Like the values of
+# `return`s, they end all the blocks they're in, up to their loop
+LoopBreak = ReprHelper('Break', global_name='LoopBreak')
+LoopContinue = ReprHelper('Continue', global_name='LoopContinue')
+
+
+def get_zero_value(type_):
+    """
+    :param Type type_:
+    :return: the value received from closed channels of this element type
+    """
+    if type_ == IntType:
+        return Int(0)
+    if type_ == StringType:
+        return String("")
+    if type_ == BoolType:
+        return BoolLiteralFalse
+    return ValueNotSet
 
 # Map of resulting types after applying an operator, and actual python operator
 # to apply
@@ -523,7 +1217,7 @@ _OPERATOR_TYPE_TABLE = [
     ### Operators on STR
     [common_grammar.OPERATORS.BOOLEQUALS, StringType, StringType, BoolType, operator.eq],
     [common_grammar.OPERATORS.BOOLNOTEQUALS, StringType, StringType, BoolType, operator.ne],
-    [common_grammar.OPERATORS.PLUS, StringType, StringType, BoolType, operator.add],
+    [common_grammar.OPERATORS.PLUS, StringType, StringType, StringType, operator.add],
     [common_grammar.OPERATORS.GREATER, StringType, StringType, BoolType, operator.gt],
     [common_grammar.OPERATORS.GREATEREQ, StringType, StringType, BoolType, operator.ge],
     [common_grammar.OPERATORS.LESSER, StringType, StringType, BoolType, operator.lt],
@@ -562,37 +1256,81 @@ def initialize_operator_type_map(flat_type_map):
 OPERATOR_TYPE_MAP = initialize_operator_type_map(_OPERATOR_TYPE_TABLE)
 
 
-class Declaration:
+class Declaration(Node):
+    __slots__ = ('name', 'type', 'value', 'slot')
+
     def __init__(self, name, type, type_scope, value=ValueNotSet):
         """
         :param name:
         :param type:
         :param value:
-        :param TypeScope type_scope:
+        :param TypeScope type_scope: the scope the name is declared in. It's
+            not kept
         """
         self.name = name
         self.type = type
         self.value = value
-        self.type_scope = type_scope
 
-        self.type_scope.declare_variable_type(name, type)
+        self.slot = type_scope.declare_variable_type(name, type)
 
 
 class TypeScope:
-    """Keeps track of variable types within a lexical scope"""
+    """Keeps track of variable types within a lexical scope
+
+    Also resolves variables to slots in run-time frames.
+    Functions own a frame: a fixed size list, which holds their parameters
+    and all the variables declared in their blocks, each in its own slot.
+    Blocks don't get frames of their own, they allocate slots in the frame
+    of the function containing them.
+
+    Names declared directly in the root scope are module level names.
+    They don't get slots, they live in the module's runtime scope, because
+    the interpreter keeps adding new ones, line after line.
+    The root scope still owns a frame, for the variables declared in
+    module level blocks.
+
+    Go only allows functions to be declared at the top level, so a name is
+    either in the frame of the function using it, or a module level name.
+    """
 
-    def __init__(self, parent):
+    def __init__(self, parent, owns_frame=False, is_loop=False, is_select_case=False):
         """
         :param TypeScope|None parent: ...or None for the root scope
+        :param bool owns_frame: whether this scope is the one of a function
+        :param bool is_loop: whether this scope is the one of a for loop,
+            where `break` and `continue` can be used
+        :param bool is_select_case: whether this scope is the one of a case
+            of a select, where `break` ends the select
         """
         self.parent = parent
+        self.is_loop = is_loop
+        self.is_select_case = is_select_case
 
         # {<name> : <type>}
         self.scope = {}
 
+        # {<name> : <frame slot index>}
+        self.slots = {}
+
+        # The scope whose run-time frame holds this scope's variables
+        self.frame_owner = self if owns_frame or parent is None else parent.frame_owner
+        self.frame_size = 0
+
     def declare_variable_type(self, name, type):
+        """
+        :return: the frame slot allocated to the name, or None if this is
+            a module level name
+        :rtype: int|None
+        """
         self.scope[name] = type
 
+        if self.parent is None:
+            return None
+
+        slot = self.slots[name] = self.frame_owner.frame_size
+        self.frame_owner.frame_size += 1
+        return slot
+
     def get_variable_type(self, name):
         tscope = self
 
@@ -602,6 +1340,42 @@ class TypeScope:
                 return tscope.scope[name]
             tscope = tscope.parent
 
+    def is_in_loop(self):
+        """
+        :return: whether a loop of the current function (or of the module
+            level code) encloses this scope
+        """
+        tscope = self
+        while tscope is not None and tscope is not tscope.frame_owner:
+            if tscope.is_loop:
+                return True
+            tscope = tscope.parent
+        return False
+
+    def is_in_loop_or_select(self):
+        """
+        :return: whether a loop or a select of the current function (or of
+            the module level code) encloses this scope, for `break`
+        """
+        tscope = self
+        while tscope is not None and tscope is not tscope.frame_owner:
+            if tscope.is_loop or tscope.is_select_case:
+                return True
+            tscope = tscope.parent
+        return False
+
+    def get_variable_slot(self, name):
+        """
+        :return: the frame slot of the name, or None for module level names
+        :rtype: int|None
+        """
+        tscope = self
+
+        while tscope:
+            if name in tscope.scope:
+                return tscope.slots.get(name)
+            tscope = tscope.parent
+
 
 class TypeScopeStack:
     """Used at parse-time, to determine operations have compatible types
@@ -636,13 +1410,37 @@ class TypeScopeStack:
     def __init__(self):
         self.scopes = [TypeScope(parent=None)]
 
-    def create_scope(self):
+    def create_scope(self, owns_frame=False, is_loop=False, is_select_case=False):
+        """
+        :param bool owns_frame: True for function scopes
+        :param bool is_loop: True for the scopes of for loops
+        :param bool is_select_case: True for the scopes of select cases
+        :rtype: TypeScope
+        """
         previous_scope = self.scopes[-1]
-        self.scopes.append(TypeScope(parent=previous_scope))
+        self.scopes.append(TypeScope(
+            parent=previous_scope, owns_frame=owns_frame, is_loop=is_loop,
+            is_select_case=is_select_case))
+        return self.scopes[-1]
 
     def pop_scope(self):
         self.scopes.pop()
 
+    def reset(self):
+        """Drops all the scopes except the root one
+
+        Used when starting to parse a new piece of code, which always starts
+        at the top level, even if the previous parse failed midway
+        """
+        del self.scopes[1:]
+        self.get_root_scope().frame_size = 0
+
+    def get_root_scope(self):
+        """
+        :rtype: TypeScope
+        """
+        return self.scopes[0]
+
     def get_current_scope(self):
         """
         :return:
@@ -651,7 +1449,9 @@ class TypeScopeStack:
         return self.scopes[-1]
 
 
-class Conditional:
+class Conditional(Node):
+    __slots__ = ('expression_block_pairs', 'final_block')
+
     def __init__(self, expression_block_pairs, final_block, scope):
         """
 
@@ -659,14 +1459,15 @@ class Conditional:
             list of pairs(expression, block)
         :param final_block: a list of statements, to execute as the fallback
             for the chain of if-else-if-else.....if-else statements
-        :param TypeScope scope:
+        :param TypeScope scope: not kept
         """
         self.expression_block_pairs = expression_block_pairs
         self.final_block = final_block
-        self.scope = scope
 
 
-class Block:
+class Block(Node):
+    __slots__ = ('statements',)
+
     def __init__(self, statements):
         """
 
@@ -675,10 +1476,698 @@ class Block:
         self.statements = statements
 
 
+class For(Node):
+    """`for init; condition; post { body }`
+
+    Every clause is optional: `for condition { ... }` has neither an init nor
+    a post statement, and `for { ... }` loops until a `break` or a `return`.
+    Names declared by the init statement live in a scope of the loop, around
+    the one of the body.
+    """
+    __slots__ = ('init', 'condition', 'post', 'body')
+
+    def __init__(self, init, condition, post, body):
+        """
+        :param init: statement run once, before the loop. Or None
+        :param condition: bool expression checked before every iteration.
+            None loops forever
+        :param post: statement run after every iteration. Or None
+        :param Block body:
+        """
+        if condition is not None and getattr(condition, 'type', None) != BoolType:
+            raise PyGoGrammarError(
+                f"Non-bool used as for condition (type {condition.type})")
+
+        self.init = init
+        self.condition = condition
+        self.post = post
+        self.body = body
+
+
+class ForRange(Node):
+    """`for i := range n { body }`: i counts from 0 to n - 1
+
+    n is evaluated once, before the loop.
+    """
+    __slots__ = ('name', 'slot', 'limit', 'body')
+
+    def __init__(self, name, limit, body, type_scope):
+        """
+        :param str name: the name of the counter
+        :param limit: int expression: the number of iterations
+        :param Block body:
+        :param TypeScope type_scope: the scope of the loop, where the
+            counter is declared. It's not kept
+        """
+        if getattr(limit, 'type', None) != IntType:
+            raise PyGoGrammarError(
+                f"Can't range over type ({getattr(limit, 'type', None)})")
+
+        self.name = name
+        self.limit = limit
+        self.body = body
+        self.slot = type_scope.get_variable_slot(name)
+
+
+class Break(Node):
+    __slots__ = ()
+
+
+class Continue(Node):
+    __slots__ = ()
+
+
+class VectorizedLoop(Node):
+    """A loop which only does arithmetic on the elements of `[]int` slices,
+    element by element, like `for i := range a { b[i] = a[i] * k + c }`
+
+    Made by the optimizer (see `pygolang.vectorize`), in place of the loop.
+    The operands are evaluated once, then the kernel runs all the
+    iterations at once. When it can't (the slices overlap, an index is out
+    of range...) the loop runs as it is.
+    """
+    __slots__ = ('loop', 'operands', 'kernel')
+
+    def __init__(self, loop, operands, kernel):
+        """
+        :param For|ForRange loop:
+        :param list operands: the expressions the kernel runs on, all
+            parts of the loop: its start, its stop, then names
+        :param pygolang.vectorize.VectorKernel kernel:
+        """
+        self.loop = loop
+        self.operands = operands
+        self.kernel = kernel
+
+
+class CountingLoop:
+    """A loop counting ints, which can run on python's `range`
+
+    The counter then doesn't need the condition and the post statement to be
+    evaluated on every iteration, only to be stored where the body reads it.
+    See `get_counting_loop` for which loops count ints.
+    """
+    __slots__ = ('name', 'slot', 'start', 'stop', 'step', 'inclusive')
+
+    def __init__(self, name, slot, start, stop, step, inclusive=False):
+        """
+        :param str name: the name of the counter
+        :param int slot: the frame slot of the counter
+        :param start: int expression: the first value of the counter
+        :param stop: int expression: the bound of the counter, evaluated
+            once, before the loop
+        :param int step: added to the counter after every iteration
+        :param bool inclusive: whether the counter stops at `stop` (for `<=`
+            and `>=`), instead of before it
+        """
+        self.name = name
+        self.slot = slot
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.inclusive = inclusive
+
+    def get_range(self, start, stop):
+        """
+        :param int start: the value of the `start` expression
+        :param int stop: the value of the `stop` expression
+        :rtype: range
+        """
+        if self.inclusive:
+            stop += 1 if self.step > 0 else -1
+        return range(start, stop, self.step)
+
+
+def unwrap_expression(node):
+    """
+    :return: the node wrapped in (possibly several levels of) `Expression`
+        and `Statement`
+    """
+    while isinstance(node, (Expression, Statement)):
+        node = node.child if isinstance(node, Expression) else node.value
+    return node
+
+
+def can_jump(node):
+    """
+    :return: whether running the code can execute a `return`, `break` or
+        `continue`. Loop bodies which can't are run without checking what
+        their statements evaluate to
+    """
+    if isinstance(node, (Return, Break, Continue)):
+        return True
+    return any(
+        can_jump(child) for child in iter_child_nodes(node)
+        if child is not None and not isinstance(child, list)
+    )
+
+
+def _get_assigned_slots(node, slots):
+    """Adds the frame slots assigned in the code to `slots`"""
+    if isinstance(node, Assignment):
+        slots.add(node.slot)
+    for child in iter_child_nodes(node):
+        if child is not None and not isinstance(child, list):
+            _get_assigned_slots(child, slots)
+        elif child:
+            for elem in child:
+                _get_assigned_slots(elem, slots)
+    return slots
+
+
+def uses_slice_elements(node):
+    """Tells whether an operator makes a slice, or reads or writes its
+    elements. The elements can change between evaluations, and made slices
+    must not be shared by them. The bytes of `[]byte` don't change
+    """
+    if isinstance(node, (MakeSlice, Append, SetIndex)):
+        return True
+    # The optimizer collapses the expressions typing the operands, so the
+    # function tells the `[]byte`s
+    return isinstance(node, Index) and node.operator_pyfunc is not _boxed_index
+
+
+def _is_loop_invariant(node, assigned_slots):
+    """
+    :return: whether the expression always evaluates to the same value
+        during the loop: it's made of literals, operators not using the
+        elements of slices, and the locals the loop doesn't assign
+    """
+    node = unwrap_expression(node)
+    if isinstance(node, Value):
+        return True
+    if isinstance(node, Name):
+        return node.slot is not None and node.slot not in assigned_slots
+    if isinstance(node, Operator) and not isinstance(node, LogicalOperator) \
+            and not uses_slice_elements(node):
+        return all(_is_loop_invariant(arg, assigned_slots) for arg in node.args_list)
+    return False
+
+
+# {comparison of the counter with its bound: (whether the counter must go
+# up, whether the bound is included)}
+_COUNTING_COMPARISONS = {
+    '<': (True, False),
+    '<=': (True, True),
+    '>': (False, False),
+    '>=': (False, True),
+}
+
+
+def _get_counter_step(post, slot):
+    """
+    :return: what the post statement adds to the counter, or None if it's
+        not `i++`, `i--`, `i += k`, `i -= k` or `i = i + k`, k being an
+        int literal
+    """
+    post = unwrap_statement(post)
+    if not isinstance(post, Assignment) or post.slot != slot:
+        return None
+
+    value = unwrap_expression(post.value)
+    if not isinstance(value, Operator) or value.operator not in ('+', '-'):
+        return None
+    counter, step = [unwrap_expression(arg) for arg in value.args_list]
+    if not isinstance(counter, Name) or counter.slot != slot or \
+            not isinstance(step, Int):
+        return None
+    return step.value if value.operator == '+' else -step.value
+
+
+def get_counting_loop(node):
+    """Tells whether the loop counts ints, like `for i := 0; i < n; i++`
+
+    These are the loops whose counter is an int declared by the init
+    statement, compared with a bound the loop doesn't change, and changed
+    only by the post statement, by a constant step, towards the bound.
+    All the `for i := range n` loops count ints.
+
+    :param For|ForRange node:
+    :rtype: CountingLoop|None
+    """
+    if isinstance(node, ForRange):
+        return CountingLoop(node.name, node.slot, Int(0), node.limit, 1)
+
+    init = unwrap_statement(node.init)
+    if not isinstance(init, Declaration) or init.slot is None or \
+            init.type != IntType or init.value is ValueNotSet:
+        return None
+
+    condition = unwrap_expression(node.condition)
+    if not isinstance(condition, Operator) or \
+            condition.operator not in _COUNTING_COMPARISONS:
+        return None
+    counter, stop = condition.args_list
+    counter = unwrap_expression(counter)
+    if not isinstance(counter, Name) or counter.slot != init.slot:
+        return None
+
+    step = _get_counter_step(node.post, init.slot)
+    counts_up, inclusive = _COUNTING_COMPARISONS[condition.operator]
+    if not step or (step > 0) != counts_up:
+        return None
+
+    assigned_slots = _get_assigned_slots(node.body, set())
+    if init.slot in assigned_slots or not _is_loop_invariant(stop, assigned_slots):
+        return None
+
+    return CountingLoop(
+        init.name, init.slot, init.value, stop, step, inclusive=inclusive)
+
+
 class String(TypedValue, OperatorDelegatorMixin):
+    __slots__ = ()
+
     def __init__(self, value):
         super(String, self).__init__(value, StringType)
 
     def to_pygo_repr(self):
         repr_value = '"{}"'.format(self.value)
         return repr_value
+
+
+class ByteSlice(TypedValue):
+    """A `[]byte`. Its bytes are a memoryview (of a memory mapped file, for
+    instance), so slicing it or passing it around never copies them
+    """
+    __slots__ = ()
+
+    def __init__(self, value):
+        """
+        :param memoryview value: of unsigned bytes
+        """
+        super(ByteSlice, self).__init__(value, BytesType)
+
+    def to_pygo_repr(self):
+        return f"[{' '.join(str(byte) for byte in self.value)}]"
+
+
+class Slice:
+    """The python value of a `[]int`, `[]bool` or `[]string`
+
+    A window on a buffer, shared with the slices it was sliced from, and the
+    ones appended to it. The elements of the slice are in
+    `buffer[offset:offset + length]`, and can be read as python values. The
+    buffer only holds the elements some slice has: it's extended by
+    `append`, and by reslicing past the length.
+    """
+    __slots__ = ('elements', 'buffer', 'offset', 'length', 'capacity')
+
+    def __init__(self, elements, buffer, offset, length, capacity):
+        """
+        :param SliceElements elements: how the elements are stored
+        :param array.array|list buffer:
+        :param int offset: where the slice starts, in the buffer
+        :param int length:
+        :param int capacity: the length the slice can grow to, before
+            `append` moves it to a new buffer
+        """
+        missing = offset + length - len(buffer)
+        if missing > 0:
+            buffer.extend(elements.zeros(missing))
+
+        self.elements = elements
+        self.buffer = buffer
+        self.offset = offset
+        self.length = length
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return itertools.islice(
+            self.buffer, self.offset, self.offset + self.length)
+
+
+class SliceValue(TypedValue):
+    """A `[]int`, `[]bool` or `[]string`: the pygo value boxing a `Slice`"""
+    __slots__ = ()
+
+    def __init__(self, value):
+        """
+        :param Slice value:
+        """
+        super(SliceValue, self).__init__(value, value.elements.type)
+
+    def to_pygo_repr(self):
+        box_element = self.value.elements.box_element
+        return f"[{' '.join(box_element(elem).to_pygo_repr() for elem in self.value)}]"
+
+
+class SliceElements:
+    """How the elements of a slice type are stored, and the operations
+    needing to know it
+
+    Ints and bools are stored in `array.array` buffers, in 8 bytes and 1
+    byte each, instead of a pygo value each. Strings are stored in lists.
+
+    The methods are the python functions of the operators (`boxed_*` on
+    pygo values, the others on python values), so the instances are
+    compared by identity, and pickled by their name.
+    """
+
+    def __init__(self, elem_type, typecode, box_element, global_name):
+        """
+        :param Type elem_type:
+        :param str|None typecode: the `array.array` typecode of the buffers,
+            or None to store the elements in lists
+        :param box_element: makes the pygo value of an element
+        :param str global_name: the name of the module level variable
+            holding the instance
+        """
+        self.type = SliceType(elem_type)
+        self.typecode = typecode
+        self.box_element = box_element
+        self.zero = get_zero_value(elem_type).value
+        self.global_name = global_name
+
+    def __reduce__(self):
+        return self.global_name
+
+    def zeros(self, count):
+        """
+        :return: a buffer of `count` zero values
+        """
+        if self.typecode is None:
+            return [self.zero] * count
+        return array.array(self.typecode, [self.zero]) * count
+
+    def to_buffer(self, values):
+        """
+        :param tuple values: python values
+        :return: a buffer holding them
+        """
+        if self.typecode is None:
+            return list(values)
+        try:
+            return array.array(self.typecode, values)
+        except OverflowError:
+            return array.array(self.typecode, map(wrap_int64, values))
+
+    def make(self, length, capacity=None):
+        """The python function of `MakeSlice`, on python values
+
+        :rtype: Slice
+        """
+        if capacity is None:
+            capacity = length
+        if length < 0:
+            raise PyLangRuntimeError("makeslice: len out of range")
+        if capacity < length:
+            raise PyLangRuntimeError("makeslice: cap out of range")
+        return Slice(self, self.zeros(length), 0, length, capacity)
+
+    def boxed_make(self, length, capacity=None):
+        return SliceValue(self.make(
+            length.value, None if capacity is None else capacity.value))
+
+    def index(self, sequence, index):
+        """The python function of `Index`, on python values
+
+        :param Slice sequence:
+        :param int index:
+        """
+        if sequence is ValueNotSet:
+            raise _index_error(index, 0)
+        if not 0 <= index < sequence.length:
+            raise _index_error(index, sequence.length)
+        return sequence.buffer[sequence.offset + index]
+
+    def boxed_index(self, sequence, index):
+        return self.box_element(self.index(_unbox_slice(sequence), index.value))
+
+    def set_index(self, sequence, index, value):
+        """The python function of `SetIndex`, on python values
+
+        :param Slice sequence:
+        :param int index:
+        :param value: the new element
+        """
+        if sequence is ValueNotSet:
+            raise _index_error(index, 0)
+        if not 0 <= index < sequence.length:
+            raise _index_error(index, sequence.length)
+        _store(sequence.buffer, sequence.offset + index, value)
+
+    def boxed_set_index(self, sequence, index, value):
+        self.set_index(_unbox_slice(sequence), index.value, value.value)
+
+    def append(self, sequence, *values):
+        """The python function of `Append`, on python values
+
+        :param Slice sequence:
+        :param values: the python values to append
+        :rtype: Slice
+        """
+        if sequence is ValueNotSet:
+            if not values:
+                return sequence
+            sequence = Slice(self, self.zeros(0), 0, 0, 0)
+
+        length = sequence.length + len(values)
+        offset, capacity = sequence.offset, sequence.capacity
+        buffer = sequence.buffer
+        if length > capacity:
+            # Like in go, the capacity doubles, so appending n elements one
+            # by one only copies them about n times. The old buffer stays
+            # with the slices using it
+            buffer = buffer[offset:offset + sequence.length]
+            offset, capacity = 0, max(length, 2 * capacity)
+
+        end = offset + sequence.length
+        if len(values) == 1:
+            _store(buffer, end, values[0])
+        else:
+            buffer[end:end + len(values)] = self.to_buffer(values)
+        return Slice(self, buffer, offset, length, capacity)
+
+    def boxed_append(self, sequence, *values):
+        result = self.append(
+            _unbox_slice(sequence), *[value.value for value in values])
+        return result if result is ValueNotSet else SliceValue(result)
+
+
+class BoolSliceElements(SliceElements):
+    """The bools are stored as bytes, 0 or 1"""
+
+    def index(self, sequence, index):
+        return bool(super(BoolSliceElements, self).index(sequence, index))
+
+
+INT_ELEMENTS = SliceElements(IntType, 'q', Int, 'INT_ELEMENTS')
+BOOL_ELEMENTS = BoolSliceElements(BoolType, 'B', BoolValue, 'BOOL_ELEMENTS')
+STRING_ELEMENTS = SliceElements(StringType, None, String, 'STRING_ELEMENTS')
+
+# {element type: SliceElements}
+SLICE_ELEMENTS = {
+    elements.type.elem_type: elements
+    for elements in (INT_ELEMENTS, BOOL_ELEMENTS, STRING_ELEMENTS)
+}
+
+
+def get_slice_elements(slice_type):
+    """
+    :param Type slice_type:
+    :return: how the elements of the slice type are stored, or None for
+        the types which aren't slices, and for `[]byte`
+    :rtype: SliceElements|None
+    """
+    if not isinstance(slice_type, SliceType):
+        return None
+    return SLICE_ELEMENTS.get(slice_type.elem_type)
+
+
+def check_channel_type(channel, operation):
+    """
+    :param channel: the expression a channel operation is applied on
+    :param str operation: the name of the operation, for the error message
+    :rtype: ChanType
+    """
+    type_ = getattr(channel, 'type', None)
+    if not isinstance(type_, ChanType):
+        raise PyGoGrammarError(
+            f"Invalid operation: {operation} non-chan type ({type_})")
+    return type_
+
+
+class MakeChannel(Node):
+    """`make(chan T)`, or `make(chan T, capacity)` for buffered channels"""
+    __slots__ = ('type', 'capacity')
+
+    def __init__(self, type, capacity=None):
+        """
+        :param Type type: the type of the channel
+        :param capacity: the expression of the size of the buffer, or None
+            for unbuffered channels
+        """
+        if not isinstance(type, ChanType):
+            raise PyGoGrammarError(f"Can't make type ({type})")
+        if capacity is not None and capacity.type != IntType:
+            raise PyGoGrammarError(
+                f"The capacity of a channel must be an int, not "
+                f"({capacity.type})")
+
+        self.type = type
+        self.capacity = capacity
+
+
+class Receive(Node):
+    """`<-channel`. Evaluates to the value received"""
+    __slots__ = ('channel', 'type')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.type = check_channel_type(channel, "receive from").elem_type
+
+
+class Send(Node):
+    """`channel <- value`"""
+    __slots__ = ('channel', 'value')
+
+    def __init__(self, channel, value):
+        elem_type = check_channel_type(channel, "send to").elem_type
+        if not elem_type.is_assignable_from(value.type):
+            raise PyGoGrammarError(
+                f"Can't send type ({value.type}) to channel of type "
+                f"({channel.type})")
+
+        self.channel = channel
+        self.value = value
+
+
+class Close(Node):
+    """`close(channel)`"""
+    __slots__ = ('channel',)
+
+    def __init__(self, channel):
+        check_channel_type(channel, "close of")
+        self.channel = channel
+
+
+class Go(Node):
+    """`go f(args)`: calls the function in a new goroutine"""
+    __slots__ = ('call',)
+
+    def __init__(self, call):
+        """
+        :param FuncCall call:
+        """
+        if not isinstance(call, FuncCall):
+            raise PyGoGrammarError("Expression in go must be a function call")
+        self.call = call
+
+
+class SelectCase(Node):
+    __slots__ = ('communication', 'block')
+
+    def __init__(self, communication, block):
+        """
+        :param communication: a `Send`, a `Receive`, or a `Declaration` or
+            `Assignment` of a `Receive`
+        :param Block block: what runs when the communication is chosen
+        """
+        receive = communication.value if isinstance(
+            communication, (Declaration, Assignment)) else communication
+        if not isinstance(receive, (Send, Receive)):
+            raise PyGoGrammarError(
+                "Select cases must send to or receive from a channel")
+
+        self.communication = communication
+        self.block = block
+
+    def get_channel_operation(self):
+        """
+        :return: the `Send` or `Receive` of the case
+        """
+        if isinstance(self.communication, (Declaration, Assignment)):
+            return self.communication.value
+        return self.communication
+
+
+class Select(Node):
+    __slots__ = ('cases', 'default')
+
+    def __init__(self, cases, default=None):
+        """
+        :param list[SelectCase] cases:
+        :param Block|None default: the block run when no case is ready,
+            or None to wait for one to be
+        """
+        self.cases = cases
+        self.default = default
+
+
+def iter_child_nodes(node):
+    """Yields the direct children of an ast node
+
+    Function bodies are not children of their `FuncCreation`: creating a
+    function doesn't run its body.
+
+    :param node: any ast node
+    """
+    if isinstance(node, (Root, InterpreterStart, Statement, Return)):
+        yield node.value
+
+    elif isinstance(node, Expression):
+        yield node.child
+
+    elif isinstance(node, (Block, FuncBody, Program)):
+        yield from node.statements
+
+    elif isinstance(node, Conditional):
+        for expression, block in node.expression_block_pairs:
+            yield expression
+            yield block
+        if node.final_block:
+            yield node.final_block
+
+    elif isinstance(node, (Declaration, Assignment)):
+        if node.value is not ValueNotSet:
+            yield node.value
+
+    elif isinstance(node, For):
+        for clause in (node.init, node.condition, node.post):
+            if clause is not None:
+                yield clause
+        yield node.body
+
+    elif isinstance(node, ForRange):
+        yield node.limit
+        yield node.body
+
+    elif isinstance(node, VectorizedLoop):
+        # The operands are parts of the loop
+        yield node.loop
+
+    elif isinstance(node, Operator):
+        yield from node.args_list
+
+    elif isinstance(node, (FuncCall, BuiltinCall)):
+        yield from node.arguments
+
+    elif isinstance(node, FuncArguments):
+        yield from node.arg_list
+
+    elif isinstance(node, MakeChannel):
+        if node.capacity is not None:
+            yield node.capacity
+
+    elif isinstance(node, (Receive, Close)):
+        yield node.channel
+
+    elif isinstance(node, Send):
+        yield node.channel
+        yield node.value
+
+    elif isinstance(node, Go):
+        yield node.call
+
+    elif isinstance(node, Select):
+        yield from node.cases
+        if node.default is not None:
+            yield node.default
+
+    elif isinstance(node, SelectCase):
+        yield node.communication
+        yield node.block
@@ -1,15 +1,55 @@
-from pygolang import ast
-from pygolang.errors import PyGoGrammarError
+import weakref
+
+from pygolang import ast, builtin, memoization, scheduler
+from pygolang.compiler import ClosureCompiler
+from pygolang.stackless import StacklessCompiler
+from pygolang.unboxed import UnboxedCompiler
+from pygolang.scheduler import Scheduler
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+
+# Execution engines.
+# The "tree" engine walks the ast on every run, the "closure" engine lowers
+# the ast once into python closures (see pygolang.compiler) and runs those.
+ENGINE_TREE = 'tree'
+ENGINE_CLOSURE = 'closure'
+# The "stackless" engine compiles to closures too, but keeps the pygo call
+# stack on the heap, so recursion isn't limited by the python stack
+ENGINE_STACKLESS = 'stackless'
+# The "unboxed" engine compiles to closures too, which compute with python
+# values instead of pygo values (see pygolang.unboxed)
+ENGINE_UNBOXED = 'unboxed'
+ENGINES = (ENGINE_TREE, ENGINE_CLOSURE, ENGINE_STACKLESS, ENGINE_UNBOXED)
+
+COMPILERS = {
+    ENGINE_CLOSURE: ClosureCompiler,
+    ENGINE_STACKLESS: StacklessCompiler,
+    ENGINE_UNBOXED: UnboxedCompiler,
+}
+
+DEFAULT_ENGINE = ENGINE_TREE
 
 
 class Runner:
-    def __init__(self, io, state):
+    def __init__(self, io, state, engine=None, memoizer=None, scheduler=None):
         """
 
         :param io:
         :param dict|ast.AbstractRuntimeScope state: the program's starting state
+        :param str|None engine: one of `ENGINES`. Defaults to `DEFAULT_ENGINE`
+        :param pygolang.memoization.Memoizer|None memoizer: caches the
+            results of pure functions. No caching when None
+        :param pygolang.scheduler.Scheduler|None scheduler: runs the
+            goroutines. Only the stackless engine has goroutines
         """
         self.io = io
+        self.memoizer = memoizer
+        self.scheduler = scheduler or Scheduler()
+        self.engine = engine or DEFAULT_ENGINE
+        if self.engine not in ENGINES:
+            raise ValueError(
+                f"Unknown engine {self.engine!r}. "
+                f"Available engines: {', '.join(ENGINES)}"
+            )
         # TODO -> access to this needs to be replaced with a call to a
         #  method which searches for variables in a list of scopes
         #  AND if it writes something, it writes in the first scope it gets
@@ -22,22 +62,74 @@ class Runner:
             raise Exception(
                 "The program's state should be a module scope or a dict")
 
+        self.compiler = None
+        if self.engine in COMPILERS:
+            self.compiler = COMPILERS[self.engine](self)
+
+        # {ast root: compiled closure}, so re-running the same code doesn't
+        # compile it again
+        self._compiled_code = weakref.WeakKeyDictionary()
+
+        # The function scopes of the tree engine, which returned and can be
+        # reused by the next calls
+        self._free_func_scopes = []
+
+        # {ast.Block: whether it declares names}, for the tree engine
+        self._declaring_blocks = weakref.WeakKeyDictionary()
+
     def run(self, code, scopes=None):
+        """Runs the code with the engine this runner was created with
+
+        :param code: the ast to run, usually an `ast.Root`
+        :param list[ast.AbstractRuntimeScope]|None scopes: only used by the
+            tree engine. Compiled code uses frames, and the module scope
+        :return: the value the code evaluated to, if any
+        """
+        if self.compiler is None:
+            return self.walk(code, scopes)
+
+        try:
+            compiled = self._compiled_code[code]
+        except KeyError:
+            compiled = self._compiled_code[code] = \
+                self.compiler.compile_program(code)
+
+        return compiled()
+
+    def walk(self, code, scopes=None):
+        """The tree walking engine. Evaluates the code node by node"""
         value = None
         scopes = scopes or [self.state]
 
         if isinstance(code, ast.Root):
-            value = self.run(code.value, scopes)  # Root
+            value = self.walk(code.value, scopes)  # Root
+
+        elif isinstance(code, ast.Program):
+            # Like in the interpreter, every value printed goes on its own line
+            for stmt in code.statements:
+                if self.walk(stmt, scopes) is not None:  # Program
+                    self.io.newline()
 
         elif isinstance(code, ast.InterpreterStart):
-            value = self.run(code.value, scopes)  # InterpreterStart
+            value = self.walk(code.value, scopes)  # InterpreterStart
             if value is not None:
                 self.io.to_stdout(value.to_pygo_repr())
 
         elif isinstance(code, ast.Block):
-            for stmt in code.statements:
+            # The names declared in a block live until the block ends. Blocks
+            # which don't declare any don't need a scope
+            declares_names = self.declares_names(code)
+            if declares_names:
                 scopes.insert(0, ast.BlockRuntimeScope({}))
-                self.run(stmt, scopes)  # Block
+
+            # Blocks evaluate to the value of the `return` executed in them
+            for stmt in code.statements:
+                stmt_value = self.walk(stmt, scopes)  # Block
+                if stmt_value is not None and ast.is_control_flow_statement(stmt):
+                    value = stmt_value
+                    break
+
+            if declares_names:
                 scopes.pop(0)
 
         elif isinstance(code, ast.Conditional):
@@ -47,27 +139,53 @@ class Runner:
             # 4. if we haven't executed any of the blocks AND there's a final
             #      block, we evaluate that
             for expression, block in code.expression_block_pairs:
-                expression_value = self.run(expression)  # Conditional, exp
+                expression_value = self.walk(expression, scopes)  # Conditional, exp
 
                 # Interesting! In go, there's no true-ish value.
                 # Only true/false is expected, nothing else will work
                 if expression_value == ast.BoolLiteralTrue:
-                    self.run(block)  # Conditional, block
+                    value = self.walk(block, scopes)  # Conditional, block
                     break
 
             else:
                 # This executes when no expression was true-ish
-                self.run(code.final_block)  # Conditional, final block
+                value = self.walk(code.final_block, scopes)  # Conditional, final block
+
+        elif isinstance(code, (ast.For, ast.ForRange)):
+            value = self.run_loop(code, scopes)
+
+        elif isinstance(code, ast.VectorizedLoop):
+            operands = [
+                self.walk(operand, scopes)  # VectorizedLoop
+                for operand in code.operands
+            ]
+            if not code.kernel.boxed_run(*operands):
+                value = self.run_loop(code.loop, scopes)
+
+        elif isinstance(code, ast.Break):
+            value = ast.LoopBreak
+
+        elif isinstance(code, ast.Continue):
+            value = ast.LoopContinue
 
         elif isinstance(code, ast.FuncBody):
             for stmt in code.statements:
-                value = self.run(stmt, scopes)  # FuncBody
+                stmt_value = self.walk(stmt, scopes)  # FuncBody
                 if isinstance(stmt, ast.Return):
+                    value = stmt_value
                     break
 
+                if ast.is_control_flow_statement(stmt):
+                    if stmt_value is not None:
+                        # a return was executed in a nested block
+                        value = stmt_value
+                        break
+                else:
+                    value = stmt_value
+
         elif isinstance(code, ast.Declaration):
             key = code.name
-            # value = code.value if code.value is ast.NotSet else self.run(code.value)
+            # value = code.value if code.value is ast.NotSet else self.walk(code.value)
             type_ = code.type
 
             # TODO - at runtime, declarations should be replaced with
@@ -76,7 +194,7 @@ class Runner:
             #  done before run-time
             self.declare_in_scopes(key, type_, scopes)
             if code.value is not ast.ValueNotSet:
-                assigned_value = self.run(code.value)  # Declaration
+                assigned_value = self.walk(code.value, scopes)  # Declaration
                 self.set_in_scopes(key, assigned_value, scopes)
 
         elif isinstance(code, ast.Assignment):
@@ -87,7 +205,7 @@ class Runner:
             key = code.name
             # self.set_in_scopes(key, ass)
             # if self.can_assign_in_scopes(key, scopes):
-            assigned_value = self.run(code.value, scopes)  # Assignment
+            assigned_value = self.walk(code.value, scopes)  # Assignment
             self.set_in_scopes(key, assigned_value, scopes)
             #
             #     # Global scope, until we implement per-something-else scope
@@ -98,10 +216,12 @@ class Runner:
         elif isinstance(code, ast.FuncCreation):
             self.declare_in_scopes(
                 key=code.name,
-                type_=ast.FuncCreation.get_func_type(code.params, code.return_type),
+                type_=code.type,
                 scopes=scopes
             )
             self.set_in_scopes(code.name, code, scopes)
+            if self.memoizer is not None:
+                self.memoizer.invalidate()
 
         # return result
 
@@ -110,6 +230,9 @@ class Runner:
             # return self.state[exp.value]
             value = self.find_in_scopes(code.value, scopes)
 
+        elif isinstance(code, ast.LogicalOperator):
+            value = self.run_logical_operator(code, scopes)
+
         elif isinstance(code, ast.Operator):
             value = self.run_operator(code, scopes)
 
@@ -117,19 +240,123 @@ class Runner:
             value = code
 
         elif isinstance(code, ast.Expression):
-            value = self.run(code.child, scopes)  # Expression
+            value = self.walk(code.child, scopes)  # Expression
 
         elif isinstance(code, ast.Return):
-            value = self.run(code.value, scopes)  # Return
+            value = self.walk(code.value, scopes)  # Return
 
         elif isinstance(code, ast.FuncCall):
             value = self.call_func(code, scopes)  # FuncCall
 
         elif isinstance(code, ast.Statement):
-            value = self.run(code.value, scopes)  # Statement
+            value = self.walk(code.value, scopes)  # Statement
+
+        elif isinstance(code, (ast.Go, ast.MakeChannel, ast.Receive, ast.Send,
+                               ast.Close, ast.Select)):
+            raise PyLangRuntimeError(scheduler.UNSUPPORTED_ENGINE_MESSAGE)
+
+        elif isinstance(code, ast.BuiltinCall):
+            raise PyLangRuntimeError(
+                builtin.UNSUPPORTED_ENGINE_MESSAGE.format(name=code.name))
 
         return value
 
+    def declares_names(self, block):
+        """
+        :param ast.Block block:
+        :return: whether statements of the block itself (not of the blocks
+            nested in it) declare names, which then need a scope
+        """
+        try:
+            return self._declaring_blocks[block]
+        except KeyError:
+            declares_names = self._declaring_blocks[block] = any(
+                isinstance(ast.unwrap_statement(stmt), ast.Declaration)
+                for stmt in block.statements
+            )
+            return declares_names
+
+    def run_loop(self, loop, scopes):
+        """Runs a for loop, in a scope of its own for the names declared by
+        its init statement, if it declares any
+
+        :param ast.For|ast.ForRange loop:
+        :param list[ast.AbstractRuntimeScope] scopes:
+        :return: the value of the `return` executed in the loop, if any
+        """
+        counting_loop = ast.get_counting_loop(loop)
+        declares_names = counting_loop is not None or \
+            isinstance(ast.unwrap_statement(loop.init), ast.Declaration)
+        if declares_names:
+            scopes.insert(0, ast.BlockRuntimeScope({}))
+        try:
+            if counting_loop is not None:
+                return self.run_counting_loop(counting_loop, loop.body, scopes)
+
+            if loop.init is not None:
+                self.walk(loop.init, scopes)  # For, init
+            body_scope = self.make_loop_body_scope(loop.body)
+            while loop.condition is None or \
+                    self.walk(loop.condition, scopes) == ast.BoolLiteralTrue:
+                value = self.run_loop_body(loop.body, body_scope, scopes)
+                if value is ast.LoopBreak:
+                    break
+                if value is not None and value is not ast.LoopContinue:
+                    return value
+                if loop.post is not None:
+                    self.walk(loop.post, scopes)  # For, post
+        finally:
+            if declares_names:
+                scopes.pop(0)
+
+    def run_counting_loop(self, counting_loop, body, scopes):
+        """Runs a loop counting ints (see `ast.get_counting_loop`) on a
+        python range, setting the counter in place
+        """
+        start = self.walk(counting_loop.start, scopes).value  # CountingLoop
+        stop = self.walk(counting_loop.stop, scopes).value  # CountingLoop
+        counter = scopes[0][counting_loop.name] = [ast.ValueNotSet, ast.IntType]
+        body_scope = self.make_loop_body_scope(body)
+        for counter_value in counting_loop.get_range(start, stop):
+            counter[0] = ast.Int(counter_value)
+            value = self.run_loop_body(body, body_scope, scopes)
+            if value is ast.LoopBreak:
+                break
+            if value is not None and value is not ast.LoopContinue:
+                return value
+
+    def make_loop_body_scope(self, body):
+        """
+        :param ast.Block body:
+        :return: the scope all the iterations of the loop use for the names
+            their body declares, emptied before each. None if it declares
+            none
+        :rtype: ast.BlockRuntimeScope|None
+        """
+        if self.declares_names(body):
+            return ast.BlockRuntimeScope({})
+        return None
+
+    def run_loop_body(self, body, body_scope, scopes):
+        """
+        :param ast.Block body:
+        :param ast.BlockRuntimeScope|None body_scope: see
+            `make_loop_body_scope`
+        :return: the value of the `return`, `break` or `continue` executed
+            in the body, if any
+        """
+        if body_scope is not None:
+            body_scope.as_dict().clear()
+            scopes.insert(0, body_scope)
+        try:
+            for stmt in body.statements:
+                stmt_value = self.walk(stmt, scopes)  # For, body
+                if stmt_value is not None and ast.is_control_flow_statement(stmt):
+                    return stmt_value
+        finally:
+            if body_scope is not None:
+                scopes.pop(0)
+
     def set_in_scopes(self, name, value, scopes):
         """
 
@@ -141,9 +368,7 @@ class Runner:
         if not isinstance(value, ast.TypedValue):
             raise PyGoGrammarError(f"Trying to set a typeless value: {value}")
 
-        usable_scopes = list(scopes)
-        while usable_scopes:
-            current_scope = usable_scopes.pop(0)
+        for current_scope in scopes:
             if name in current_scope:
                 _, type_ = current_scope[name]
 
@@ -194,47 +419,70 @@ class Runner:
         :return:
         """
         operands = [
-            self.run(operand_exp, scopes)
+            self.walk(operand_exp, scopes)
             for operand_exp in operator_expr.args_list
         ]
         result = operator_expr.operator_pyfunc(*operands)
         return result
 
+    def run_logical_operator(self, operator_expr, scopes):
+        """
+        :param ast.LogicalOperator operator_expr:
+        :param list[dict] scopes:
+        :return:
+        """
+        left_operand, right_operand = operator_expr.args_list
+        left_value = self.walk(left_operand, scopes)
+        if left_value == operator_expr.short_circuit_value:
+            return left_value
+        return self.walk(right_operand, scopes)
+
     def call_func(self, func_call, scopes):
         # 1. find the function's parameters
         # 2. match them against the arguments
-        # 3. set the parameters as variables in the newly created scope
-        # 4. run the function's body using the new and previous scopes
+        # 3. set the parameters as variables in a new function scope
+        # 4. run the function's body using the new scope and the module scope
         # 5. profit!
-        scopes = scopes or []
-        scopes.insert(0, ast.FuncRuntimeScope({}))
-
-        func = self.find_in_scopes(func_call.func_name, scopes)  # type: ast.Func
+        # Functions are only allowed at the top level, so they're globals
+        func = self.state[func_call.func_name][0]  # type: ast.FuncCreation
+
+        param_names = func.param_names
+        arguments = func_call.arguments
+        if len(param_names) != len(arguments):
+            raise PyLangRuntimeError(
+                f"Wrong number of arguments in call to {func_call.func_name}: "
+                f"expected {len(param_names)}, got {len(arguments)}"
+            )
 
-        params = func.get_params_and_types()
+        argument_values = [self.walk(arg, scopes) for arg in arguments]
 
-        # flatten function arguments
-        flat_arguments = []
-        for expression in func_call.args.arg_list if func_call.args else []:
-            if isinstance(expression.child, ast.FuncArguments):
-                for child_expr in expression.child.arg_list:
-                    flat_arguments.append(child_expr)
-            else:
-                flat_arguments.append(expression.child)
+        memo_key = None
+        if self.memoizer is not None and \
+                self.memoizer.is_pure(func, self.state.as_dict()):
+            memo_key = self.memoizer.get_key(func, argument_values)
+            result = self.memoizer.cache.get(memo_key)
+            if result is not memoization.MISSING:
+                return result
 
         # set in the new function scope the arguments as variables
-        for (pname, ptype), arg_abstrat_value in zip(params, flat_arguments):
-            arg_value = self.run(arg_abstrat_value, scopes)
-
-            # TODO -> we don't check for types here, and we shouldn't
-            #   What we should do is check types at parse time
-            scopes[0][pname] = [arg_value, 'type-not-set-and-we-dont-need-to-set-it-yet']
-
-        result = self.run(func.body, scopes=scopes)
-
-        # Don't forget to destroy the created scope!
-        scopes.pop(0)
-
+        func_scope = self._free_func_scopes.pop() if self._free_func_scopes \
+            else ast.FuncRuntimeScope({})
+        scope_dict = func_scope.as_dict()
+        for (pname, ptype), arg_value in zip(func.get_params_and_types(), argument_values):
+            # The types were checked when parsing, but parameters can be
+            # assigned to, which checks them again
+            scope_dict[pname] = [arg_value, ptype]
+
+        # The body only sees its own scope, and the module scope. Not the
+        # caller's scopes
+        result = self.walk(func.body, scopes=[func_scope, self.state])
+
+        # Recycle the scope. If the body raised, it's just not recycled
+        scope_dict.clear()
+        self._free_func_scopes.append(func_scope)
+
+        if memo_key is not None:
+            self.memoizer.cache.put(memo_key, result)
         return result
 
     def declare_in_scopes(self, key, type_, scopes):
@@ -0,0 +1,129 @@
+"""Runs many independent programs, on all the cores
+
+The programs are split into chunks, which are run by a
+`concurrent.futures.ProcessPoolExecutor`: every worker process parses and
+runs the programs of the chunks it gets, one after the other, each with a
+fresh module scope, keeping what they print (see
+`pygolang.interpreter.run_program`). Chunks make for fewer round trips to
+the workers, when there are many small programs.
+
+The results come back in the order of the programs, or as soon as they're
+ready.
+
+Programs running for too long are stopped with SIGALRM, in the worker, so
+timeouts need a POSIX system.
+
+Usage:
+    python -m pygolang batch rules/*.go --workers 8 --timeout 2
+"""
+import concurrent.futures
+import os
+import signal
+
+from pygolang import interpreter
+from pygolang.interpreter import ProgramResult
+from pygolang.optimizer import Optimizer
+
+DEFAULT_CHUNKSIZE = 8
+
+
+class _Timeout(BaseException):
+    # Not an Exception, so nothing running the program catches it
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout
+
+
+class _WorkerState:
+    engine = None
+    optimizer = None
+
+
+def _init_worker(engine, optimization_level):
+    _WorkerState.engine = engine
+    _WorkerState.optimizer = Optimizer(optimization_level)
+
+    # Loads the parser tables before the first chunk arrives
+    interpreter.run_program('0', engine, _WorkerState.optimizer)
+
+
+def _run_one(source, path, timeout):
+    if path is not None:
+        try:
+            with open(path, encoding='utf-8') as source_file:
+                source = source_file.read()
+        except OSError as err:
+            return ProgramResult(error=f"Can't read {path}: {err.strerror}")
+
+    if timeout is None:
+        return interpreter.run_program(
+            source, _WorkerState.engine, _WorkerState.optimizer)
+
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return interpreter.run_program(
+            source, _WorkerState.engine, _WorkerState.optimizer)
+    except _Timeout:
+        return ProgramResult(error=f"The program ran for more than {timeout}s")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _run_chunk(chunk, timeout):
+    """Runs in the worker processes
+
+    :param list chunk: (index, source, path) tuples. The sources of files
+        are read by the workers, so they're None
+    :return: (index, ProgramResult) pairs
+    """
+    return [
+        (index, _run_one(source, path, timeout))
+        for index, source, path in chunk
+    ]
+
+
+def run_batch(sources=(), paths=(), max_workers=None,
+              chunksize=DEFAULT_CHUNKSIZE, timeout=None, ordered=True,
+              engine=None, optimization_level=None):
+    """Runs the programs in worker processes
+
+    :param list[str] sources: the programs to run
+    :param list[str] paths: files with more programs to run, after the
+        sources
+    :param int|None max_workers: the number of worker processes. Defaults
+        to the number of cores
+    :param int chunksize: how many programs a worker gets at a time
+    :param float|None timeout: seconds after which a program is stopped. No
+        limit when None
+    :param bool ordered: yield the results in the order of the programs.
+        Otherwise they're yielded as soon as their chunk is done
+    :param str|None engine: see `pygolang.ast_runner.ENGINES`
+    :param int|None optimization_level: see `pygolang.optimizer.LEVELS`
+    :return: iterator of (index of the program, ProgramResult). The indexes
+        of the paths come after those of the sources
+    """
+    programs = [(index, source, None) for index, source in enumerate(sources)]
+    programs += [
+        (len(programs) + index, None, path) for index, path in enumerate(paths)
+    ]
+    chunks = [
+        programs[start:start + chunksize]
+        for start in range(0, len(programs), chunksize)
+    ]
+    if not chunks:
+        return
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers, initializer=_init_worker,
+            initargs=(engine, optimization_level)) as executor:
+        futures = [executor.submit(_run_chunk, chunk, timeout) for chunk in chunks]
+        if not ordered:
+            futures = concurrent.futures.as_completed(futures)
+
+        for future in futures:
+            yield from future.result()
@@ -0,0 +1,435 @@
+"""The functions every program can call without declaring them
+
+Builtins are looked up by the parser, for the calls to names which aren't
+declared (so programs can still declare functions with the same names).
+The calls are type checked against the builtin's signature when parsing,
+like calls to pygo functions.
+
+The builtins doing I/O block the goroutine calling them, not the program:
+they're generators, run on the goroutine like channel operations, and wait
+for files through the event loop of the runner's scheduler (see
+`pygolang.event_loop`). So, like goroutines, they only work on the
+stackless engine.
+
+Files and sockets are both known to programs by their file descriptors.
+Strings are read and written as utf-8. Whole files can be read as `[]byte`
+too, which are memory mapped, so they're never copied.
+"""
+import codecs
+import mmap
+import os
+import socket
+
+from pygolang import ast
+from pygolang.errors import PyLangRuntimeError, StopPyGoLangInterpreterError
+
+# {name: Builtin}
+BUILTINS = {}
+
+UNSUPPORTED_ENGINE_MESSAGE = "{name}() needs the stackless engine"
+
+ENCODING = 'utf-8'
+ENCODING_ERRORS = 'surrogateescape'
+
+# How much a scanner reads at a time
+SCAN_CHUNK_SIZE = 64 * 1024
+
+SPLIT_LINES = 'lines'
+SPLIT_WORDS = 'words'
+
+
+class Builtin:
+    __slots__ = ('name', 'param_types', 'return_type', 'function')
+
+    def __init__(self, name, param_types, return_type, function):
+        """
+        :param str name:
+        :param list[ast.Type] param_types:
+        :param ast.Type|None return_type: None for builtins which don't
+            return anything
+        :param function: generator function, called with the runner and the
+            values of the arguments. Returns the pygo value of the call
+        """
+        self.name = name
+        self.param_types = param_types
+        self.return_type = return_type
+        self.function = function
+
+
+def builtin(name, param_types, return_type):
+    """Registers the decorated generator function as a builtin
+
+    The OSErrors it raises become errors of the pygo program.
+    """
+    def register(function):
+        def call(runner, *args):
+            try:
+                return (yield from function(runner, *args))
+            except OSError as err:
+                raise PyLangRuntimeError(f"{name}: {err.strerror or err}")
+
+        call.__name__ = function.__name__
+        BUILTINS[name] = Builtin(name, param_types, return_type, call)
+        return function
+
+    return register
+
+
+def _decode(data):
+    return ast.String(data.decode(ENCODING, ENCODING_ERRORS))
+
+
+def _encode(string):
+    return string.value.encode(ENCODING, ENCODING_ERRORS)
+
+
+def _write_all(fd, data):
+    data = memoryview(data)
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def _parse_address(network, address):
+    """
+    :param str network: "tcp", or "unix"
+    :param str address: "host:port" for tcp, the path of the socket for unix
+    :return: (socket family, the address as the socket module expects it)
+    """
+    if network == 'unix':
+        return socket.AF_UNIX, address
+
+    if network == 'tcp':
+        host, separator, port = address.rpartition(':')
+        if not separator or not port.isdigit():
+            raise PyLangRuntimeError(f"Invalid tcp address {address!r}")
+        return socket.AF_INET, (host or '0.0.0.0', int(port))
+
+    raise PyLangRuntimeError(f"Unknown network {network!r}")
+
+
+class Scanner:
+    """Splits what's read from a file into lines or words, like go's
+    bufio.Scanner
+
+    The file is read in big chunks, which are split all at once. Most scans
+    only take the next token of the chunk, without reading anything.
+    """
+    __slots__ = ('read', 'split', 'tokens', 'index', 'remainder', 'done', 'text')
+
+    def __init__(self, read, split=SPLIT_LINES):
+        """
+        :param read: generator function reading the next chunk of the file,
+            as a string. "" at the end of it
+        :param str split: `SPLIT_LINES` or `SPLIT_WORDS`
+        """
+        self.read = read
+        self.split = split
+
+        # The tokens of the chunks read, and the one to scan next
+        self.tokens = []
+        self.index = 0
+        # The last token read, which may go on in the next chunk
+        self.remainder = ''
+        self.done = False
+
+        # The token scanned last
+        self.text = ''
+
+    def next_token(self):
+        """
+        :return: whether there was a token, or None if a chunk has to be
+            read (see `feed`) to tell
+        :rtype: bool|None
+        """
+        if self.index < len(self.tokens):
+            self.text = self.tokens[self.index]
+            self.index += 1
+            return True
+        if self.done:
+            self.text = ''
+            return False
+        return None
+
+    def feed(self, chunk):
+        """Splits the chunk read into tokens
+
+        :param str chunk: "" at the end of the file
+        """
+        data = self.remainder + chunk
+        self.index = 0
+        self.done = not chunk
+
+        if self.split == SPLIT_WORDS:
+            self.tokens = data.split()
+            ends_in_word = data and not data[-1].isspace()
+            self.remainder = self.tokens.pop() if chunk and ends_in_word else ''
+            return
+
+        self.tokens = data.split('\n')
+        self.remainder = self.tokens.pop()
+        if self.done and self.remainder:
+            # The last line needs no newline
+            self.tokens.append(self.remainder)
+            self.remainder = ''
+        if '\r' in data:
+            self.tokens = [line[:-1] if line[-1:] == '\r' else line for line in self.tokens]
+
+
+def _chunk_reader(runner, fd):
+    """
+    :param int fd: the file descriptor of a file or socket. 0 is the stdin
+        of the runner's IO, whatever it reads from
+    :return: generator function reading the next chunk of the file, as a
+        string. "" at the end of it
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    decoder = codecs.getincrementaldecoder(ENCODING)(ENCODING_ERRORS)
+
+    def decode(data):
+        # A character can be split between 2 chunks
+        return decoder.decode(data, final=not data)
+
+    if fd == 0:
+        io = runner.io
+        # IOs which don't read a file, like `BufferIO`, have no stdin
+        stdin = getattr(io, 'stdin', None)
+        binary_stdin = getattr(stdin, 'buffer', None)
+
+        def read_stdin():
+            if binary_stdin is not None:
+                return decode(binary_stdin.read1(SCAN_CHUNK_SIZE))
+            if hasattr(stdin, 'read'):
+                return stdin.read(SCAN_CHUNK_SIZE)
+            try:
+                line = io.from_stdin()
+            except StopPyGoLangInterpreterError:
+                return ''
+            return line if line.endswith('\n') else line + '\n'
+
+        def read():
+            if getattr(io, 'interactive', False):
+                # The program may have prompted for what it reads
+                io.flush()
+            return (yield from event_loop.run_in_thread(read_stdin))
+
+    elif event_loop.get_socket(fd) is not None:
+        sock = event_loop.get_socket(fd)
+
+        def read():
+            return decode((yield from event_loop.recv(sock, SCAN_CHUNK_SIZE)))
+    else:
+        def read():
+            return decode((yield from event_loop.run_in_thread(
+                os.read, fd, SCAN_CHUNK_SIZE)))
+
+    # A decoder can hold back the end of a chunk, so "" only tells the end
+    # of the file when nothing was read
+    def read_some():
+        while True:
+            chunk = yield from read()
+            if chunk or decoder.getstate()[0] == b'':
+                return chunk
+
+    return read_some
+
+
+def _get_scanner(runner, fd):
+    scanners = runner.scheduler.get_event_loop().scanners
+    scanner = scanners.get(fd)
+    if scanner is None:
+        scanner = scanners[fd] = Scanner(_chunk_reader(runner, fd))
+    return scanner
+
+
+@builtin('readline', [], ast.StringType)
+def readline(runner):
+    """`readline() string`: the next line of stdin, with its newline.
+    "" at the end of it
+    """
+    def read_line():
+        try:
+            return runner.io.from_stdin()
+        except StopPyGoLangInterpreterError:
+            return ''
+
+    event_loop = runner.scheduler.get_event_loop()
+    return ast.String((yield from event_loop.run_in_thread(read_line)))
+
+
+@builtin('open', [ast.StringType], ast.IntType)
+def open_(runner, path):
+    """`open(path string) int`: opens the file for reading"""
+    event_loop = runner.scheduler.get_event_loop()
+    return ast.Int((yield from event_loop.run_in_thread(
+        os.open, path.value, os.O_RDONLY)))
+
+
+@builtin('create', [ast.StringType], ast.IntType)
+def create(runner, path):
+    """`create(path string) int`: opens the file for writing, truncating it
+    if it exists
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    return ast.Int((yield from event_loop.run_in_thread(
+        os.open, path.value, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)))
+
+
+@builtin('read', [ast.IntType, ast.IntType], ast.StringType)
+def read(runner, fd, size):
+    """`read(fd int, n int) string`: up to n bytes from the file or socket.
+    "" at the end of it
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    sock = event_loop.get_socket(fd.value)
+    if sock is not None:
+        return _decode((yield from event_loop.recv(sock, size.value)))
+    return _decode((yield from event_loop.run_in_thread(
+        os.read, fd.value, size.value)))
+
+
+@builtin('write', [ast.IntType, ast.StringType], None)
+def write(runner, fd, string):
+    """`write(fd int, s string)`: writes all of s to the file or socket"""
+    event_loop = runner.scheduler.get_event_loop()
+    sock = event_loop.get_socket(fd.value)
+    if sock is not None:
+        yield from event_loop.sendall(sock, _encode(string))
+    else:
+        yield from event_loop.run_in_thread(_write_all, fd.value, _encode(string))
+
+
+@builtin('closefd', [ast.IntType], None)
+def closefd(runner, fd):
+    """`closefd(fd int)`: closes the file or socket. Named so because
+    `close` closes channels
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    event_loop.scanners.pop(fd.value, None)
+    if event_loop.get_socket(fd.value) is not None:
+        event_loop.close_socket(fd.value)
+    else:
+        os.close(fd.value)
+    return
+    yield
+
+
+def _map_fd(fd):
+    """A read only memoryview of the whole file. Reading it reads the file,
+    through the page cache of the OS, so only the pages used are in memory
+    """
+    if os.fstat(fd).st_size == 0:
+        # Empty files can't be mapped
+        return memoryview(b'')
+    return memoryview(mmap.mmap(fd, 0, access=mmap.ACCESS_READ))
+
+
+def _map_file(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return _map_fd(fd)
+    finally:
+        # The mapping doesn't need the file to stay open
+        os.close(fd)
+
+
+@builtin('readfile', [ast.StringType], ast.BytesType)
+def readfile(runner, path):
+    """`readfile(path string) []byte`: the contents of the file, memory
+    mapped
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    return ast.ByteSlice((yield from event_loop.run_in_thread(
+        _map_file, path.value)))
+
+
+@builtin('mapfile', [ast.IntType], ast.BytesType)
+def mapfile(runner, fd):
+    """`mapfile(fd int) []byte`: the contents of the opened file, memory
+    mapped. The file can be closed afterwards
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    return ast.ByteSlice((yield from event_loop.run_in_thread(
+        _map_fd, fd.value)))
+
+
+@builtin('listen', [ast.StringType, ast.StringType], ast.IntType)
+def listen(runner, network, address):
+    """`listen(network string, address string) int`: a socket listening on
+    the address, for `accept`
+    """
+    family, address = _parse_address(network.value, address.value)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(address)
+        sock.listen(socket.SOMAXCONN)
+    except OSError:
+        sock.close()
+        raise
+
+    return ast.Int(runner.scheduler.get_event_loop().add_socket(sock))
+    yield
+
+
+@builtin('accept', [ast.IntType], ast.IntType)
+def accept(runner, listener):
+    """`accept(listener int) int`: waits for a connection to the listening
+    socket
+    """
+    event_loop = runner.scheduler.get_event_loop()
+    sock = event_loop.get_socket(listener.value)
+    if sock is None:
+        raise PyLangRuntimeError(f"accept: {listener.value} is not a socket")
+
+    connection = yield from event_loop.accept(sock)
+    return ast.Int(event_loop.add_socket(connection))
+
+
+@builtin('dial', [ast.StringType, ast.StringType], ast.IntType)
+def dial(runner, network, address):
+    """`dial(network string, address string) int`: connects to the address"""
+    family, address = _parse_address(network.value, address.value)
+    event_loop = runner.scheduler.get_event_loop()
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    fd = event_loop.add_socket(sock)
+    try:
+        yield from event_loop.connect(sock, address)
+    except OSError:
+        event_loop.close_socket(fd)
+        raise
+    return ast.Int(fd)
+
+
+@builtin('scanner', [ast.IntType, ast.StringType], None)
+def scanner(runner, fd, split):
+    """`scanner(fd int, split string)`: sets how `scan` splits the file or
+    socket: in "lines" (the default) or in "words". 0 is stdin
+    """
+    if split.value not in (SPLIT_LINES, SPLIT_WORDS):
+        raise PyLangRuntimeError(f"scanner: unknown split {split.value!r}")
+    _get_scanner(runner, fd.value).split = split.value
+    return
+    yield
+
+
+@builtin('scan', [ast.IntType], ast.BoolType)
+def scan(runner, fd):
+    """`scan(fd int) bool`: moves to the next line (or word) of the file or
+    socket, for `scantext`. false at the end of it. 0 is stdin
+    """
+    file_scanner = _get_scanner(runner, fd.value)
+    while True:
+        found = file_scanner.next_token()
+        if found is not None:
+            return ast.BoolValue(found)
+        file_scanner.feed((yield from file_scanner.read()))
+
+
+@builtin('scantext', [ast.IntType], ast.StringType)
+def scantext(runner, fd):
+    """`scantext(fd int) string`: the line (without its newline) or word
+    `scan` moved to
+    """
+    return ast.String(_get_scanner(runner, fd.value).text)
+    yield
@@ -12,6 +12,18 @@ class KEYWORDS(enum.Enum):
     INT = 'INT'
     IF = 'IF'
     ELSE = 'ELSE'
+    GO = 'GO'
+    CHAN = 'CHAN'
+    SELECT = 'SELECT'
+    CASE = 'CASE'
+    DEFAULT = 'DEFAULT'
+    # Builtin functions in go, but they take types, or return nothing
+    MAKE = 'MAKE'
+    CLOSE = 'CLOSE'
+    FOR = 'FOR'
+    RANGE = 'RANGE'
+    BREAK = 'BREAK'
+    CONTINUE = 'CONTINUE'
 
 
 class OPERATORS(enum.Enum):
@@ -23,6 +35,10 @@ class OPERATORS(enum.Enum):
 
     EQUALS = 'EQUALS'  # Used in assignments!
     WALRUS = 'WALRUS'
+    PLUSEQUALS = 'PLUSEQUALS'  # +=, -=, ++ and -- are assignments too
+    MINUSEQUALS = 'MINUSEQUALS'
+    INCREMENT = 'INCREMENT'
+    DECREMENT = 'DECREMENT'
 
     GREATER = 'GREATER'
     LESSER = 'LESSER'
@@ -36,6 +52,11 @@ class OPERATORS(enum.Enum):
     BOOLOR = 'BOOLOR'
     NOT = 'NOT'
 
+    ARROW = 'ARROW'  # <-, sending to and receiving from channels
+    # <- starting a line only receives. Statements have no terminator, so
+    # it would otherwise send the end of the line before to the channel
+    RECEIVE_ARROW = 'RECEIVE_ARROW'
+
 
 keywords_tuple = tuple(e.name for e in KEYWORDS)
 
@@ -51,5 +72,7 @@ tokens = keywords_tuple + \
              'LBRACE', 'RBRACE',  # { }
              'LBRACKET', 'RBRACKET',  # [ ]
              'COMMA',  # ,
+             'COLON',  # :
+             'SEMICOLON',  # ;, only separating the clauses of for loops
 
          )
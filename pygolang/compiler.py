@@ -0,0 +1,619 @@
+import weakref
+
+from pygolang import ast, builtin, memoization, scheduler
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+
+
+def _noop(frame):
+    return None
+
+
+def _true(frame):
+    return True
+
+
+class ClosureCompiler:
+    """Lowers the ast into a tree of python closures
+
+    The tree walking engine (`Runner.walk`) goes through a long chain of
+    isinstance checks for every node, every time the node is evaluated.
+    This compiler does that dispatch only once, when the code is compiled.
+    Every node becomes a closure with its operands already bound, and
+    running the program means calling the closure of the root node.
+
+    All closures have the same signature: `closure(frame) -> value`.
+    The frame is a fixed size list holding the variables of the function
+    being executed (see `ast.TypeScope` for how names get their slots).
+    Module level names are not in frames, they are looked up in the
+    runner's module scope, which is bound to the closures when compiling.
+    """
+
+    # {ast node class: name of the method that compiles it}
+    # When looking up a node, its MRO is used, so the order of the classes
+    # doesn't matter, subclasses always win.
+    COMPILE_METHODS = {
+        ast.Root: 'compile_root',
+        ast.Program: 'compile_program_statements',
+        ast.InterpreterStart: 'compile_interpreter_start',
+        ast.Statement: 'compile_statement',
+        ast.Block: 'compile_block',
+        ast.Conditional: 'compile_conditional',
+        ast.For: 'compile_for',
+        ast.ForRange: 'compile_for',
+        ast.VectorizedLoop: 'compile_vectorized_loop',
+        ast.Break: 'compile_break',
+        ast.Continue: 'compile_continue',
+        ast.FuncBody: 'compile_func_body',
+        ast.Declaration: 'compile_declaration',
+        ast.Assignment: 'compile_assignment',
+        ast.FuncCreation: 'compile_func_creation',
+        ast.Name: 'compile_name',
+        ast.Operator: 'compile_operator',
+        ast.LogicalOperator: 'compile_logical_operator',
+        ast.Value: 'compile_value',
+        ast.Expression: 'compile_expression',
+        ast.Return: 'compile_return',
+        ast.FuncCall: 'compile_func_call',
+        ast.Go: 'compile_concurrency',
+        ast.MakeChannel: 'compile_concurrency',
+        ast.Receive: 'compile_concurrency',
+        ast.Send: 'compile_concurrency',
+        ast.Close: 'compile_concurrency',
+        ast.Select: 'compile_concurrency',
+        ast.BuiltinCall: 'compile_builtin_call',
+    }
+
+    def __init__(self, runner):
+        """
+        :param pygolang.ast_runner.Runner runner: the runner whose io and
+            scope helpers the compiled code uses
+        """
+        self.runner = runner
+
+        # {name: [value, type]}
+        self.globals = runner.state.as_dict()
+
+        # {ast.FuncCreation: (param count, frame padding, compiled body)}
+        # Functions are looked up by name at run-time (they can be redefined
+        # in the interpreter), but their bodies are only compiled once
+        self._functions = weakref.WeakKeyDictionary()
+
+    # The key under which the results of pure functions are cached, from
+    # the function and the values of its arguments
+    get_memo_key = staticmethod(memoization.Memoizer.get_key)
+
+    def compile_program(self, node):
+        """
+        :param node: the code to run, usually an `ast.Root`
+        :return: a closure without arguments, which runs the code in a new
+            frame
+        """
+        code = self.compile(node)
+        frame_size = getattr(node, 'frame_size', 0)
+
+        def program():
+            return code([ast.ValueNotSet] * frame_size)
+
+        return program
+
+    def compile(self, node):
+        """
+        :param node: any ast node
+        :return: a closure which evaluates the node
+        """
+        # The parser uses empty lists for missing parts, like the final
+        # block of an if statement without an else
+        if node is None or isinstance(node, list) and not node:
+            return _noop
+
+        for klass in type(node).__mro__:
+            method_name = self.COMPILE_METHODS.get(klass)
+            if method_name is not None:
+                return getattr(self, method_name)(node)
+
+        raise PyGoGrammarError(f"Don't know how to compile {node!r}")
+
+    def compile_root(self, node):
+        return self.compile(node.value)
+
+    def compile_program_statements(self, node):
+        statements = [self.compile(stmt) for stmt in node.statements]
+        io = self.runner.io
+
+        def program_statements(frame):
+            # Like in the interpreter, every value printed goes on its own line
+            for stmt in statements:
+                if stmt(frame) is not None:
+                    io.newline()
+
+        return program_statements
+
+    def compile_interpreter_start(self, node):
+        child = self.compile(node.value)
+        io = self.runner.io
+
+        def interpreter_start(frame):
+            value = child(frame)
+            if value is not None:
+                io.to_stdout(value.to_pygo_repr())
+            return value
+
+        return interpreter_start
+
+    def compile_statement(self, node):
+        # Statements are only wrappers, they have no behaviour of their own
+        return self.compile(node.value)
+
+    def compile_expression(self, node):
+        return self.compile(node.child)
+
+    def compile_return(self, node):
+        # The function body is the one that stops at returns
+        return self.compile(node.value)
+
+    def compile_block(self, node):
+        # The variables declared in the block already have their own slots
+        # in the frame, so blocks don't need any run-time scope
+        statements = [self.compile_statement_in_body(stmt) for stmt in node.statements]
+
+        def block(frame):
+            # Blocks evaluate to the value of the `return` executed in them
+            for stmt in statements:
+                value = stmt(frame)
+                if value is not None:
+                    return value
+
+        return block
+
+    def compile_statement_in_body(self, node):
+        """Compiles a statement of a block or function body
+
+        The closure returns None, unless a `return` was executed, in which
+        case it returns the returned value
+        """
+        if ast.is_control_flow_statement(node):
+            return self.compile(node)
+
+        code = self.compile(node)
+
+        def discard_value(frame):
+            code(frame)
+
+        return discard_value
+
+    def compile_conditional(self, node):
+        branches = [
+            (self.compile(expression), self.compile(block))
+            for expression, block in node.expression_block_pairs
+        ]
+        final_block = self.compile(node.final_block)
+        true = ast.BoolLiteralTrue
+
+        def conditional(frame):
+            for condition, block in branches:
+                # In go, there's no true-ish value, only true/false
+                if condition(frame) == true:
+                    return block(frame)
+            return final_block(frame)
+
+        return conditional
+
+    def compile_for(self, node):
+        counting_loop = ast.get_counting_loop(node)
+        if counting_loop is not None:
+            return self.compile_counting_loop(counting_loop, node.body)
+
+        init = self.compile(node.init)
+        is_true = self.compile_test(node.condition)
+        post = self.compile(node.post)
+        body = self.compile(node.body)
+        loop_break, loop_continue = ast.LoopBreak, ast.LoopContinue
+
+        def for_loop(frame):
+            init(frame)
+            while is_true(frame):
+                value = body(frame)
+                if value is not None:
+                    if value is loop_break:
+                        break
+                    # Loops evaluate to the value of the `return` executed
+                    # in them
+                    if value is not loop_continue:
+                        return value
+                post(frame)
+
+        return for_loop
+
+    def compile_test(self, node):
+        """
+        :param node: a bool expression, or None for conditions which always
+            hold
+        :return: a closure evaluating the expression to a python bool
+        """
+        if node is None:
+            return _true
+
+        condition = self.compile(node)
+        true = ast.BoolLiteralTrue
+
+        def test(frame):
+            # Bools are singletons
+            return condition(frame) is true
+
+        return test
+
+    def compile_counting_loop(self, counting_loop, body):
+        """Compiles a loop counting ints (see `ast.get_counting_loop`)
+
+        The counter comes from a python range. It's only boxed to be stored
+        in its slot, without evaluating the condition, or the post statement
+        """
+        start = self.compile(counting_loop.start)
+        stop = self.compile(counting_loop.stop)
+        get_range = counting_loop.get_range
+        slot = counting_loop.slot
+        box_int = self.box_int
+
+        if not ast.can_jump(body):
+            statement = self.compile_plain_body(body)
+
+            def plain_counting_loop(frame):
+                counter_range = get_range(start(frame).value, stop(frame).value)
+                for counter in counter_range:
+                    frame[slot] = box_int(counter)
+                    statement(frame)
+
+            return plain_counting_loop
+
+        body = self.compile(body)
+        loop_break, loop_continue = ast.LoopBreak, ast.LoopContinue
+
+        def counting_loop(frame):
+            counter_range = get_range(start(frame).value, stop(frame).value)
+            for counter in counter_range:
+                frame[slot] = box_int(counter)
+                value = body(frame)
+                if value is not None:
+                    if value is loop_break:
+                        break
+                    if value is not loop_continue:
+                        return value
+
+        return counting_loop
+
+    def compile_plain_body(self, body):
+        """Compiles the body of a loop which has no `return`, `break` or
+        `continue` statements, so what its statements evaluate to can be
+        ignored
+
+        :param ast.Block body:
+        :return: a closure running all the statements
+        """
+        statements = [self.compile(stmt) for stmt in body.statements]
+        if len(statements) == 1:
+            return statements[0]
+
+        def plain_body(frame):
+            for stmt in statements:
+                stmt(frame)
+
+        return plain_body
+
+    # Boxes the counters of counting loops into the values the compiled
+    # code computes with
+    box_int = ast.Int
+
+    def compile_vectorized_loop(self, node):
+        loop = self.compile(node.loop)
+        operands = [self.compile(operand) for operand in node.operands]
+        run_kernel = self.get_kernel_function(node)
+
+        def vectorized_loop(frame):
+            if not run_kernel(*[operand(frame) for operand in operands]):
+                return loop(frame)
+
+        return vectorized_loop
+
+    @staticmethod
+    def get_kernel_function(node):
+        """
+        :param ast.VectorizedLoop node:
+        :return: the python function running the kernel, on the values the
+            compiled code computes with
+        """
+        return node.kernel.boxed_run
+
+    def compile_break(self, node):
+        def loop_break(frame):
+            return ast.LoopBreak
+
+        return loop_break
+
+    def compile_continue(self, node):
+        def loop_continue(frame):
+            return ast.LoopContinue
+
+        return loop_continue
+
+    def compile_func_body(self, node):
+        # Expression statements directly in the body don't end the function,
+        # but their value is returned if nothing else was
+        statements = [
+            (self.compile(stmt), ast.is_control_flow_statement(stmt))
+            for stmt in node.statements
+        ]
+
+        def func_body(frame):
+            value = None
+            for stmt, is_control_flow in statements:
+                if is_control_flow:
+                    value = stmt(frame)
+                    if value is not None:
+                        break
+                else:
+                    value = stmt(frame)
+            return value
+
+        return func_body
+
+    def compile_declaration(self, node):
+        name, type_, slot = node.name, node.type, node.slot
+        globals_ = self.globals
+        value = self.compile(node.value) if node.value is not ast.ValueNotSet else None
+        not_set = ast.ValueNotSet
+
+        if slot is None:
+            if value is None:
+                def declare_global(frame):
+                    globals_[name] = [not_set, type_]
+
+                return declare_global
+
+            def declare_global_with_value(frame):
+                globals_[name] = [value(frame), type_]
+
+            return declare_global_with_value
+
+        if value is None:
+            def declare_local(frame):
+                frame[slot] = not_set
+
+            return declare_local
+
+        def declare_local_with_value(frame):
+            frame[slot] = value(frame)
+
+        return declare_local_with_value
+
+    def compile_assignment(self, node):
+        name, slot = node.name, node.slot
+        value = self.compile(node.value)
+        globals_ = self.globals
+
+        if slot is None:
+            def assign_global(frame):
+                globals_[name][0] = value(frame)
+
+            return assign_global
+
+        def assign_local(frame):
+            frame[slot] = value(frame)
+
+        return assign_local
+
+    def compile_func_creation(self, node):
+        name = node.name
+        type_ = node.type
+        globals_ = self.globals
+        self.get_compiled_function(node)
+
+        memoizer = self.runner.memoizer
+
+        # Functions are only allowed at the top level, so they're globals
+        def func_creation(frame):
+            globals_[name] = [node, type_]
+            if memoizer is not None:
+                memoizer.invalidate()
+
+        return func_creation
+
+    def compile_name(self, node):
+        name, slot = node.value, node.slot
+        globals_ = self.globals
+
+        if slot is None:
+            def load_global(frame):
+                try:
+                    return globals_[name][0]
+                except KeyError:
+                    # The parser should have prevented this
+                    return None
+
+            return load_global
+
+        def load_local(frame):
+            return frame[slot]
+
+        return load_local
+
+    def compile_value(self, node):
+        def value(frame):
+            return node
+
+        return value
+
+    def compile_operator(self, node):
+        pyfunc = self.get_operator_pyfunc(node)
+        operands = [self.compile(arg) for arg in node.args_list]
+
+        if len(operands) == 2:
+            left, right = operands
+
+            def binary_operator(frame):
+                return pyfunc(left(frame), right(frame))
+
+            return binary_operator
+
+        if len(operands) == 1:
+            operand, = operands
+
+            def unary_operator(frame):
+                return pyfunc(operand(frame))
+
+            return unary_operator
+
+        def operator(frame):
+            return pyfunc(*[operand(frame) for operand in operands])
+
+        return operator
+
+    @staticmethod
+    def get_operator_pyfunc(node):
+        """
+        :param ast.Operator node:
+        :return: the python function applying the operator on the values
+            the compiled code produces
+        """
+        return node.operator_pyfunc
+
+    def compile_logical_operator(self, node):
+        left, right = [self.compile(arg) for arg in node.args_list]
+        short_circuit_value = node.short_circuit_value
+
+        def logical_operator(frame):
+            left_value = left(frame)
+            if left_value == short_circuit_value:
+                return left_value
+            return right(frame)
+
+        return logical_operator
+
+    def compile_concurrency(self, node):
+        # Goroutines have to be able to block, which closures can't
+        raise PyLangRuntimeError(scheduler.UNSUPPORTED_ENGINE_MESSAGE)
+
+    def compile_builtin_call(self, node):
+        # The builtins block the goroutine calling them, like channels do
+        raise PyLangRuntimeError(
+            builtin.UNSUPPORTED_ENGINE_MESSAGE.format(name=node.name))
+
+    def compile_func_call(self, node):
+        if self.runner.memoizer is not None:
+            return self.compile_memoized_func_call(node)
+
+        func_name = node.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(node.arguments))
+
+        arguments = [self.compile(arg) for arg in node.arguments]
+
+        # The parameters are the first slots of the function's frame.
+        # Calls with few arguments build it without looping over them
+        if not arguments:
+            def func_call(frame):
+                padding, body = get_callee(globals_[func_name][0])
+                return body(padding[:])
+
+        elif len(arguments) == 1:
+            argument, = arguments
+
+            def func_call(frame):
+                padding, body = get_callee(globals_[func_name][0])
+                return body([argument(frame), *padding])
+
+        elif len(arguments) == 2:
+            argument_0, argument_1 = arguments
+
+            def func_call(frame):
+                padding, body = get_callee(globals_[func_name][0])
+                return body([argument_0(frame), argument_1(frame), *padding])
+
+        else:
+            def func_call(frame):
+                padding, body = get_callee(globals_[func_name][0])
+                func_frame = [argument(frame) for argument in arguments]
+                func_frame += padding
+                return body(func_frame)
+
+        return func_call
+
+    def compile_memoized_func_call(self, node):
+        """Same as `compile_func_call`, but caching the results of pure
+        functions
+        """
+        func_name = node.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(node.arguments))
+        memoizer = self.runner.memoizer
+        get_key = self.get_memo_key
+        cache = memoizer.cache
+        missing = memoization.MISSING
+
+        arguments = [self.compile(arg) for arg in node.arguments]
+
+        def memoized_func_call(frame):
+            func = globals_[func_name][0]
+            padding, body = get_callee(func)
+
+            func_frame = [argument(frame) for argument in arguments]
+            if not memoizer.is_pure(func, globals_):
+                func_frame += padding
+                return body(func_frame)
+
+            key = get_key(func, func_frame)
+            result = cache.get(key)
+            if result is missing:
+                func_frame += padding
+                result = body(func_frame)
+                cache.put(key, result)
+            return result
+
+        return memoized_func_call
+
+    def make_callee_cache(self, func_name, argument_count):
+        """An inline cache, for the function called at one call site
+
+        Functions can be redefined, so they're looked up on every call. But
+        a call site nearly always calls the same function, so its compiled
+        body, and the check of the number of arguments, are kept for the
+        next call, instead of being looked up again.
+
+        :param str func_name:
+        :param int argument_count: the number of arguments of the call
+        :return: a function taking the `ast.FuncCreation` called, and
+            returning the rest of what `get_compiled_function` returns
+        """
+        get_compiled_function = self.get_compiled_function
+        cached_func = cached_callee = None
+
+        def get_callee(func):
+            nonlocal cached_func, cached_callee
+            if func is cached_func:
+                return cached_callee
+
+            param_count, *callee = get_compiled_function(func)
+            if param_count != argument_count:
+                raise PyLangRuntimeError(
+                    f"Wrong number of arguments in call to {func_name}: "
+                    f"expected {param_count}, got {argument_count}"
+                )
+            cached_func, cached_callee = func, tuple(callee)
+            return cached_callee
+
+        return get_callee
+
+    def get_compiled_function(self, func):
+        """
+        :param ast.FuncCreation func:
+        :return: a tuple of (number of params, list to pad the frame with,
+            after the params, compiled body)
+        """
+        try:
+            return self._functions[func]
+        except KeyError:
+            param_count = len(func.get_params_and_types())
+            padding = [ast.ValueNotSet] * (func.frame_size - param_count)
+            compiled = self._functions[func] = (
+                param_count, padding, self.compile(func.body)
+            )
+            return compiled
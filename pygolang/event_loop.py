@@ -0,0 +1,269 @@
+"""Blocking I/O for goroutines, without blocking the scheduler
+
+Goroutines doing I/O register the file they wait on with a `selectors`
+selector, and block like they would on a channel. When no goroutine can
+run, the scheduler waits on the selector instead, and resumes the
+goroutines whose files became ready. One thread serves any number of
+sockets this way.
+
+Regular files and stdin can't be waited on like that: they're always
+"ready", and then block anyway. Calls on them run in a pool of worker
+threads, while the goroutine making them is blocked. The workers wake the
+selector up when they're done.
+"""
+import collections
+import concurrent.futures
+import errno
+import selectors
+import socket
+
+from pygolang.errors import PyLangRuntimeError
+
+EVENT_READ = selectors.EVENT_READ
+EVENT_WRITE = selectors.EVENT_WRITE
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class EventLoop:
+    """Waits for files to be ready, for the goroutines of a scheduler
+
+    Counters:
+        io_waits: times a goroutine waited for a socket to be ready
+        thread_calls: calls run in the worker threads
+    """
+
+    def __init__(self, scheduler, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        :param pygolang.scheduler.Scheduler scheduler:
+        :param int max_workers: the number of worker threads
+        """
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self.selector = selectors.DefaultSelector()
+
+        # The workers write to this socket, to wake the selector up.
+        # It's registered without any data, unlike the files waited on
+        self._waker, self._waker_peer = socket.socketpair()
+        for sock in (self._waker, self._waker_peer):
+            sock.setblocking(False)
+        self.selector.register(self._waker, EVENT_READ, None)
+
+        # Started when first needed
+        self._executor = None
+
+        # (goroutine, future) pairs, of the calls the workers are done with.
+        # The workers append, the scheduler's thread pops
+        self._completed = collections.deque()
+
+        # The number of goroutines waiting for files or workers
+        self.waiting = 0
+
+        # {file descriptor: socket}, for the sockets the program opened
+        self.sockets = {}
+
+        # {file descriptor: pygolang.builtin.Scanner}, for the files the
+        # program scans
+        self.scanners = {}
+
+        self.io_waits = 0
+        self.thread_calls = 0
+
+    def wait(self, fileobj, event):
+        """Generator blocking the current goroutine until the file is ready
+
+        :param fileobj: a socket, or anything else with a fileno()
+        :param int event: `EVENT_READ` or `EVENT_WRITE`
+        """
+        goroutine = self.scheduler.current
+        selector = self.selector
+
+        # The data of a file is {event: the goroutine waiting for it}, so
+        # one goroutine can read a socket while another writes to it
+        try:
+            key = selector.get_key(fileobj)
+        except KeyError:
+            selector.register(fileobj, event, {event: goroutine})
+        else:
+            if event in key.data:
+                raise PyLangRuntimeError(
+                    "Another goroutine is already waiting for this file")
+            key.data[event] = goroutine
+            selector.modify(fileobj, key.events | event, key.data)
+
+        self.waiting += 1
+        self.io_waits += 1
+        yield from self.scheduler.suspend()
+
+    def run_in_thread(self, func, *args):
+        """Generator calling the function in a worker thread, and blocking
+        the current goroutine until it returns
+
+        :return: what the function returned. What it raised is raised here
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix='pygolang-io')
+
+        goroutine = self.scheduler.current
+
+        def done(future):
+            self._completed.append((goroutine, future))
+            self.wake_up()
+
+        self._executor.submit(func, *args).add_done_callback(done)
+        self.waiting += 1
+        self.thread_calls += 1
+
+        future = yield from self.scheduler.suspend()
+        return future.result()
+
+    def poll(self, timeout=None):
+        """Resumes the goroutines whose files are ready, or whose calls are
+        done
+
+        :param float|None timeout: how long to wait for one to be, in
+            seconds. Waits for as long as it takes when None
+        """
+        resume = self.scheduler.resume
+
+        for key, ready_events in self.selector.select(timeout):
+            waiters = key.data
+            if waiters is None:
+                self._drain_waker()
+                continue
+
+            for event in (EVENT_READ, EVENT_WRITE):
+                if ready_events & event and event in waiters:
+                    self.waiting -= 1
+                    resume(waiters.pop(event), None)
+
+            if waiters:
+                # The events still waited for
+                self.selector.modify(key.fileobj, sum(waiters), waiters)
+            else:
+                self.selector.unregister(key.fileobj)
+
+        while self._completed:
+            goroutine, future = self._completed.popleft()
+            self.waiting -= 1
+            resume(goroutine, future)
+
+    def wake_up(self):
+        """Makes the selector stop waiting. Can be called from any thread"""
+        try:
+            self._waker_peer.send(b'\0')
+        except OSError:
+            # Its buffer is full, so the selector will wake up anyway. Or
+            # the event loop is closed, and nothing waits
+            pass
+
+    def _drain_waker(self):
+        try:
+            while self._waker.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def cancel_all(self):
+        """Forgets the goroutines waiting. Used when they're all killed"""
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                self.selector.unregister(key.fileobj)
+        self._completed.clear()
+        self.waiting = 0
+
+    def close(self):
+        """Closes the sockets of the program, and stops the worker threads"""
+        self.cancel_all()
+        for sock in self.sockets.values():
+            sock.close()
+        self.sockets.clear()
+        self.scanners.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        self.selector.close()
+        self._waker.close()
+        self._waker_peer.close()
+
+    def add_socket(self, sock):
+        """
+        :param socket.socket sock:
+        :return: the file descriptor the program knows the socket by
+        :rtype: int
+        """
+        sock.setblocking(False)
+        self.sockets[sock.fileno()] = sock
+        return sock.fileno()
+
+    def get_socket(self, fd):
+        """
+        :param int fd:
+        :return: the socket, or None if the file descriptor isn't one of
+            the sockets of the program
+        """
+        return self.sockets.get(fd)
+
+    def close_socket(self, fd):
+        sock = self.sockets.pop(fd)
+        try:
+            self.selector.unregister(sock)
+        except KeyError:
+            pass
+        sock.close()
+
+    def recv(self, sock, size):
+        """Generator receiving up to `size` bytes from the socket
+
+        :rtype: bytes
+        """
+        while True:
+            try:
+                return sock.recv(size)
+            except (BlockingIOError, InterruptedError):
+                yield from self.wait(sock, EVENT_READ)
+
+    def sendall(self, sock, data):
+        """Generator sending all the data to the socket"""
+        data = memoryview(data)
+        while data:
+            try:
+                sent = sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                yield from self.wait(sock, EVENT_WRITE)
+            else:
+                data = data[sent:]
+
+    def accept(self, sock):
+        """Generator accepting a connection on the listening socket
+
+        :rtype: socket.socket
+        """
+        while True:
+            try:
+                connection, _ = sock.accept()
+                return connection
+            except (BlockingIOError, InterruptedError):
+                yield from self.wait(sock, EVENT_READ)
+
+    def connect(self, sock, address):
+        """Generator connecting the (non-blocking) socket to the address"""
+        error = sock.connect_ex(address)
+        if error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+            yield from self.wait(sock, EVENT_WRITE)
+            error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+        if error:
+            raise OSError(error, errno.errorcode.get(error, str(error)))
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        return (
+            f"event loop: {self.io_waits} io waits, "
+            f"{self.thread_calls} calls in worker threads"
+        )
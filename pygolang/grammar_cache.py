@@ -0,0 +1,276 @@
+"""On-disk cache for the lexer and parser tables generated by ply
+
+Building the LALR tables takes a lot longer than anything else the
+interpreter does at startup, so they are built once, and then loaded from
+a user cache directory. The cached files are keyed by a checksum of the
+grammar (the token rules, grammar rules and precedence), so changing the
+grammar creates new tables instead of using stale ones.
+
+When the tables are in the cache, they're loaded without ply validating the
+grammar, or building anything. When they're not, and the cache directory
+can't be written to, the tables are just built in memory.
+
+Either way, that only happens once per process: the lexers and parsers
+built after the first one share its tables, which ply never changes. This
+keeps the lexers and parsers of the many sessions of a `pygolang.server`
+small.
+"""
+import hashlib
+import importlib.util
+import os
+import pickle
+import sys
+import tempfile
+
+import ply
+import ply.lex as lex
+import ply.yacc as yacc
+
+# Bump this when the format of the cached files changes
+CACHE_VERSION = 1
+
+CACHE_DIR_ENV_VAR = 'PYGOLANG_CACHE_DIR'
+
+# The tables already loaded or built by this process, keyed by the path of
+# their cache file, or by their signature when there's no cache dir.
+# {key: lex.Lexer}
+_lexers = {}
+# {key: parser tables, as saved by `build_parser`}
+_parser_tables = {}
+
+
+def get_cache_dir():
+    """
+    :return: the directory to keep cached files in, or None if there's no
+        usable one. It's $PYGOLANG_CACHE_DIR, or pygolang/ inside the user's
+        cache directory.
+    :rtype: str|None
+    """
+    path = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not path:
+        base_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache')
+        path = os.path.join(base_dir, 'pygolang')
+
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return None
+    return path
+
+
+def grammar_signature(obj, prefix, *extra):
+    """Checksum of all the things ply generates its tables from
+
+    :param obj: the lexer or parser class/instance, read by ply
+    :param str prefix: 't_' for lexers, 'p_' for parsers
+    :param extra: anything else the tables depend on
+    :rtype: str
+    """
+    rules = []
+    for name in dir(obj):
+        if not name.startswith(prefix):
+            continue
+
+        value = getattr(obj, name)
+        if callable(value):
+            # ply orders the rules defined as functions by their line number
+            code = getattr(value, '__func__', value).__code__
+            rules.append((code.co_firstlineno, name, value.__doc__))
+        else:
+            rules.append((0, name, value))
+
+    signature = hashlib.sha256()
+    for part in (CACHE_VERSION, ply.__version__, obj.tokens) + extra:
+        signature.update(repr(part).encode())
+    for _, name, rule in sorted(rules):
+        signature.update(repr((name, rule)).encode())
+
+    return signature.hexdigest()[:32]
+
+
+class GrammarLogger(yacc.PlyLogger):
+    """ply's logger, without the warnings about unused rules and tokens
+
+    The parsers share one grammar, each with its own start symbol (see
+    `pygolang.parser_setup.PyGoProgramParser`), so the rules of the other
+    start symbols are always unused
+    """
+    UNUSED_WARNINGS = ('defined, but not used', 'unused', 'is unreachable')
+
+    def __init__(self, f=None):
+        super(GrammarLogger, self).__init__(f or sys.stderr)
+
+    def warning(self, msg, *args, **kwargs):
+        if any(unused in msg for unused in self.UNUSED_WARNINGS):
+            return
+        super(GrammarLogger, self).warning(msg, *args, **kwargs)
+
+
+def write_atomically(path, write):
+    """Writes a file so that readers never see it half written
+
+    :param str path:
+    :param write: callable receiving the opened (binary) file
+    :return: whether the file was written
+    """
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            write(tmp_file)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return False
+
+
+def build_lexer(lexer_obj):
+    """Builds the ply lexer, using the cached tables when available
+
+    Also sets the lexer as ply's current lexer, like `lex.lex` does
+
+    :param lexer_obj: object with the token rules, like PyGoLexer
+    :rtype: lex.Lexer
+    """
+    signature = grammar_signature(lexer_obj, 't_')
+    cache_dir = get_cache_dir()
+    module_name = f'lextab_{signature}'
+    key = signature if cache_dir is None else os.path.join(
+        cache_dir, module_name + '.py')
+
+    lexer = _lexers.get(key)
+    if lexer is None:
+        lexer = _lexers[key] = _load_lexer(lexer_obj, cache_dir, module_name)
+
+    # Clones share the compiled regular expressions, only the methods of
+    # the rules are bound to the new object
+    lexer = lexer.clone(lexer_obj)
+    lex.lexer, lex.input, lex.token = lexer, lexer.input, lexer.token
+    return lexer
+
+
+def _load_lexer(lexer_obj, cache_dir, module_name):
+    if cache_dir is None:
+        return lex.lex(module=lexer_obj)
+
+    path = os.path.join(cache_dir, module_name + '.py')
+
+    if os.path.exists(path):
+        try:
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            lextab = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(lextab)
+
+            # In optimized mode, ply reads the tables instead of validating
+            # and compiling the rules
+            return lex.lex(module=lexer_obj, optimize=True, lextab=lextab)
+        except Exception:
+            # A broken cache file is no reason not to start, rebuild it
+            pass
+
+    lexer = lex.lex(module=lexer_obj)
+
+    # ply writes the file itself, so write it under a temporary name first
+    tmp_name = f'_tmp_{module_name}_{os.getpid()}'
+    tmp_path = os.path.join(cache_dir, tmp_name + '.py')
+    try:
+        lexer.writetab(tmp_name, cache_dir)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    return lexer
+
+
+def build_parser(parser_obj, start):
+    """Builds the ply parser, using the cached tables when available
+
+    :param parser_obj: object with the grammar rules, like PyGoParser
+    :param str start: the start symbol of the grammar
+    :rtype: yacc.LRParser
+    """
+    signature = grammar_signature(
+        parser_obj, 'p_', start, parser_obj.precedence)
+    cache_dir = get_cache_dir()
+    key = signature if cache_dir is None else os.path.join(
+        cache_dir, f'parsetab_{signature}.pickle')
+
+    tables = _parser_tables.get(key)
+    if tables is not None:
+        return load_parser(parser_obj, tables)
+
+    if cache_dir is not None:
+        try:
+            with open(key, 'rb') as tab_file:
+                tables = pickle.load(tab_file)
+            parser = load_parser(parser_obj, tables)
+            _parser_tables[key] = tables
+            return parser
+        except Exception:
+            # Not cached yet. Or a broken cache file, which is no reason not
+            # to start: rebuild it
+            pass
+
+    parser = yacc.yacc(
+        module=parser_obj, start=start, debug=False, write_tables=False,
+        errorlog=GrammarLogger())
+
+    tables = _parser_tables[key] = {
+        'action': parser.action,
+        'goto': parser.goto,
+        'productions': [
+            (str(p), p.name, p.len, p.func) for p in parser.productions
+        ],
+    }
+    if cache_dir is not None:
+        write_atomically(
+            key,
+            lambda tab_file: pickle.dump(tables, tab_file, pickle.HIGHEST_PROTOCOL))
+    return parser
+
+
+def load_parser(parser_obj, tables):
+    """Creates a ply parser from tables generated previously
+
+    :param parser_obj: object with the grammar rules, like PyGoParser
+    :param dict tables: the tables, as saved by `build_parser`
+    :rtype: yacc.LRParser
+    """
+    lr_table = yacc.LRTable()
+    lr_table.lr_method = 'LALR'
+    lr_table.lr_action = tables['action']
+    lr_table.lr_goto = tables['goto']
+    lr_table.lr_productions = [
+        BoundProduction(
+            str_, name, len_, getattr(parser_obj, func) if func else None)
+        for str_, name, len_, func in tables['productions']
+    ]
+    return yacc.LRParser(lr_table, parser_obj.p_error)
+
+
+class BoundProduction:
+    """What ply's parser uses of a production, bound to a parser object
+
+    Every parser needs its own, so they're smaller than ply's
+    `MiniProduction`s.
+    """
+    __slots__ = ('str', 'name', 'len', 'callable')
+
+    def __init__(self, str_, name, len_, callable_):
+        self.str = str_
+        self.name = name
+        self.len = len_
+        self.callable = callable_
+
+    def __str__(self):
+        return self.str
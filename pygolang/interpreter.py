@@ -4,14 +4,33 @@
 # and don't change their order
 # from ply import yacc, lex
 
-from pygolang import parser_setup, ast_runner
+from pygolang import ast, parser_setup, ast_runner, multifile
+from pygolang.optimizer import Optimizer
 from pygolang.errors import PyLangRuntimeError, StopPyGoLangInterpreterError, \
-    PyGoConsoleLogoffError
-from pygolang.io_callback import IO
+    PyGoConsoleLogoffError, PyGoGrammarError
+from pygolang.io_callback import IO, BufferIO, BufferedIO
 from . import lexer_setup
 
 
-def main(io=IO(), program_state=None):
+def main(io=IO(), program_state=None, engine=None, program_cache=None,
+         optimizer=None, memoizer=None, scheduler=None):
+    """Starts the interactive interpreter
+
+    :param pygolang.io_callback.IO io:
+    :param dict|None program_state: the module scope. Gets filled with the
+        names declared by the program
+    :param str|None engine: which execution engine to run the code with.
+        See `pygolang.ast_runner.ENGINES`
+    :param pygolang.program_cache.ProgramCache|None program_cache: used
+        for reusing previously parsed code, instead of parsing it again
+    :param pygolang.optimizer.Optimizer|None optimizer: optimizes the code
+        before it runs. Defaults to the default optimization level
+    :param pygolang.memoization.Memoizer|None memoizer: caches the results
+        of pure functions. No caching when None
+    :param pygolang.scheduler.Scheduler|None scheduler: runs the goroutines
+        of the stackless engine. The goroutines started on a line keep
+        running on the next ones
+    """
 
     # Weird code, I know. The parser relies on reflection for finding
     # handler function names. It loads stuff from the global variables.
@@ -19,12 +38,15 @@ def main(io=IO(), program_state=None):
     # and parser are initialized.
 
     program_state = program_state if program_state is not None else {}
+    optimizer = optimizer or Optimizer()
 
     # with lexer_setup.build_lexer(io) as lexer:
     # pygo_lexer = lexer_setup.PyGoLexer(io)
     lexer = lexer_setup.PyGoLexer(io)
     parser = parser_setup.PyGoParser(io, program_state)
-    runner = ast_runner.Runner(io, program_state)
+    runner = ast_runner.Runner(
+        io, program_state, engine=engine, memoizer=memoizer,
+        scheduler=scheduler)
 
     # try:
     #     import pydevd; pydevd.settrace('localhost', port=5678)
@@ -33,46 +55,222 @@ def main(io=IO(), program_state=None):
     #     print(">>>VWH>>>: the pydevd module is not installed")
     #     print("\n\n\n\n\n")
 
-    while True:
-        try:
-            io.interpreter_prompt()
-            instruction_set = io.from_stdin()
+    try:
+        while True:
+            try:
+                io.interpreter_prompt()
+                instruction_set = io.from_stdin()
 
-            code = parser.parse(instruction_set)
-            runner.run(code)
+                if program_cache is not None:
+                    code = program_cache.parse(parser, instruction_set)
+                else:
+                    code = parser.parse(instruction_set)
+                runner.run(optimizer.optimize(code))
 
-            io.newline()
-            # io.to_stdout("You wrote:\n{}".format(instruction_set))
+                io.newline()
+                # io.to_stdout("You wrote:\n{}".format(instruction_set))
 
-        except StopPyGoLangInterpreterError:
-            break
+            except StopPyGoLangInterpreterError:
+                break
 
-        except PyLangRuntimeError as err:
-            io.to_stdout("Error: {}".format(err))
+            except PyLangRuntimeError as err:
+                io.to_stdout("Error: {}".format(err))
 
-        except KeyboardInterrupt:
-            try:
-                io.newline()
-                io.to_stdout("Do you really want to quit? [y/n] ")
-                reply = io.from_stdin()
+            except KeyboardInterrupt:
+                try:
+                    io.newline()
+                    io.to_stdout("Do you really want to quit? [y/n] ")
+                    reply = io.from_stdin()
 
-                if (reply.strip() or '').lower() == 'y':
+                    if (reply.strip() or '').lower() == 'y':
+                        return
+                except KeyboardInterrupt:
                     return
-            except KeyboardInterrupt:
+
+            except PyGoConsoleLogoffError:
                 return
 
-        except PyGoConsoleLogoffError:
-            return
+            except Exception as err:
+                import traceback as tb
+
+                io.to_stderr(
+                    "Unknown error occurred. Traceback for debugging:"
+                )
+                io.to_stderr(tb.format_exc())
+                io.to_stderr(err)
+    finally:
+        # What was printed last is still buffered, with a `BufferedIO`
+        io.flush()
+
+
+def run_source(source, io=None, program_state=None, engine=None,
+               program_cache=None, optimizer=None, memoizer=None,
+               scheduler=None):
+    """Runs a whole program, given as a string
+
+    Unlike in the interactive interpreter, all the source is parsed and type
+    checked before anything runs. The statements then run one after the
+    other, printing the values of the expression statements, like the
+    interpreter does.
+
+    :param str source:
+    :param pygolang.io_callback.IO|None io:
+    :param dict|None program_state: the module scope. Gets filled with the
+        names declared by the program
+    :param str|None engine: see `pygolang.ast_runner.ENGINES`
+    :param pygolang.program_cache.ProgramCache|None program_cache: used
+        for reusing the previously parsed program
+    :param pygolang.optimizer.Optimizer|None optimizer: optimizes the code
+        before it runs. Defaults to the default optimization level
+    :param pygolang.memoization.Memoizer|None memoizer: caches the results
+        of pure functions. No caching when None
+    :param pygolang.scheduler.Scheduler|None scheduler: runs the goroutines
+        of the stackless engine. Closed by the caller, when given: the
+        sockets the program opened stay open until then
+    :return: the module scope
+    :rtype: dict
+    :raises PyGoGrammarError: when the program can't be parsed
+    :raises PyLangRuntimeError: when the program fails while running
+    """
+    io = io or IO()
+    program_state = program_state if program_state is not None else {}
+    optimizer = optimizer or Optimizer()
+
+    lexer = lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoProgramParser(io, program_state)
+    runner = ast_runner.Runner(
+        io, program_state, engine=engine, memoizer=memoizer,
+        scheduler=scheduler)
+
+    if program_cache is not None:
+        code = program_cache.parse(parser, source)
+    else:
+        code = parser.parse(source, lexer=lexer.lexer)
+
+    try:
+        runner.run(optimizer.optimize(code))
+    finally:
+        io.flush()
+        if scheduler is None:
+            runner.scheduler.shutdown()
+    return program_state
+
+
+def run_file(path, io=None, program_state=None, engine=None,
+             program_cache=None, optimizer=None, memoizer=None,
+             scheduler=None):
+    """Runs a source file. See `run_source`
 
-        except Exception as err:
-            import traceback as tb
+    :param str path:
+    """
+    # ply needs the whole source in memory anyway, so read it in one go,
+    # instead of line by line
+    with open(path, encoding='utf-8') as source_file:
+        source = source_file.read()
 
-            io.to_stderr(
-                "Unknown error occurred. Traceback for debugging:"
-            )
-            io.to_stderr(tb.format_exc())
-            io.to_stderr(err)
+    return run_source(
+        source, io=io, program_state=program_state, engine=engine,
+        program_cache=program_cache, optimizer=optimizer, memoizer=memoizer,
+        scheduler=scheduler)
+
+
+def run_files(paths, io=None, program_state=None, engine=None,
+              optimizer=None, memoizer=None, scheduler=None, max_workers=None):
+    """Runs a program made of many source files. See `run_source`
+
+    The files are parsed in parallel, see `pygolang.multifile`. They're
+    not cached.
+
+    :param list[str] paths:
+    :param int|None max_workers: the number of processes parsing the
+        files. Defaults to the number of cores
+    """
+    io = io or IO()
+    program_state = program_state if program_state is not None else {}
+    optimizer = optimizer or Optimizer()
+
+    code = multifile.parse_files(paths, io=io, max_workers=max_workers)
+    runner = ast_runner.Runner(
+        io, program_state, engine=engine, memoizer=memoizer,
+        scheduler=scheduler)
+
+    try:
+        runner.run(optimizer.optimize(code))
+    finally:
+        io.flush()
+        if scheduler is None:
+            runner.scheduler.shutdown()
+    return program_state
+
+
+class ProgramResult:
+    """What running a program with `run_program` gave"""
+    __slots__ = ('stdout', 'stderr', 'error', 'names')
+
+    def __init__(self, stdout='', stderr='', error=None, names=None):
+        """
+        :param str stdout:
+        :param str stderr:
+        :param str|None error: why the program failed, None if it didn't
+        :param dict names: {name: pygo repr of the value}, for the values of
+            the module level names the program declared. Functions and
+            channels left out
+        """
+        self.stdout = stdout
+        self.stderr = stderr
+        self.error = error
+        self.names = names if names is not None else {}
+
+    def __getstate__(self):
+        return self.stdout, self.stderr, self.error, self.names
+
+    def __setstate__(self, state):
+        self.stdout, self.stderr, self.error, self.names = state
+
+    def __repr__(self):
+        return (
+            f"ProgramResult(stdout={self.stdout!r}, error={self.error!r}, "
+            f"names={self.names!r})"
+        )
+
+
+def run_program(source, engine=None, optimizer=None):
+    """Runs a program with a fresh module scope, keeping what it printed,
+    instead of raising what it failed with
+
+    Used for running programs unattended, in worker processes (see
+    `pygolang.prefork` and `pygolang.batch`)
+
+    :rtype: ProgramResult
+    """
+    io = BufferIO()
+    state = {}
+    error = None
+    try:
+        run_source(
+            source, io=io, program_state=state, engine=engine,
+            optimizer=optimizer)
+    except (PyGoGrammarError, PyLangRuntimeError) as err:
+        error = str(err)
+    except Exception as err:
+        # Like a deep recursion. The traceback is the interpreter's business
+        error = f"{type(err).__name__}: {err}"
+
+    names = {
+        name: value.to_pygo_repr()
+        for name, (value, _) in state.items()
+        if isinstance(value, (ast.Int, ast.String, ast.BoolValue))
+    }
+    return ProgramResult(''.join(io.stdout), ''.join(io.stderr), error, names)
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(prog='python -m pygolang.interpreter')
+    arg_parser.add_argument(
+        '--engine', choices=ast_runner.ENGINES,
+        default=ast_runner.DEFAULT_ENGINE,
+        help="the engine used to run the code"
+    )
+    main(io=BufferedIO(), engine=arg_parser.parse_args().engine)
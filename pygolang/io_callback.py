@@ -1,5 +1,7 @@
 import sys
 
+from pygolang.errors import StopPyGoLangInterpreterError
+
 
 class IO:
     def __init__(self, stdout=None, stderr=None, stdin=None):
@@ -24,4 +26,86 @@ class IO:
         self.to_stdout("pygo> ")
 
     def newline(self):
-        self.to_stdout('\n')
\ No newline at end of file
+        self.to_stdout('\n')
+
+    def flush(self):
+        """Writes out what was buffered. Nothing is, everything is written
+        right away
+        """
+
+
+class BufferedIO(IO):
+    """Writes to stdout through a buffer, instead of flushing every write
+
+    Stdout is flushed when the buffer is full, and when stderr is written
+    to, so the two stay in order. In interactive mode, it's also flushed
+    after every line, and before reading stdin, so the prompt shows.
+
+    Whoever runs the program must call `flush` when it ends, whether it
+    failed or not.
+    """
+    DEFAULT_BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, stdout=None, stderr=None, stdin=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE, interactive=None):
+        """
+        :param int buffer_size: the number of characters buffered before
+            stdout is flushed
+        :param bool|None interactive: flush after every line. Defaults to
+            whether stdout is a terminal
+        """
+        super(BufferedIO, self).__init__(stdout, stderr, stdin)
+        self.buffer_size = buffer_size
+        if interactive is None:
+            isatty = getattr(self.stdout, 'isatty', None)
+            interactive = bool(isatty and isatty())
+        self.interactive = interactive
+
+        self._buffer = []
+        self._buffered = 0
+        # How many times the buffer was written out
+        self.flushes = 0
+
+    def to_stdout(self, stuff):
+        text = stuff if type(stuff) is str else str(stuff)
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size or (
+                self.interactive and '\n' in text):
+            self.flush()
+
+    def to_stderr(self, stuff):
+        self.flush()
+        super(BufferedIO, self).to_stderr(stuff)
+
+    def from_stdin(self):
+        if self.interactive:
+            self.flush()
+        return super(BufferedIO, self).from_stdin()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self.stdout.write(''.join(self._buffer))
+        self.stdout.flush()
+        self._buffer = []
+        self._buffered = 0
+        self.flushes += 1
+
+
+class BufferIO(IO):
+    """Keeps what the program prints, for running programs unattended"""
+
+    def __init__(self):
+        self.stdout = []
+        self.stderr = []
+
+    def to_stdout(self, stuff):
+        self.stdout.append(str(stuff))
+
+    def to_stderr(self, stuff):
+        self.stderr.append(str(stuff))
+
+    def from_stdin(self):
+        # There's nothing to read
+        raise StopPyGoLangInterpreterError
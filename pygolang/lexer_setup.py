@@ -1,5 +1,7 @@
 import ply.lex as lex
 
+from pygolang import grammar_cache
+
 # Tokens
 from .common_grammar import tokens, keywords_tuple
 
@@ -24,6 +26,12 @@ class PyGoLexer:
     t_LBRACKET = r'\['
     t_RBRACKET = r'\]'
     t_COMMA = r','
+    t_COLON = r':'
+    t_SEMICOLON = r';'
+    t_PLUSEQUALS = r'\+='
+    t_MINUSEQUALS = r'-='
+    t_INCREMENT = r'\+\+'
+    t_DECREMENT = r'--'
 
     # Boolean operators
     t_GREATER = '>'
@@ -34,13 +42,13 @@ class PyGoLexer:
     t_BOOLNOTEQUALS = '!='
 
     t_BOOLAND = '&&'
-    t_BOOLOR = '\|\|'
+    t_BOOLOR = r'\|\|'
     t_NOT = '!'
 
     # Ignored characters
     t_ignore = " \t"
 
-    def __init__(self, io_callback, type_scope_stack=None):
+    def __init__(self, io_callback, type_scope_stack=None, optimize=True):
         """
 
         :param pygolang.io_callback.IO io_callback: Need this parameter
@@ -52,8 +60,11 @@ class PyGoLexer:
                 interfaces, where we don't really mark new scopes....
                 ..Ok, so I'll define some special parser rules for this
         :param pygolang.ast.TypeScopeStack type_scope_stack:
+        :param bool optimize: load the lexer tables from the cache, instead
+            of building them from the rules. See `pygolang.grammar_cache`
         """
         self.io_callback = io_callback
+        self.optimize = optimize
         self.lexer = self.build_lexer()
         # self.type_scope_stack = type_scope_stack
 
@@ -66,6 +77,14 @@ class PyGoLexer:
         r""":="""
         return t
 
+    def t_ARROW(self, t):
+        r"""<-"""
+        # Like go, which ends the line before with a semicolon
+        line_start = t.lexer.lexdata.rfind('\n', 0, t.lexpos) + 1
+        if not t.lexer.lexdata[line_start:t.lexpos].strip():
+            t.type = 'RECEIVE_ARROW'
+        return t
+
     def t_NAME(self, t):
         r"""[a-zA-Z_][a-zA-Z0-9_]*"""
         if t.value.upper() in keywords_tuple:
@@ -91,4 +110,6 @@ class PyGoLexer:
         t.lexer.skip(1)
 
     def build_lexer(self):
+        if self.optimize:
+            return grammar_cache.build_lexer(self)
         return lex.lex(module=self)
@@ -0,0 +1,186 @@
+"""Caching the results of pure functions
+
+A function is pure when its result only depends on its arguments, and
+calling it doesn't change anything. Calling it again with the same
+arguments can then just return the result of the previous call.
+
+Memoization is opt-in: pass a `Memoizer` to the runner. It caches the
+results of the functions it can prove are pure, in a bounded LRU cache.
+"""
+import threading
+from collections import OrderedDict
+
+from pygolang import ast
+
+DEFAULT_MAXSIZE = 4096
+
+# Returned by `LRUCache.get` for keys which are not in the cache
+MISSING = ast.ReprHelper('Missing')
+
+# The nodes pure functions can be made of. Anything else (new kinds of
+# statements included) makes a function impure, until proven otherwise
+_PURE_NODES = (
+    ast.Statement, ast.Expression, ast.Return, ast.Block, ast.FuncBody,
+    ast.Conditional, ast.Operator, ast.Value, ast.FuncArguments,
+    ast.For, ast.ForRange, ast.Break, ast.Continue,
+)
+
+
+class LRUCache:
+    """A dict holding at most `maxsize` items
+
+    When full, adding an item drops the least recently used one. It can be
+    shared by threads, like the sessions of a `pygolang.server`
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        :return: the value of the key, or `MISSING`
+        """
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return MISSING
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Memoizer:
+    """Decides which functions are pure, and caches their results
+
+    Functions are looked up by name when they're called, and can be
+    redefined in the interpreter, so all the results and the purity of all
+    functions are forgotten whenever a function is defined.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param int maxsize: the most results kept, for all functions
+        """
+        self.cache = LRUCache(maxsize)
+
+        # {ast.FuncCreation: whether it's pure}
+        self._purity = {}
+
+    def invalidate(self):
+        """Called when functions are defined"""
+        self.cache.clear()
+        self._purity.clear()
+
+    def is_pure(self, func, globals_):
+        """
+        :param ast.FuncCreation func:
+        :param dict globals_: the module scope {name: [value, type]}, where
+            the functions called by `func` are
+        :rtype: bool
+        """
+        try:
+            return self._purity[func]
+        except KeyError:
+            pass
+
+        # {ast.FuncCreation: whether it's pure}, for the functions analyzed
+        # now, including the ones `func` calls
+        results = {}
+        pure = self._is_pure_func(func, globals_, results)
+
+        # Functions are assumed to be pure while they're analyzed, so
+        # (mutually) recursive functions can be pure as well. So unless
+        # `func` is pure, the functions found pure might have been found so
+        # only because of a wrong assumption. The impure ones are impure
+        for analyzed_func, analyzed_pure in results.items():
+            if pure or not analyzed_pure:
+                self._purity[analyzed_func] = analyzed_pure
+        return pure
+
+    def _is_pure_func(self, func, globals_, results):
+        if func in self._purity:
+            return self._purity[func]
+        if func in results:
+            return results[func]
+
+        results[func] = True
+        results[func] = self._is_pure_node(func.body, globals_, results)
+        return results[func]
+
+    def _is_pure_node(self, node, globals_, results):
+        if node is None or node is ast.ValueNotSet:
+            return True
+
+        if isinstance(node, list):
+            return all(self._is_pure_node(elem, globals_, results) for elem in node)
+
+        if isinstance(node, ast.Name):
+            # Module level names can change between calls
+            return node.slot is not None
+
+        if isinstance(node, (ast.Declaration, ast.Assignment)):
+            return node.slot is not None and \
+                self._is_pure_node(node.value, globals_, results)
+
+        if isinstance(node, ast.FuncCall):
+            try:
+                callee = globals_[node.func_name][0]
+            except KeyError:
+                return False
+            if not isinstance(callee, ast.FuncCreation) or \
+                    not self._is_pure_func(callee, globals_, results):
+                return False
+
+        elif isinstance(node, ast.FuncCreation) or not isinstance(node, _PURE_NODES):
+            return False
+
+        elif ast.uses_slice_elements(node):
+            return False
+
+        return all(
+            self._is_pure_node(child, globals_, results)
+            for child in ast.iter_child_nodes(node)
+        )
+
+    @staticmethod
+    def get_key(func, arguments):
+        """
+        :param ast.FuncCreation func:
+        :param list arguments: the values the function is called with
+        """
+        # Parameters have static types, so the python values are enough
+        return (func,) + tuple(argument.value for argument in arguments)
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        return (
+            f"memoization: {self.cache.hits} hits, {self.cache.misses} misses, "
+            f"{self.cache.evictions} evictions"
+        )
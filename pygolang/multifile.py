@@ -0,0 +1,271 @@
+"""Parses programs made of many source files, on all the cores
+
+Like go packages, the files of a program share their top level
+declarations: a function declared in one file can be called from any
+other. Every file is parsed on its own, in a worker process, in 2 passes:
+
+1. The file is only lexed, and its top level declarations are picked out
+   of the tokens: the signatures of the functions, and the names declared
+   with `var` and a type. These are all the types the other files need,
+   and they're known without parsing anything.
+2. The tables of all the files are merged, and every file is parsed with
+   a type scope stack of its own, whose root scope starts with the merged
+   table. So the calls to the functions of the other files get type checked
+   as if they had been declared in the file itself.
+
+The parsed files are pickled back to this process, like any other result
+of a worker (the nodes of the ast pickle cheaply, with no custom pickler),
+and get joined into a single program. Functions are declared before
+anything else runs, so every file can call them. The other statements run
+file after file, in the order the files were given in: a file can use the
+variables declared by the files before it.
+
+Declaring the same top level name in 2 files is an error.
+
+Usage:
+    python -m pygolang run main.go util.go math.go
+"""
+import concurrent.futures
+import os
+import re
+
+from pygolang import ast, lexer_setup, parser_setup
+from pygolang.errors import PyGoGrammarError
+from pygolang.io_callback import BufferIO
+
+DEFAULT_CHUNKSIZE = 4
+
+# Strings, so the braces in them aren't counted, braces, and the headers of
+# the declarations: a function's up to its body, a variable's up to its
+# value or the end of the line
+_SCAN_RE = re.compile(
+    r'"(?:[^"\\]|\\.)*"|[{}]|\bfunc\b[^{}]*|\bvar\b[^\n={}]*')
+
+
+class _WorkerState:
+    io = None
+    lexer = None
+    parser = None
+
+
+def _init_worker():
+    _WorkerState.io = BufferIO()
+    _WorkerState.lexer = lexer_setup.PyGoLexer(_WorkerState.io)
+    _WorkerState.parser = parser_setup.PyGoProgramParser(_WorkerState.io, {})
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as source_file:
+            return source_file.read()
+    except OSError as err:
+        raise PyGoGrammarError(f"Can't read {path}: {err.strerror}") from None
+
+
+def _scan_type(tokens, index):
+    """
+    :param list[ply.lex.LexToken] tokens:
+    :param int index: where the type starts
+    :return: (the type, the index after it), or (None, index) when there's
+        no type there
+    """
+    if index < len(tokens) and tokens[index].type == 'CHAN':
+        elem_type, end = _scan_type(tokens, index + 1)
+        return (ast.ChanType(elem_type), end) if elem_type else (None, index)
+    if [token.type for token in tokens[index:index + 2]] == ['LBRACKET', 'RBRACKET']:
+        if index + 2 < len(tokens) and tokens[index + 2].value == 'byte':
+            return ast.BytesType, index + 3
+        elem_type, end = _scan_type(tokens, index + 2)
+        return (ast.SliceType(elem_type), end) if elem_type else (None, index)
+    if index < len(tokens) and tokens[index].type in parser_setup.TYPE_MAP:
+        return parser_setup.TYPE_MAP[tokens[index].type], index + 1
+    return None, index
+
+
+def _scan_signature(tokens, index):
+    """
+    :param list[ply.lex.LexToken] tokens:
+    :param int index: where the parameters start, after the LPAREN
+    :return: the type of the function, or None if it's not well formed,
+        which the parser reports later on
+    :rtype: ast.Type|None
+    """
+    param_types = []
+    untyped_names = 0
+    while index < len(tokens) and tokens[index].type != 'RPAREN':
+        param_type, end = _scan_type(tokens, index)
+        if param_type is not None:
+            # `x, y int` gives the type to all the names before it
+            param_types.extend([param_type] * untyped_names)
+            untyped_names = 0
+            index = end
+            continue
+        if tokens[index].type == 'NAME':
+            untyped_names += 1
+        index += 1
+
+    return_type, _ = _scan_type(tokens, index + 1)
+    if return_type is None:
+        return None
+    return ast.FuncCreation.make_func_type(param_types, [return_type])
+
+
+def scan_declarations(source, lexer):
+    """Finds the names a file declares at the top level, without parsing it
+
+    Only the headers of the declarations get lexed. The rest of the source
+    is skipped with a regular expression, which only counts the braces.
+
+    :param str source:
+    :param lexer: the ply lexer to use
+    :return: {name: type} for the functions, and the names declared with
+        `var` and a type
+    :rtype: dict
+    """
+    declarations = {}
+    depth = 0
+    for match in _SCAN_RE.finditer(source):
+        header = match.group()
+        if header == '{':
+            depth += 1
+            continue
+        if header == '}':
+            depth -= 1
+            continue
+        if depth or header[0] == '"':
+            continue
+
+        lexer.input(header)
+        tokens = list(lexer)
+        if len(tokens) < 3 or tokens[1].type != 'NAME':
+            continue
+        if tokens[0].type == 'FUNC' and tokens[2].type == 'LPAREN':
+            declared_type = _scan_signature(tokens, 3)
+        else:
+            declared_type, _ = _scan_type(tokens, 2)
+        if declared_type is not None:
+            declarations[tokens[1].value] = declared_type
+    return declarations
+
+
+def _scan_file(path, source):
+    """Runs in the worker processes: pass 1
+
+    :return: {name: type}, see `scan_declarations`
+    """
+    if source is None:
+        source = _read(path)
+    return scan_declarations(source, _WorkerState.lexer.lexer)
+
+
+def _parse_file(path, source, declarations):
+    """Runs in the worker processes: pass 2
+
+    :param dict declarations: the merged top level declarations of all the
+        files
+    :return: (the parsed file, what the lexer printed)
+    :rtype: (ast.Root, list[str])
+    """
+    if source is None:
+        source = _read(path)
+
+    # Nothing is left over from the previous file
+    parser = _WorkerState.parser
+    parser.type_scope_stack = ast.TypeScopeStack()
+    parser.type_scope_stack.get_root_scope().scope.update(declarations)
+    del _WorkerState.io.stdout[:]
+
+    try:
+        root = parser.parse(source, lexer=_WorkerState.lexer.lexer)
+    except PyGoGrammarError as err:
+        raise PyGoGrammarError(f"{path}: {err}") from None
+    return root, list(_WorkerState.io.stdout)
+
+
+def merge_declarations(tables):
+    """
+    :param list[(str, dict)] tables: (path, {name: type}) for every file
+    :return: {name: type}
+    :rtype: dict
+    :raises PyGoGrammarError: when 2 files declare the same name
+    """
+    declarations = {}
+    declared_in = {}
+    for path, table in tables:
+        for name, type_ in table.items():
+            if name in declared_in:
+                raise PyGoGrammarError(
+                    f"{name} is declared in both {declared_in[name]} and {path}")
+            declarations[name] = type_
+            declared_in[name] = path
+    return declarations
+
+
+def join_programs(roots):
+    """Joins the parsed files into a single program
+
+    :param list[ast.Root] roots: the parsed files, in order
+    :rtype: ast.Root
+    """
+    functions = []
+    statements = []
+    for root in roots:
+        for statement in root.value.statements:
+            if isinstance(ast.unwrap_statement(statement.value), ast.FuncCreation):
+                functions.append(statement)
+            else:
+                statements.append(statement)
+
+    # Module level blocks of different files never run at the same time, so
+    # they can share the slots of the module's frame
+    return ast.Root(
+        ast.Program(functions + statements),
+        frame_size=max((root.frame_size for root in roots), default=0)
+    )
+
+
+def parse_files(paths, sources=None, io=None, max_workers=None,
+                chunksize=DEFAULT_CHUNKSIZE):
+    """Parses the files of a program
+
+    :param list[str] paths: the files. Also used in the error messages
+    :param list[str]|None sources: the contents of the files, if they were
+        already read. The workers read them otherwise
+    :param pygolang.io_callback.IO|None io: gets what the lexer printed
+    :param int|None max_workers: the number of worker processes. Defaults
+        to the number of cores. With 1, the files are parsed in this
+        process, one after the other
+    :param int chunksize: how many files a worker gets at a time
+    :return: the whole program
+    :rtype: ast.Root
+    :raises PyGoGrammarError: when a file can't be read or parsed
+    """
+    sources = sources if sources is not None else [None] * len(paths)
+    max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+
+    if max_workers <= 1:
+        _init_worker()
+        scan, parse = map, map
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers, initializer=_init_worker)
+        scan = parse = lambda func, *iterables: executor.map(
+            func, *iterables, chunksize=chunksize)
+
+    try:
+        tables = list(scan(_scan_file, paths, sources))
+        declarations = merge_declarations(zip(paths, tables))
+        parsed = list(parse(
+            _parse_file, paths, sources, [declarations] * len(paths)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    roots = []
+    for root, printed in parsed:
+        if io is not None:
+            for line in printed:
+                io.to_stdout(line)
+        roots.append(root)
+    return join_programs(roots)
@@ -0,0 +1,333 @@
+"""Optimization passes, run on the ast between parsing and running it
+
+The parser produces a lot of nodes which do nothing at run-time: the
+`Statement` and `Expression` wrappers, operators applied on literals,
+`if false {...}` branches. The passes here rewrite the ast without them.
+
+Optimization levels:
+    0: no optimizations
+    1: collapsing wrappers, folding constants
+    2: everything in 1, plus removing unreachable code
+    3: everything in 2, plus running element-wise loops over slices as
+       NumPy operations (when NumPy is installed)
+"""
+from pygolang import ast, vectorize
+
+LEVELS = (0, 1, 2, 3)
+DEFAULT_LEVEL = 1
+
+
+def iter_all_child_nodes(node):
+    """Yields the direct children of an ast node
+
+    Unlike `ast.iter_child_nodes`, this includes the bodies of functions
+    """
+    if isinstance(node, ast.FuncCreation):
+        yield node.body
+    else:
+        yield from ast.iter_child_nodes(node)
+
+
+def count_nodes(node):
+    """
+    :return: the number of nodes in the tree, function bodies included
+    :rtype: int
+    """
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None or isinstance(node, list):
+            stack.extend(node or ())
+            continue
+
+        count += 1
+        stack.extend(iter_all_child_nodes(node))
+    return count
+
+
+class OptimizationPass:
+    """Rewrites the ast, node by node, bottom up
+
+    For each node, the `visit_<class name>` method is called, if the pass
+    has one, after the node's children have been visited. It returns the
+    node to use in place of the visited one.
+    """
+
+    # Shown in the optimizer's report
+    name = None
+
+    def run(self, node):
+        """
+        :param node: the root of the tree to optimize
+        :return: the optimized tree. Nodes are changed in place, so this
+            is only a different node if the root itself got replaced
+        """
+        return self.visit(node)
+
+    def visit(self, node):
+        self.visit_children(node)
+
+        visit_method = getattr(self, f'visit_{type(node).__name__}', None)
+        if visit_method is None:
+            return node
+        return visit_method(node)
+
+    def visit_list(self, nodes):
+        return [self.visit(node) for node in nodes]
+
+    def visit_children(self, node):
+        if isinstance(node, (ast.Root, ast.InterpreterStart, ast.Statement, ast.Return)):
+            node.value = self.visit(node.value)
+
+        elif isinstance(node, ast.Expression):
+            node.child = self.visit(node.child)
+
+        elif isinstance(node, (ast.Block, ast.FuncBody, ast.Program)):
+            node.statements = self.visit_list(node.statements)
+
+        elif isinstance(node, ast.Conditional):
+            node.expression_block_pairs = [
+                (self.visit(expression), self.visit(block))
+                for expression, block in node.expression_block_pairs
+            ]
+            if node.final_block:
+                node.final_block = self.visit(node.final_block)
+
+        elif isinstance(node, (ast.Declaration, ast.Assignment)):
+            if node.value is not ast.ValueNotSet:
+                node.value = self.visit(node.value)
+
+        elif isinstance(node, ast.For):
+            if node.init is not None:
+                node.init = self.visit(node.init)
+            if node.condition is not None:
+                node.condition = self.visit(node.condition)
+            if node.post is not None:
+                node.post = self.visit(node.post)
+            node.body = self.visit(node.body)
+
+        elif isinstance(node, ast.ForRange):
+            node.limit = self.visit(node.limit)
+            node.body = self.visit(node.body)
+
+        elif isinstance(node, ast.VectorizedLoop):
+            node.loop = self.visit(node.loop)
+
+        elif isinstance(node, ast.Operator):
+            node.args_list = self.visit_list(node.args_list)
+
+        elif isinstance(node, (ast.FuncCall, ast.BuiltinCall)):
+            node.arguments = self.visit_list(node.arguments)
+
+        elif isinstance(node, ast.FuncArguments):
+            node.arg_list = self.visit_list(node.arg_list)
+
+        elif isinstance(node, ast.FuncCreation):
+            node.body = self.visit(node.body)
+
+        elif isinstance(node, ast.MakeChannel):
+            if node.capacity is not None:
+                node.capacity = self.visit(node.capacity)
+
+        elif isinstance(node, (ast.Receive, ast.Close)):
+            node.channel = self.visit(node.channel)
+
+        elif isinstance(node, ast.Send):
+            node.channel = self.visit(node.channel)
+            node.value = self.visit(node.value)
+
+        elif isinstance(node, ast.Go):
+            node.call = self.visit(node.call)
+
+        elif isinstance(node, ast.Select):
+            node.cases = self.visit_list(node.cases)
+            if node.default is not None:
+                node.default = self.visit(node.default)
+
+        elif isinstance(node, ast.SelectCase):
+            node.communication = self.visit(node.communication)
+            node.block = self.visit(node.block)
+
+
+class CollapseWrappers(OptimizationPass):
+    """Replaces `Statement` and `Expression` wrappers with what they wrap
+
+    Statements are only wrappers anyway, and nothing looks at the types of
+    expressions after type checking.
+    """
+
+    name = 'collapse-wrappers'
+
+    def visit_Statement(self, node):
+        return node.value
+
+    def visit_Expression(self, node):
+        return node.child
+
+
+class FoldConstants(OptimizationPass):
+    """Evaluates the operators applied on literals, at compile time
+
+    The operators come from `ast.OPERATOR_TYPE_MAP`, so folding them gives
+    exactly the value running them would. Operators which would fail at
+    run-time, like divisions by 0, are left for the run-time to fail.
+    """
+
+    name = 'fold-constants'
+
+    def visit_Operator(self, node):
+        if not all(isinstance(arg, ast.Value) for arg in node.args_list):
+            return node
+
+        try:
+            value = node.operator_pyfunc(*node.args_list)
+        except Exception:
+            return node
+
+        # Some operators don't produce pygo values (yet). Keep those as they
+        # are, so they fail the same way at run-time
+        if not isinstance(value, ast.Value):
+            return node
+        return value
+
+    def visit_LogicalOperator(self, node):
+        # Only the left operand needs to be known: it decides whether the
+        # result is the left or the right operand
+        left, right = node.args_list
+        if not isinstance(left, ast.Value):
+            return node
+
+        if left == node.short_circuit_value:
+            return left
+        return right
+
+
+class EliminateDeadCode(OptimizationPass):
+    """Removes the code which can never run
+
+    - the branches of `if` statements whose conditions are always false,
+      and the ones following a condition which is always true
+    - the statements following a `return`, `break` or `continue`
+    """
+
+    name = 'eliminate-dead-code'
+
+    def visit_Conditional(self, node):
+        pairs = []
+        final_block = node.final_block
+        for expression, block in node.expression_block_pairs:
+            if expression is ast.BoolLiteralFalse:
+                continue
+            if expression is ast.BoolLiteralTrue:
+                final_block = block
+                break
+            pairs.append((expression, block))
+
+        if not pairs:
+            # Blocks evaluate to the value of the `return`s in them, just
+            # like conditionals do
+            return final_block or ast.Block([])
+
+        node.expression_block_pairs = pairs
+        node.final_block = final_block
+        return node
+
+    def visit_Block(self, node):
+        node.statements = self.drop_unreachable(node.statements)
+        return node
+
+    def visit_FuncBody(self, node):
+        node.statements = self.drop_unreachable(node.statements)
+        return node
+
+    @staticmethod
+    def drop_unreachable(statements):
+        for index, statement in enumerate(statements):
+            if isinstance(ast.unwrap_statement(statement),
+                          (ast.Return, ast.Break, ast.Continue)):
+                return statements[:index + 1]
+        return statements
+
+
+class VectorizeLoops(OptimizationPass):
+    """Replaces the loops doing arithmetic on `[]int` slices, element by
+    element, with `ast.VectorizedLoop`s. See `pygolang.vectorize`
+
+    It runs last: the operands of the vectorized loops are parts of the
+    loops, which other passes could replace.
+    """
+
+    name = 'vectorize-loops'
+
+    def visit_For(self, node):
+        return vectorize.vectorize_loop(node) or node
+
+    visit_ForRange = visit_For
+
+
+# {level: the passes run at that level, in order}
+PASSES = {
+    0: (),
+    1: (CollapseWrappers, FoldConstants),
+    2: (CollapseWrappers, FoldConstants, EliminateDeadCode),
+    3: (CollapseWrappers, FoldConstants, EliminateDeadCode, VectorizeLoops),
+}
+
+
+class Optimizer:
+    """Runs optimization passes on the ast
+
+    After every run, `report` has the names of the passes which ran, each
+    with the number of nodes it removed (negative for the passes adding
+    nodes, like `VectorizeLoops`).
+    """
+
+    def __init__(self, level=None, passes=None):
+        """
+        :param int|None level: one of `LEVELS`. Defaults to `DEFAULT_LEVEL`
+        :param list[OptimizationPass]|None passes: run these, instead of
+            the passes of the level
+        """
+        level = DEFAULT_LEVEL if level is None else level
+        if level not in LEVELS:
+            raise ValueError(
+                f"Unknown optimization level {level!r}. "
+                f"Available levels: {', '.join(str(e) for e in LEVELS)}"
+            )
+
+        self.level = level
+        self.passes = passes if passes is not None else [
+            pass_class() for pass_class in PASSES[level]
+        ]
+
+        # [(pass name, nodes removed)], for the last optimized code
+        self.report = []
+
+    def optimize(self, code):
+        """
+        :param code: the ast, usually an `ast.Root`
+        :return: the optimized ast
+        """
+        self.report = []
+        if not self.passes:
+            return code
+
+        node_count = count_nodes(code)
+        for optimization_pass in self.passes:
+            code = optimization_pass.run(code)
+
+            new_node_count = count_nodes(code)
+            self.report.append((optimization_pass.name, node_count - new_node_count))
+            node_count = new_node_count
+
+        return code
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        return '\n'.join(
+            f"{name}: {removed} nodes removed" if removed >= 0 else
+            f"{name}: {-removed} nodes added"
+            for name, removed in self.report)
@@ -1,8 +1,10 @@
+import ply.lex as lex
 import ply.yacc as yacc
 
 from ply.lex import LexToken
 
-from pygolang import ast
+from pygolang import ast, grammar_cache
+from pygolang.builtin import BUILTINS
 from pygolang.errors import PyGoGrammarError, PyGoConsoleLogoffError
 from . import common_grammar
 from .common_grammar import OPERATORS
@@ -18,31 +20,54 @@ class PyGoParser:
     tokens = common_grammar.tokens
     precedence = (
         # Precedence -> up=low; down=HIGH!
+        # `ch <- x + 1` sends `x + 1`, so sending binds the weakest
+        ('nonassoc', 'SEND'),
         ('left', OPERATORS.BOOLOR.value),
         ('left', OPERATORS.BOOLAND.value),
-        ('left', OPERATORS.BOOLEQUALS.value, OPERATORS.BOOLNOTEQUALS.value),
+        ('left', OPERATORS.BOOLEQUALS.value, OPERATORS.BOOLNOTEQUALS.value,
+         OPERATORS.GREATER.value, OPERATORS.LESSER.value,
+         OPERATORS.GREATEREQ.value, OPERATORS.LESSEREQ.value),
         ('left', OPERATORS.PLUS.value, OPERATORS.MINUS.value, ),
-        ('left', OPERATORS.TIMES.value, OPERATORS.DIVIDE.value),
+        ('left', OPERATORS.TIMES.value, OPERATORS.DIVIDE.value,
+         OPERATORS.MODULO.value),
         ('left', OPERATORS.NOT.value),
+        ('right', OPERATORS.ARROW.value, OPERATORS.RECEIVE_ARROW.value),
+        # `s[i]` and `s[a:b]` bind the strongest
+        ('left', 'LBRACKET'),
         # ('left', 'MODULO'),
         # ('right', 'UMINUS'),
     )
 
     start = 'interpreter_start'
 
-    def __init__(self, io, state):
+    def __init__(self, io, state, optimize=True):
+        """
+        :param pygolang.io_callback.IO io:
+        :param dict state:
+        :param bool optimize: load the parser tables from the cache, instead
+            of generating them from the grammar. See `pygolang.grammar_cache`
+        """
         self.io_callback = io
         self.program_state = state
 
         self.type_scope_stack = ast.TypeScopeStack()
-        self.parser = yacc.yacc(module=self)
+        if optimize:
+            self.parser = grammar_cache.build_parser(self, self.start)
+        else:
+            self.parser = yacc.yacc(
+                module=self, start=self.start, debug=False, write_tables=False,
+                errorlog=grammar_cache.GrammarLogger())
 
     def parse(self, *a, **kw):
+        self.type_scope_stack.reset()
         return self.parser.parse(*a, **kw)
 
     def p_interpreter_start(self, t):
         """interpreter_start : statement"""
-        t[0] = ast.Root(ast.InterpreterStart(t[1]))
+        t[0] = ast.Root(
+            ast.InterpreterStart(t[1]),
+            frame_size=self.type_scope_stack.get_root_scope().frame_size
+        )
 
     def p_expression_int(self, t):
         """expression : INT"""
@@ -55,19 +80,31 @@ class PyGoParser:
 
     def p_expression_func_call(self, t):
         """expression : NAME LPAREN args_list RPAREN"""
-        current_scope = self.type_scope_stack.get_current_scope()
-        func_return_type = current_scope.get_variable_type(t[1])
-
-        t[0] = ast.FuncCall(func_name=t[1], args=t[3], type=func_return_type)
+        t[0] = self.make_call(t[1], t[3])
 
     def p_expression_3(self, t):
         """expression : NAME LPAREN RPAREN"""
+        t[0] = self.make_call(t[1], ast.FuncArguments([]))
+
+    def make_call(self, name, args):
+        """
+        :param str name: the name of the function called
+        :param ast.FuncArguments args:
+        :return: a call to the builtin with that name, unless the program
+            declared the name
+        """
         current_scope = self.type_scope_stack.get_current_scope()
-        func_type = current_scope.get_variable_type(t[1])  # type: ast.Type
+        func_type = current_scope.get_variable_type(name)  # type: ast.Type
 
-        t[0] = ast.FuncCall(
-            func_name=t[1], args=ast.FuncArguments([]),
-            type=func_type.rtype
+        if func_type is None and name in ast.BUILTIN_OPERATORS:
+            return ast.BUILTIN_OPERATORS[name](args)
+
+        if func_type is None and name in BUILTINS:
+            return ast.BuiltinCall(BUILTINS[name], args)
+
+        return ast.FuncCall(
+            func_name=name, args=args,
+            type=func_type.rtype if func_type else None
         )
 
     def p_expression_4(self, t):
@@ -137,11 +174,72 @@ class PyGoParser:
             raise PyGoGrammarError(
                 f"The type specified is not implemented: {t.slice[1].type}")
 
+    def p_type_declaration_chan(self, t):
+        """type_declaration : CHAN type_declaration"""
+        t[0] = ast.ChanType(t[2])
+
+    def p_type_declaration_slice(self, t):
+        """type_declaration : LBRACKET RBRACKET NAME
+                            | LBRACKET RBRACKET type_declaration
+        """
+        # Slices of other types than these don't have their operations yet
+        if t.slice[3].type == 'NAME' and t[3] == 'byte':
+            t[0] = ast.BytesType
+        elif t.slice[3].type != 'NAME' and t[3] in ast.SLICE_ELEMENTS:
+            t[0] = ast.SLICE_ELEMENTS[t[3]].type
+        else:
+            raise PyGoGrammarError(
+                f"The type specified is not implemented: []{t[3]}")
+
+    def p_expression_index(self, t):
+        """expression : expression LBRACKET expression RBRACKET"""
+        t[0] = ast.Index(t[1], t[3])
+
+    def p_expression_slicing(self, t):
+        """expression : expression LBRACKET expression COLON expression RBRACKET
+                        | expression LBRACKET expression COLON RBRACKET
+                        | expression LBRACKET COLON expression RBRACKET
+                        | expression LBRACKET COLON RBRACKET
+        """
+        bounds = [None, None]
+        bound = 0
+        for symbol in t.slice[3:-1]:
+            if symbol.type == 'COLON':
+                bound = 1
+            else:
+                bounds[bound] = symbol.value
+        t[0] = ast.Slicing(t[1], *bounds)
+
     def p_assignment_statement(self, t):
         """assignment_statement : NAME EQUALS expression"""
         t[0] = ast.Assignment(t[1], t[3], type_scope=self.type_scope_stack.get_current_scope())
         # self.program_state[t[1]] = t[3]
 
+    def p_assignment_statement_index(self, t):
+        """assignment_statement : expression LBRACKET expression RBRACKET EQUALS expression"""
+        t[0] = ast.SetIndex(t[1], t[3], t[6])
+
+    def p_assignment_statement_operator(self, t):
+        """assignment_statement : NAME PLUSEQUALS expression
+                                | NAME MINUSEQUALS expression
+                                | NAME INCREMENT
+                                | NAME DECREMENT
+        """
+        # `x += y` is `x = x + y`, and `x++` is `x = x + 1`
+        operator_token = {
+            'PLUSEQUALS': OPERATORS.PLUS, 'INCREMENT': OPERATORS.PLUS,
+            'MINUSEQUALS': OPERATORS.MINUS, 'DECREMENT': OPERATORS.MINUS,
+        }[t.slice[2].type]
+        operand = t[3] if len(t) == 4 else ast.Int(1)
+
+        scope = self.type_scope_stack.get_current_scope()
+        name = ast.Expression(
+            ast.Name(t[1], slot=scope.get_variable_slot(t[1])), scope)
+        value = ast.Operator(
+            '+' if operator_token is OPERATORS.PLUS else '-',
+            operator_token.value, [name, operand])
+        t[0] = ast.Assignment(t[1], value, type_scope=scope)
+
     def p_expression_statement(self, t):
         """expression_statement : expression"""
         # This works for values
@@ -166,6 +264,7 @@ class PyGoParser:
 
         func_creation = ast.FuncCreation(
             name=t[2][0], params=t[2][1], return_type=t[2][2], body=t[4])
+        func_creation.frame_size = t[1].frame_size
         t[0] = func_creation
 
         scope = self.type_scope_stack.get_current_scope()
@@ -177,7 +276,13 @@ class PyGoParser:
     def p_func(self, t):
         """func : FUNC"""
         # Dummy rule, created only so a new scope will be created
-        self.type_scope_stack.create_scope()
+        if len(self.type_scope_stack.scopes) > 1:
+            raise PyGoGrammarError(
+                "Functions can only be declared at the top level")
+
+        # The function's scope is passed on to p_func_statement, which needs
+        # to know how big the function's frame is
+        t[0] = self.type_scope_stack.create_scope(owns_frame=True)
 
     def p_func_signature(self, t):
         """func_signature : NAME LPAREN func_params RPAREN func_return_type"""
@@ -188,6 +293,12 @@ class PyGoParser:
 
         t[0] = [func_name, func_params, func_rtype]  # name, params, rtype
 
+        # Declare the function itself in the enclosing scope already, so its
+        # body can call it recursively
+        self.type_scope_stack.get_current_scope().parent.declare_variable_type(
+            func_name, ast.FuncCreation.get_func_type(func_params, func_rtype)
+        )
+
         # Declare the function's parameters in its type scope
         param_types = ast.FuncCreation.get_params_and_types_static(func_params.params)
         scope = self.type_scope_stack.get_current_scope()
@@ -223,9 +334,114 @@ class PyGoParser:
                     | declaration_statement
                     | expression_statement
                     | conditional_statement
+                    | return_statement
+                    | go_statement
+                    | send_statement
+                    | close_statement
+                    | select_statement
+                    | for_statement
+                    | break_statement
+                    | continue_statement
         """
         t.slice[0].value = ast.Statement(t.slice[1].value)
 
+    def p_go_statement(self, t):
+        """go_statement : GO expression"""
+        t[0] = ast.Go(t[2])
+
+    def p_send_statement(self, t):
+        """send_statement : expression ARROW expression %prec SEND"""
+        t[0] = ast.Send(t[1], t[3])
+
+    def p_close_statement(self, t):
+        """close_statement : CLOSE LPAREN expression RPAREN"""
+        t[0] = ast.Close(t[3])
+
+    def p_expression_receive(self, t):
+        """expression : ARROW expression
+                      | RECEIVE_ARROW expression"""
+        t[0] = ast.Receive(t[2])
+
+    def p_expression_make(self, t):
+        """expression : MAKE LPAREN type_declaration RPAREN
+                      | MAKE LPAREN type_declaration COMMA expression RPAREN
+                      | MAKE LPAREN type_declaration COMMA expression COMMA expression RPAREN
+        """
+        if isinstance(t[3], ast.SliceType):
+            if len(t) == 5:
+                raise PyGoGrammarError(f"Missing len argument to make({t[3]})")
+            t[0] = ast.MakeSlice(t[3], t[5], t[7] if len(t) == 9 else None)
+        elif len(t) == 9:
+            raise PyGoGrammarError(f"Too many arguments to make({t[3]})")
+        else:
+            t[0] = ast.MakeChannel(t[3], t[5] if len(t) == 7 else None)
+
+    def p_select_statement(self, t):
+        """select_statement : SELECT LBRACE select_cases RBRACE
+                            | SELECT LBRACE RBRACE
+        """
+        cases = t[3] if len(t) == 5 else []
+        defaults = [block for case, block in cases if case is None]
+        if len(defaults) > 1:
+            raise PyGoGrammarError("Multiple defaults in select")
+
+        t[0] = ast.Select(
+            [ast.SelectCase(case, block) for case, block in cases if case is not None],
+            defaults[0] if defaults else None
+        )
+
+    def p_select_cases(self, t):
+        """select_cases : select_case
+                        | select_cases select_case
+        """
+        if len(t) == 3:
+            t[1].append(t[2])
+            t[0] = t[1]
+        else:
+            t[0] = [t[1]]
+
+    def p_select_case(self, t):
+        """select_case : case_start select_communication COLON block
+                       | case_start select_communication COLON
+                       | default_start COLON block
+                       | default_start COLON
+        """
+        # A pair of (communication, block). The communication is None for
+        # the default case
+        if t.slice[1].type == 'case_start':
+            t[0] = (t[2], t[4] if len(t) == 5 else ast.Block([]))
+        else:
+            t[0] = (None, t[3] if len(t) == 4 else ast.Block([]))
+
+        self.type_scope_stack.pop_scope()
+
+    def p_case_start(self, t):
+        """case_start : CASE"""
+        # Dummy rule, creating the scope of the case, so the names declared
+        # by its communication are only visible in its block
+        self.type_scope_stack.create_scope(is_select_case=True)
+
+    def p_default_start(self, t):
+        """default_start : DEFAULT"""
+        self.type_scope_stack.create_scope(is_select_case=True)
+
+    def p_select_communication(self, t):
+        """select_communication : send_statement
+                                | expression
+                                | NAME WALRUS expression
+                                | NAME EQUALS expression
+        """
+        if len(t) == 2:
+            t[0] = t[1]
+            return
+
+        scope = self.type_scope_stack.get_current_scope()
+        if t.slice[2].type == common_grammar.OPERATORS.WALRUS.value:
+            t[0] = ast.Declaration(
+                name=t[1], type=t[3].type, value=t[3], type_scope=scope)
+        else:
+            t[0] = ast.Assignment(t[1], t[3], type_scope=scope)
+
     def p_conditional_statement_1(self, t):
         """conditional_statement : IF expression new_scope_start block new_scope_end"""
         t[0] = ast.Conditional(
@@ -266,22 +482,106 @@ class PyGoParser:
             scope=self.type_scope_stack.get_current_scope()
         )
 
+    def p_for_statement(self, t):
+        """for_statement : for_start new_scope_start block new_scope_end
+                        | for_start expression new_scope_start block new_scope_end
+                        | for_start for_clause SEMICOLON for_condition SEMICOLON for_clause new_scope_start block new_scope_end
+        """
+        if len(t) == 5:
+            t[0] = ast.For(None, None, None, t[3])
+        elif len(t) == 6:
+            t[0] = ast.For(None, t[2], None, t[4])
+        else:
+            t[0] = ast.For(t[2], t[4], t[6], t[8])
+        self.type_scope_stack.pop_scope()
+
+    def p_for_statement_range(self, t):
+        """for_statement : for_range new_scope_start block new_scope_end"""
+        name, limit, scope = t[1]
+        t[0] = ast.ForRange(name, limit, t[3], type_scope=scope)
+        self.type_scope_stack.pop_scope()
+
+    def p_for_range(self, t):
+        """for_range : for_start NAME WALRUS RANGE expression"""
+        # The counter has to be declared before the body is parsed
+        scope = self.type_scope_stack.get_current_scope()
+        scope.declare_variable_type(t[2], ast.IntType)
+        limit = t[5]
+        if isinstance(getattr(limit, 'type', None), ast.SliceType):
+            # Ranging over a slice counts its indexes
+            limit = ast.Len(ast.FuncArguments([ast.Expression(limit, scope)]))
+        t[0] = (t[2], limit, scope)
+
+    def p_for_start(self, t):
+        """for_start : FOR"""
+        # Dummy rule, creating the scope of the loop, holding the names
+        # declared by its init statement
+        self.type_scope_stack.create_scope(is_loop=True)
+
+    def p_for_clause(self, t):
+        """for_clause :
+                    | assignment_statement
+                    | declaration_statement
+                    | expression_statement
+        """
+        t[0] = t[1] if len(t) == 2 else None
+
+    def p_for_condition(self, t):
+        """for_condition :
+                        | expression
+        """
+        t[0] = t[1] if len(t) == 2 else None
+
+    def p_break_statement(self, t):
+        """break_statement : BREAK"""
+        if not self.type_scope_stack.get_current_scope().is_in_loop_or_select():
+            raise PyGoGrammarError("break is not in a loop or select")
+        t[0] = ast.Break()
+
+    def p_continue_statement(self, t):
+        """continue_statement : CONTINUE"""
+        if not self.type_scope_stack.get_current_scope().is_in_loop():
+            raise PyGoGrammarError("continue is not in a loop")
+        t[0] = ast.Continue()
+
     def p_block(self, t):
         """block : statement
                 | block statement
         """
-        t[0] = ast.Block(t[1:])
+        # Keep blocks flat, instead of nesting a new block for every statement
+        if len(t) == 3:
+            t[0] = ast.Block(t[1].statements + [t[2]])
+        else:
+            t[0] = ast.Block([t[1]])
 
     def p_func_body(self, t):
         """func_body : assignment_statement
                     | return_statement
                     | expression_statement
+                    | declaration_statement
+                    | conditional_statement
+                    | go_statement
+                    | send_statement
+                    | close_statement
+                    | select_statement
+                    | for_statement
                     | func_body func_body
         """
-        t.slice[0].value = ast.FuncBody([e.value for e in t.slice[1:]])
+        # Keep function bodies flat, so returns anywhere in them end the
+        # whole body, not just a nested part of it
+        statements = []
+        for elem in t.slice[1:]:
+            if isinstance(elem.value, ast.FuncBody):
+                statements.extend(elem.value.statements)
+            else:
+                statements.append(elem.value)
+        t.slice[0].value = ast.FuncBody(statements)
 
     def p_return_statement(self, t):
         """return_statement : RETURN expression"""
+        if self.type_scope_stack.get_current_scope().frame_owner.parent is None:
+            raise PyGoGrammarError("Can't return outside of a function")
+
         t.slice[0].value = ast.Return(t.slice[2].value)
 
     def p_expression_group(self, t):
@@ -301,8 +601,6 @@ class PyGoParser:
                       | expression LESSER expression
                       | expression GREATEREQ expression
                       | expression LESSEREQ expression
-                      | expression BOOLAND expression
-                      | expression BOOLOR expression
                       | NOT expression
         """
         # operator_chars = {'+', '-', '/', '*', '==', '!=', '>', '<', '>=', '<=', '%'}
@@ -313,6 +611,12 @@ class PyGoParser:
         elif len(t.slice) == 3:
             t[0] = ast.Operator(t[1], t.slice[1].type, [t[2]])
 
+    def p_expression_logical(self, t):
+        """expression : expression BOOLAND expression
+                      | expression BOOLOR expression
+        """
+        t[0] = ast.LogicalOperator(t[2], t.slice[2].type, [t[1], t[3]])
+
     #
     # def p_expression_uminus(t):
     #     """expression : MINUS expression %prec UMINUS"""
@@ -373,14 +677,64 @@ class PyGoParser:
         if len(t.slice) == 2:
             if isinstance(t.slice[1], LexToken):
                 if t.slice[1].type == 'NAME':
-                    expression_node = ast.Name(t.slice[1].value)
+                    current_scope = self.type_scope_stack.get_current_scope()
+                    expression_node = ast.Name(
+                        t.slice[1].value,
+                        slot=current_scope.get_variable_slot(t.slice[1].value)
+                    )
 
                     t.slice[0].value = ast.Expression(
                         expression_node,
-                        self.type_scope_stack.get_current_scope()
+                        current_scope
                     )
 
     def p_error(self, t):
+        self.syntax_error(t)
+
+    def syntax_error(self, t):
+        """Called by ply with the unexpected token, or None at the end of input
+        """
         if t and hasattr(t, 'value'):
             self.io_callback.to_stderr("pygo: Syntax error at '%s'" % t.value)
         raise PyGoConsoleLogoffError
+
+
+class PyGoProgramParser(PyGoParser):
+    """Parses whole source files, instead of single statements"""
+
+    start = 'program'
+
+    def parse(self, source, lexer=None):
+        """
+        :param str source: the contents of a source file
+        :param lexer: the ply lexer to use. Defaults to the last one built
+        :rtype: ast.Root
+        """
+        lexer = lexer or lex.lexer
+        lexer.lineno = 1
+        return super(PyGoProgramParser, self).parse(source, lexer=lexer)
+
+    def p_program(self, t):
+        """program : program_statements"""
+        t[0] = ast.Root(
+            ast.Program(t[1]),
+            frame_size=self.type_scope_stack.get_root_scope().frame_size
+        )
+
+    def p_program_statements(self, t):
+        """program_statements : statement
+                            | program_statements statement
+        """
+        # Appending in place, because files can have lots of statements
+        if len(t) == 3:
+            t[1].append(ast.InterpreterStart(t[2]))
+            t[0] = t[1]
+        else:
+            t[0] = [ast.InterpreterStart(t[1])]
+
+    def syntax_error(self, t):
+        # There's no session to end here, just a file which can't be run
+        if t is None:
+            raise PyGoGrammarError("Syntax error: unexpected end of file")
+        raise PyGoGrammarError(
+            f"Syntax error at line {t.lineno}: unexpected '{t.value}'")
@@ -0,0 +1,182 @@
+"""Runs programs in forked worker processes, prepared before they're needed
+
+Starting a python process, importing pygolang and loading the parser
+tables takes much longer than running a small program. The pool does all
+that once, in the process creating it, then forks workers from it: they
+start with everything loaded. Every worker runs a single program, with a
+fresh module scope, and exits, so programs can't see or break each other.
+A new worker is forked for every one used up, so there's always one ready.
+
+Programs are sent to the workers, and their results sent back, over pipes.
+Programs running for too long are killed.
+
+Forking needs a POSIX system. The pool should be created before the
+process starts threads, which forked children don't get.
+"""
+import multiprocessing
+import os
+import signal
+
+from pygolang.interpreter import ProgramResult, run_program
+from pygolang.optimizer import Optimizer
+
+DEFAULT_SIZE = 4
+
+# Run when the pool is created, so the workers get everything it loads
+WARM_UP_PROGRAM = """
+func warmUp(n int) int {
+    if n > 0 {
+        return warmUp(n - 1)
+    }
+    return n
+}
+warmUp(3)
+"""
+
+
+class Worker:
+    __slots__ = ('pid', 'connection')
+
+    def __init__(self, pid, connection):
+        """
+        :param int pid:
+        :param multiprocessing.connection.Connection connection: the pool's
+            end of the pipe to the worker
+        """
+        self.pid = pid
+        self.connection = connection
+
+
+class PreforkPool:
+    """Forks workers which each run one program
+
+    Counters:
+        forked: workers forked, including the ones ready
+        programs: programs run
+        killed: workers killed, because their program ran for too long
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, engine=None, optimizer=None):
+        """
+        :param int size: how many workers are kept ready
+        :param str|None engine: see `pygolang.ast_runner.ENGINES`
+        :param pygolang.optimizer.Optimizer|None optimizer:
+        """
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("The prefork pool needs os.fork")
+
+        self.size = size
+        self.engine = engine
+        self.optimizer = optimizer or Optimizer()
+
+        self.forked = 0
+        self.programs = 0
+        self.killed = 0
+
+        # Loads the parser tables, and compiles the engine's code paths,
+        # once for all the workers
+        run_program(WARM_UP_PROGRAM, engine, self.optimizer)
+
+        # The workers ready to run a program
+        self.ready = []
+        # The ones running one
+        self._running = []
+        # The pids of the workers which ran theirs, not waited for yet
+        self._exited = []
+        for _ in range(size):
+            self.ready.append(self._fork())
+
+    def _fork(self):
+        parent_end, child_end = multiprocessing.Pipe()
+        pid = os.fork()
+        if pid == 0:
+            # The child doesn't get the other workers' pipes
+            parent_end.close()
+            for worker in self.ready + self._running:
+                worker.connection.close()
+            status = 0
+            try:
+                self._serve(child_end)
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+
+        child_end.close()
+        self.forked += 1
+        return Worker(pid, parent_end)
+
+    def _serve(self, connection):
+        """Runs in the worker: runs one program, and sends back its result"""
+        try:
+            source = connection.recv()
+        except EOFError:
+            # The pool was closed
+            return
+        connection.send(run_program(source, self.engine, self.optimizer))
+        connection.close()
+
+    def run(self, source, timeout=None):
+        """Runs the program in a worker
+
+        :param str source:
+        :param float|None timeout: seconds after which the worker is killed.
+            No limit when None
+        :rtype: ProgramResult
+        """
+        self._reap()
+        worker = self.ready.pop(0) if self.ready else self._fork()
+        self.programs += 1
+        self._running.append(worker)
+        try:
+            worker.connection.send(source)
+
+            # The replacement is forked while the program runs
+            self.ready.append(self._fork())
+
+            if not worker.connection.poll(timeout):
+                os.kill(worker.pid, signal.SIGKILL)
+                self.killed += 1
+                return ProgramResult(
+                    error=f"The program ran for more than {timeout}s")
+            return worker.connection.recv()
+        except (EOFError, OSError):
+            return ProgramResult(error="The worker running the program died")
+        finally:
+            self._running.remove(worker)
+            worker.connection.close()
+            self._exited.append(worker.pid)
+
+    def _reap(self, block=False):
+        """Waits for the workers which exited"""
+        for pid in list(self._exited):
+            try:
+                done_pid, _ = os.waitpid(pid, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                done_pid = pid
+            if done_pid:
+                self._exited.remove(pid)
+
+    def close(self):
+        """Stops the workers which are ready"""
+        for worker in self.ready:
+            # They exit when their pipe is closed
+            worker.connection.close()
+            self._exited.append(worker.pid)
+        self.ready = []
+        self._reap(block=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        return (
+            f"prefork: {self.programs} programs run, {self.forked} workers "
+            f"forked, {self.killed} killed"
+        )
@@ -0,0 +1,157 @@
+"""On-disk cache for parsed programs, the pygo equivalent of .pyc files
+
+Parsing a program means lexing it, building the ast and type checking it.
+For programs which are run again and again without changing, this is done
+once: the checked ast gets pickled into the cache directory, and the next
+runs load it from there.
+
+The cached programs are keyed by a checksum of
+    - the source code, and whether it's a whole file or a single statement
+    - the interpreter version (a checksum of the front-end's sources)
+    - the names used in the source which the parser already knew about
+      before parsing, with their types (the interactive interpreter parses
+      every line using what was declared on the previous lines)
+
+So a cached program is only ever used in place of parsing the exact same
+source, with the exact same front-end, in the exact same context.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import re
+import sys
+
+from pygolang import grammar_cache
+
+# Bump this when the format of the cached files changes
+CACHE_VERSION = 3
+
+# The modules whose code decides what a source parses into
+FRONT_END_MODULES = (
+    'ast.py', 'builtin.py', 'common_grammar.py', 'lexer_setup.py',
+    'parser_setup.py',
+)
+
+# Anything which might be a name. Keywords don't matter, they're never known
+_WORD_RE = re.compile(r'[A-Za-z_][A-Za-z_0-9]*')
+
+
+@functools.lru_cache(maxsize=None)
+def interpreter_version():
+    """
+    :return: a checksum of the front-end's sources. It changes whenever the
+        code producing or defining the ast changes
+    :rtype: str
+    """
+    version = hashlib.sha256(repr(
+        (CACHE_VERSION, sys.version_info[:2])).encode())
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for module_name in FRONT_END_MODULES:
+        with open(os.path.join(package_dir, module_name), 'rb') as module:
+            version.update(module.read())
+
+    return version.hexdigest()[:32]
+
+
+def dumps(program):
+    """
+    :param program: anything produced by the parser. The objects compared
+        by identity pickle themselves by name, so they stay singletons
+    :rtype: bytes
+    """
+    return pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    """
+    :param bytes data: as returned by `dumps`
+    """
+    return pickle.loads(data)
+
+
+class ProgramCache:
+    """Parses programs with a `PyGoParser`, reusing previously parsed ones
+
+    The names a program declares at the top level are saved along with it,
+    and declared again in the parser when the program is loaded, so the
+    parser ends up in the same state as if it had parsed the program.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        :param str|None cache_dir: where to keep the parsed programs.
+            Defaults to programs/ inside `grammar_cache.get_cache_dir()`.
+            When there's no usable directory, nothing gets cached.
+        """
+        if cache_dir is None:
+            base_dir = grammar_cache.get_cache_dir()
+            cache_dir = base_dir and os.path.join(base_dir, 'programs')
+
+        if cache_dir is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError:
+                cache_dir = None
+
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, parser, source):
+        """
+        :param pygolang.parser_setup.PyGoParser parser:
+        :param str source:
+        :rtype: str
+        """
+        # Only the types of the names in the source can change how it parses
+        known_types = parser.type_scope_stack.get_root_scope().scope
+        known_names = sorted(
+            (name, str(known_types[name]))
+            for name in set(_WORD_RE.findall(source)) if name in known_types
+        )
+
+        key = hashlib.sha256(interpreter_version().encode())
+        key.update(parser.start.encode())
+        key.update(repr(known_names).encode())
+        key.update(source.encode())
+        return key.hexdigest()
+
+    def parse(self, parser, source):
+        """Same as `parser.parse(source)`, but cached
+
+        :param pygolang.parser_setup.PyGoParser parser:
+        :param str source:
+        """
+        if self.cache_dir is None:
+            return parser.parse(source)
+
+        path = os.path.join(self.cache_dir, self.get_key(parser, source) + '.pickle')
+        root_scope = parser.type_scope_stack.get_root_scope()
+
+        try:
+            with open(path, 'rb') as cached_file:
+                program, declared_names = loads(cached_file.read())
+        except Exception:
+            # Not cached yet. Or a broken cache file, which just gets replaced
+            pass
+        else:
+            self.hits += 1
+            parser.type_scope_stack.reset()
+            root_scope.scope.update(declared_names)
+            return program
+
+        self.misses += 1
+        known_names = dict(root_scope.scope)
+        program = parser.parse(source)
+
+        # Names can also be declared again, with a different type
+        declared_names = {
+            name: type_ for name, type_ in root_scope.scope.items()
+            if name not in known_names or known_names[name] != type_
+        }
+        data = dumps((program, declared_names))
+        grammar_cache.write_atomically(path, lambda cached_file: cached_file.write(data))
+
+        return program
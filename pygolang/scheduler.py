@@ -0,0 +1,545 @@
+"""Goroutines and channels, on a cooperative scheduler
+
+Goroutines are green threads: they all run on the python thread running
+the program, taking turns. The stackless engine compiles the code which
+can block into generators (see `pygolang.stackless`), and a goroutine is
+just the stack of generators of the functions it's running. The scheduler
+runs one goroutine until it blocks on a channel, then switches to the next
+one in its run queue. A switch is a few python calls, much cheaper than
+switching between OS threads.
+
+Code blocks by yielding `PARK` up to the scheduler, after registering the
+goroutine with the channels it waits on. The goroutine which unblocks it
+(by sending, receiving or closing) puts it back in the run queue, with the
+value it should be resumed with.
+
+Goroutines blocked on I/O are resumed by the scheduler's event loop (see
+`pygolang.event_loop`), which the scheduler waits on when no goroutine can
+run.
+"""
+import collections
+import random
+
+from pygolang import ast
+from pygolang.errors import PyLangRuntimeError
+from pygolang.event_loop import EventLoop
+
+# Raised by the engines which can't run goroutines
+UNSUPPORTED_ENGINE_MESSAGE = "Goroutines and channels need the stackless engine"
+
+# The schedulers only need their picks to be fair, so they share one
+# generator, instead of each carrying its 2.5KB of state
+_RANDOM = random.Random()
+
+# Yielded to the scheduler by goroutines which block
+PARK = ast.ReprHelper('Park')
+
+# Resumes the senders blocked on a channel which got closed
+_CLOSED = ast.ReprHelper('Closed')
+
+# What `_receive_now` returns when there's nothing to receive
+_NOT_READY = ast.ReprHelper('NotReady')
+
+
+class Goroutine:
+    __slots__ = (
+        'id', 'generator', 'stack', 'value', 'done', 'result', 'waiting',
+        'parks', 'wake_case',
+    )
+
+    def __init__(self, id, generator):
+        """
+        :param int id:
+        :param generator: the compiled code the goroutine runs
+        """
+        self.id = id
+        self.generator = generator
+
+        # The generators of the callers of the running function
+        self.stack = []
+
+        # Sent to the generator, when the goroutine is resumed
+        self.value = None
+
+        self.done = False
+        self.result = None
+
+        # Whether the goroutine is blocked on channels
+        self.waiting = False
+        # How many times it blocked. Tells the waiters registered the last
+        # time it blocked from the stale ones
+        self.parks = 0
+        # The index of the select case which unblocked it
+        self.wake_case = None
+
+    def __repr__(self):
+        return f"<Goroutine {self.id}>"
+
+
+class Waiter:
+    """A goroutine, blocked on a channel"""
+    __slots__ = ('goroutine', 'ticket', 'value', 'case')
+
+    def __init__(self, goroutine, value=None, case=None):
+        """
+        :param Goroutine goroutine:
+        :param value: the value to send, for blocked senders
+        :param int|None case: the select case this is for
+        """
+        self.goroutine = goroutine
+        self.ticket = goroutine.parks
+        self.value = value
+        self.case = case
+
+    def is_valid(self):
+        """
+        :return: False if the goroutine isn't waiting for this anymore: a
+            select it was in went with another case, or it was killed
+        """
+        goroutine = self.goroutine
+        return goroutine.waiting and self.ticket == goroutine.parks
+
+
+class Channel(ast.TypedValue):
+    __slots__ = ('capacity', 'buffer', 'closed', 'recvq', 'sendq', 'zero_value')
+
+    def __init__(self, type, capacity=0):
+        """
+        :param ast.ChanType type:
+        :param int capacity: the size of the buffer. 0 for unbuffered
+            channels, on which senders wait for receivers
+        """
+        if capacity < 0:
+            raise PyLangRuntimeError("makechan: size out of range")
+
+        super(Channel, self).__init__(self, type)
+        self.capacity = capacity
+        self.buffer = collections.deque()
+        self.closed = False
+
+        # The goroutines blocked receiving from, and sending to the channel
+        self.recvq = collections.deque()
+        self.sendq = collections.deque()
+
+        # Received from the channel, once it's closed and empty
+        self.zero_value = ast.get_zero_value(type.elem_type)
+
+    def to_pygo_repr(self):
+        return f"0x{id(self):x}"
+
+    def __repr__(self):
+        return f"<Channel: {self.type}, {len(self.buffer)}/{self.capacity}>"
+
+
+def _pop_waiter(queue):
+    """
+    :param collections.deque queue: the receivers or senders of a channel
+    :return: the first waiter still waiting, or None
+    """
+    while queue:
+        waiter = queue.popleft()
+        if waiter.is_valid():
+            return waiter
+    return None
+
+
+def _has_waiter(queue):
+    while queue:
+        if queue[0].is_valid():
+            return True
+        queue.popleft()
+    return False
+
+
+class Scheduler:
+    """Runs goroutines, taking turns, on the current thread
+
+    Goroutines run until they block on a channel. They're never preempted,
+    so one which never blocks keeps all the others from running.
+
+    Counters, for finding out where programs wait:
+        spawned: goroutines started by `go` statements
+        switches: times a goroutine was resumed
+        waits: times a goroutine blocked on channels
+        `alive`, `blocked`: goroutines not done, and those of them blocked,
+            on channels or I/O
+    """
+
+    # While goroutines are runnable, the event loop is still checked every
+    # this many switches, so the ones waiting for I/O aren't starved
+    POLL_INTERVAL = 64
+
+    def __init__(self):
+        self.run_queue = collections.deque()
+
+        # The goroutine running now
+        self.current = None
+
+        # All the goroutines which are not done, the blocked ones included
+        self._goroutines = set()
+        self._next_id = 0
+
+        self.spawned = 0
+        self.switches = 0
+        self.waits = 0
+        self.blocked = 0
+
+        # Picks between the ready cases of selects, like go does, so no
+        # case is starved
+        self.random = _RANDOM
+
+        # Created by the first goroutine doing I/O
+        self.event_loop = None
+
+        # Set by `cancel`, from another thread
+        self.cancelled = False
+
+    @property
+    def alive(self):
+        return len(self._goroutines)
+
+    def spawn(self, generator):
+        """Starts a new goroutine
+
+        :param generator: the compiled code to run in it
+        :rtype: Goroutine
+        """
+        self.spawned += 1
+        goroutine = self._create_goroutine(generator)
+        self.run_queue.append(goroutine)
+        return goroutine
+
+    def _create_goroutine(self, generator):
+        self._next_id += 1
+        goroutine = Goroutine(self._next_id, generator)
+        self._goroutines.add(goroutine)
+        return goroutine
+
+    def run(self, generator):
+        """Runs the code as the main goroutine
+
+        The goroutines spawned before, and still not done, keep running
+        along with it. In the interactive interpreter, that's the ones
+        started on the previous lines.
+
+        :param generator: the compiled code to run
+        :return: the value the code evaluated to
+        :raises PyLangRuntimeError: when all the goroutines are blocked, when
+            any of them fails, or when cancelled. All goroutines are killed
+            then, just like a go program would exit
+        """
+        main = self._create_goroutine(generator)
+        run_queue = self.run_queue
+        run_queue.appendleft(main)
+        poll_interval = self.POLL_INTERVAL
+
+        try:
+            while not main.done:
+                event_loop = self.event_loop
+                # Checked after getting the event loop: `cancel` wakes it up
+                # if it's set after this
+                if self.cancelled:
+                    raise PyLangRuntimeError("the program was cancelled")
+                if not run_queue:
+                    if event_loop is None or not event_loop.waiting:
+                        raise PyLangRuntimeError(
+                            "all goroutines are asleep - deadlock!")
+                    event_loop.poll()
+                    continue
+
+                if event_loop is not None and event_loop.waiting and \
+                        self.switches % poll_interval == 0:
+                    event_loop.poll(0)
+
+                goroutine = self.current = run_queue.popleft()
+                self.switches += 1
+                self._step(goroutine)
+
+        except BaseException:
+            self.kill_all()
+            raise
+
+        finally:
+            self.current = None
+
+        return main.result
+
+    def _step(self, goroutine):
+        """Runs the goroutine until it blocks, or is done"""
+        generator = goroutine.generator
+        stack = goroutine.stack
+        value = goroutine.value
+
+        while True:
+            try:
+                yielded = generator.send(value)
+            except StopIteration as stop:
+                if not stack:
+                    goroutine.done = True
+                    goroutine.result = stop.value
+                    self._goroutines.discard(goroutine)
+                    return
+
+                generator = stack.pop()
+                value = stop.value
+                continue
+
+            if yielded is PARK:
+                goroutine.generator = generator
+                return
+
+            # A function call. Run its body, then resume the caller
+            stack.append(generator)
+            generator = yielded
+            value = None
+
+    def kill_all(self):
+        """Drops all the goroutines"""
+        for goroutine in self._goroutines:
+            goroutine.done = True
+            goroutine.waiting = False
+        self._goroutines.clear()
+        self.run_queue.clear()
+        self.blocked = 0
+        if self.event_loop is not None:
+            self.event_loop.cancel_all()
+
+    def get_event_loop(self):
+        """
+        :rtype: EventLoop
+        """
+        if self.event_loop is None:
+            self.event_loop = EventLoop(self)
+        return self.event_loop
+
+    def cancel(self):
+        """Makes `run` raise, even when the goroutines wait for I/O. Can be
+        called from any thread, while the code runs or before it does
+        """
+        self.cancelled = True
+        event_loop = self.event_loop
+        if event_loop is not None:
+            event_loop.wake_up()
+
+    def shutdown(self):
+        """Releases the files and threads of the event loop, if there's one
+        """
+        if self.event_loop is not None:
+            self.event_loop.close()
+            self.event_loop = None
+
+    def _park(self, goroutine):
+        goroutine.waiting = True
+        goroutine.parks += 1
+        goroutine.value = None
+        self.blocked += 1
+
+    def suspend(self):
+        """Generator blocking the current goroutine, until `resume` is
+        called for it
+
+        :return: the value it's resumed with
+        """
+        self._park(self.current)
+        return (yield PARK)
+
+    def resume(self, goroutine, value):
+        """Puts a blocked goroutine back in the run queue
+
+        :param value: what the operation it's blocked on evaluates to
+        """
+        goroutine.waiting = False
+        goroutine.value = value
+        self.blocked -= 1
+        self.run_queue.append(goroutine)
+
+    def _park_on_channels(self, goroutine):
+        self._park(goroutine)
+        self.waits += 1
+
+    def _wake(self, waiter, value):
+        """Resumes the goroutine blocked on a channel"""
+        waiter.goroutine.wake_case = waiter.case
+        self.resume(waiter.goroutine, value)
+
+    def block_forever(self):
+        """Blocks the current goroutine, with no way to wake it up
+
+        That's what nil channels, and empty selects do
+        """
+        self._park_on_channels(self.current)
+        yield PARK
+
+    def _send_now(self, channel, value):
+        """
+        :return: False if the value couldn't be sent without blocking
+        """
+        if channel.closed:
+            raise PyLangRuntimeError("send on closed channel")
+
+        waiter = _pop_waiter(channel.recvq)
+        if waiter is not None:
+            self._wake(waiter, value)
+            return True
+
+        if len(channel.buffer) < channel.capacity:
+            channel.buffer.append(value)
+            return True
+        return False
+
+    def _receive_now(self, channel):
+        """
+        :return: the value received, or `_NOT_READY` if there's nothing to
+            receive without blocking
+        """
+        buffer = channel.buffer
+        if buffer:
+            value = buffer.popleft()
+            # There's room in the buffer now, for the first blocked sender
+            waiter = _pop_waiter(channel.sendq)
+            if waiter is not None:
+                buffer.append(waiter.value)
+                self._wake(waiter, None)
+            return value
+
+        waiter = _pop_waiter(channel.sendq)
+        if waiter is not None:
+            self._wake(waiter, None)
+            return waiter.value
+
+        if channel.closed:
+            return channel.zero_value
+        return _NOT_READY
+
+    def _is_ready(self, channel, is_send):
+        if channel is ast.ValueNotSet:
+            return False
+        if is_send:
+            # Sending to a closed channel doesn't block, it fails
+            return channel.closed or _has_waiter(channel.recvq) or \
+                len(channel.buffer) < channel.capacity
+        return bool(channel.buffer) or _has_waiter(channel.sendq) or \
+            channel.closed
+
+    def send(self, channel, value):
+        """Generator sending the value, blocking the current goroutine until
+        it's received, or there's room in the channel's buffer
+
+        :param Channel channel: a channel, or `ast.ValueNotSet` for nil
+        """
+        if channel is ast.ValueNotSet:
+            yield from self.block_forever()
+
+        if self._send_now(channel, value):
+            return
+
+        goroutine = self.current
+        self._park_on_channels(goroutine)
+        channel.sendq.append(Waiter(goroutine, value))
+        if (yield PARK) is _CLOSED:
+            raise PyLangRuntimeError("send on closed channel")
+
+    def receive(self, channel):
+        """Generator receiving a value, blocking the current goroutine until
+        there's one
+
+        :param Channel channel: a channel, or `ast.ValueNotSet` for nil
+        :return: the value received
+        """
+        if channel is ast.ValueNotSet:
+            yield from self.block_forever()
+
+        value = self._receive_now(channel)
+        if value is not _NOT_READY:
+            return value
+
+        goroutine = self.current
+        self._park_on_channels(goroutine)
+        channel.recvq.append(Waiter(goroutine))
+        return (yield PARK)
+
+    def close(self, channel):
+        """Closes the channel, and wakes up everyone blocked on it"""
+        if channel is ast.ValueNotSet:
+            raise PyLangRuntimeError("close of nil channel")
+        if channel.closed:
+            raise PyLangRuntimeError("close of closed channel")
+
+        channel.closed = True
+        while True:
+            waiter = _pop_waiter(channel.recvq)
+            if waiter is None:
+                break
+            self._wake(waiter, channel.zero_value)
+
+        while True:
+            waiter = _pop_waiter(channel.sendq)
+            if waiter is None:
+                break
+            self._wake(waiter, _CLOSED)
+
+    def select(self, operations, has_default):
+        """Generator running one of the channel operations of a select
+
+        When several are ready, one is picked at random. When none are,
+        the goroutine blocks until one is, unless there's a default case.
+
+        :param list[tuple] operations: a (channel, whether it's a send,
+            value to send) tuple for every case, in order
+        :param bool has_default:
+        :return: a pair of (the index of the chosen case, or None for the
+            default case, the value received)
+        """
+        ready = [
+            index for index, (channel, is_send, _) in enumerate(operations)
+            if self._is_ready(channel, is_send)
+        ]
+        if ready:
+            index = ready[0] if len(ready) == 1 else self.random.choice(ready)
+            channel, is_send, value = operations[index]
+            if is_send:
+                self._send_now(channel, value)
+                return index, None
+            return index, self._receive_now(channel)
+
+        if has_default:
+            return None, None
+
+        # Block on all the channels at once, until one of them wakes us up
+        goroutine = self.current
+        self._park_on_channels(goroutine)
+        waiters = []
+        for index, (channel, is_send, value) in enumerate(operations):
+            if channel is ast.ValueNotSet:
+                continue
+            queue = channel.sendq if is_send else channel.recvq
+            waiter = Waiter(goroutine, value, index)
+            queue.append(waiter)
+            waiters.append((queue, waiter))
+
+        value = yield PARK
+
+        # The waiters of the other cases are stale now. Drop them, so they
+        # don't pile up on channels which are selected on again and again
+        for queue, waiter in waiters:
+            try:
+                queue.remove(waiter)
+            except ValueError:
+                pass
+
+        if value is _CLOSED:
+            raise PyLangRuntimeError("send on closed channel")
+        return goroutine.wake_case, value
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        report = (
+            f"scheduler: {self.spawned} goroutines spawned, {self.alive} alive, "
+            f"{self.blocked} blocked, {self.switches} switches, "
+            f"{self.waits} channel waits"
+        )
+        if self.event_loop is not None:
+            report += '\n' + self.event_loop.format_report()
+        return report
@@ -0,0 +1,280 @@
+"""The interactive interpreter, served to many clients by one process
+
+Every connection is a session of its own, like a separate
+`pygolang.interpreter.main`: it has its own module scope, lexer, parser and
+runner, so the names one session declares aren't seen by the others. The
+lexer and parser tables are only built once, and shared by all the sessions
+(see `pygolang.grammar_cache`), so a session costs kilobytes, not the
+megabytes of a new process.
+
+The protocol is the interpreter's, so `nc` is a client: the server sends the
+prompt, the client sends a line, the server sends what the line printed,
+followed by the next prompt.
+
+The connections are served by an asyncio loop, but the lines run in a
+pool of worker threads, shared by all the sessions, one line of a session at
+a time. Lines which block on I/O, like `accept(listen(...))`, only delay
+their own session, and they're cancelled when their client disconnects.
+Lines which compute for long keep a worker busy: when all the workers are,
+the lines of the other sessions wait for one. Goroutines run on a session's
+scheduler only while its lines run. Programs in sessions can't read stdin:
+`readline()` sees it ended.
+
+Usage:
+    python -m pygolang serve --tcp 127.0.0.1:7000
+    python -m pygolang serve --unix /tmp/pygo.sock
+"""
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from pygolang import ast_runner, lexer_setup, parser_setup
+from pygolang.errors import (
+    PyGoConsoleLogoffError, PyGoGrammarError, PyLangRuntimeError,
+    StopPyGoLangInterpreterError,
+)
+from pygolang.io_callback import IO
+from pygolang.optimizer import Optimizer
+from pygolang.scheduler import Scheduler
+
+ENCODING = 'utf-8'
+
+# The worker threads running the lines of all the sessions
+DEFAULT_MAX_WORKERS = 32
+
+
+class SessionIO(IO):
+    """Writes the output of a session to its connection"""
+
+    def __init__(self, writer, loop=None):
+        """
+        :param asyncio.StreamWriter writer:
+        :param asyncio.AbstractEventLoop|None loop: the loop serving the
+            connection, when the lines run in a worker thread: the writer
+            can only be used from the loop's
+        """
+        self.writer = writer
+        self.loop = loop
+
+    def to_stdout(self, stuff):
+        data = str(stuff).encode(ENCODING)
+        if self.loop is None:
+            self.writer.write(data)
+            return
+        try:
+            # Buffered by the writer, until the loop gets to send it
+            self.loop.call_soon_threadsafe(self._write, data)
+        except RuntimeError:
+            # The loop is closed, and the connection with it
+            pass
+
+    def _write(self, data):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    to_stderr = to_stdout
+
+    def from_stdin(self):
+        raise StopPyGoLangInterpreterError
+
+
+class Session:
+    """What a connection declared, and the objects running its lines"""
+    __slots__ = ('io', 'state', 'lexer', 'parser', 'runner')
+
+    def __init__(self, io, engine=None, memoizer=None):
+        """
+        :param SessionIO io:
+        :param str|None engine: see `pygolang.ast_runner.ENGINES`
+        :param pygolang.memoization.Memoizer|None memoizer:
+        """
+        self.io = io
+        self.state = {}
+        self.lexer = lexer_setup.PyGoLexer(io)
+        self.parser = parser_setup.PyGoParser(io, self.state)
+        self.runner = ast_runner.Runner(
+            io, self.state, engine=engine, memoizer=memoizer,
+            scheduler=Scheduler())
+
+    def run_line(self, line, optimizer):
+        """Runs a line, like the interactive interpreter does
+
+        :param str line:
+        :param pygolang.optimizer.Optimizer optimizer:
+        """
+        io = self.io
+        try:
+            code = self.parser.parse(line, lexer=self.lexer.lexer)
+            self.runner.run(optimizer.optimize(code))
+        except PyGoConsoleLogoffError:
+            # The parser already wrote the syntax error. Unlike the
+            # interactive interpreter, sessions don't end on those
+            pass
+        except (PyGoGrammarError, PyLangRuntimeError) as err:
+            io.to_stdout(f"Error: {err}")
+        except Exception as err:
+            io.to_stderr(
+                "Unknown error occurred. Traceback for debugging:\n"
+                f"{traceback.format_exc()}{err}")
+        io.newline()
+
+    def close(self, running_line=None):
+        """Ends the line still running, if it waits for I/O, and releases
+        the session once it's done
+
+        :param concurrent.futures.Future|None running_line:
+        """
+        scheduler = self.runner.scheduler
+        scheduler.cancel()
+        if running_line is None:
+            scheduler.shutdown()
+        else:
+            running_line.add_done_callback(lambda _: scheduler.shutdown())
+
+
+class ReplServer:
+    """Serves interpreter sessions on asyncio streams
+
+    Counters:
+        sessions: connections served, including the open ones
+        lines: lines run, by all the sessions
+    """
+
+    PROMPT = "pygo> "
+
+    def __init__(self, engine=None, optimizer=None, memoizer=None,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        """
+        :param str|None engine: see `pygolang.ast_runner.ENGINES`
+        :param pygolang.optimizer.Optimizer|None optimizer: optimizes every
+            line before it runs. Defaults to the default optimization level
+        :param pygolang.memoization.Memoizer|None memoizer: caches the
+            results of pure functions, for all the sessions
+        :param int max_workers: the most lines running at once
+        """
+        self.engine = engine
+        self.optimizer = optimizer or Optimizer()
+        self.memoizer = memoizer
+        # Its threads are started as lines need them
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='pygo-session')
+
+        # The open sessions
+        self.open_sessions = set()
+        self.sessions = 0
+        self.lines = 0
+
+    def create_session(self, writer, loop=None):
+        """
+        :param asyncio.StreamWriter writer:
+        :param asyncio.AbstractEventLoop|None loop: the loop serving the
+            connection, for sessions running their lines in the workers
+        :rtype: Session
+        """
+        return Session(SessionIO(writer, loop), self.engine, self.memoizer)
+
+    async def handle_connection(self, reader, writer):
+        """Runs the lines of a connection, until it's closed
+
+        :param asyncio.StreamReader reader:
+        :param asyncio.StreamWriter writer:
+        """
+        session = self.create_session(writer, asyncio.get_running_loop())
+        self.open_sessions.add(session)
+        self.sessions += 1
+        # The next line, read while the previous one runs
+        read = None
+        running_line = None
+        try:
+            while True:
+                writer.write(self.PROMPT.encode(ENCODING))
+                await writer.drain()
+
+                if read is None:
+                    read = asyncio.ensure_future(reader.readline())
+                line = await read
+                read = None
+                if not line:
+                    break
+                line = line.decode(ENCODING, 'replace').strip()
+                if not line:
+                    # An empty line would end the parser's input, and the
+                    # session with it
+                    continue
+
+                running_line = self.run_line(session, line)
+                # Reading while the line runs tells when the client is gone
+                read = asyncio.ensure_future(reader.readline())
+                line_done = asyncio.wrap_future(running_line)
+                await asyncio.wait(
+                    (line_done, read), return_when=asyncio.FIRST_COMPLETED)
+                if not line_done.done() and \
+                        (read.exception() is not None or not read.result()):
+                    break
+                await line_done
+                running_line = None
+                self.lines += 1
+        except ConnectionError:
+            pass
+        finally:
+            if read is not None:
+                read.cancel()
+            self.open_sessions.discard(session)
+            session.close(running_line)
+            writer.close()
+
+    def run_line(self, session, line):
+        """Runs a line of the session in a worker
+
+        :param Session session:
+        :param str line:
+        :rtype: concurrent.futures.Future
+        """
+        return self.executor.submit(session.run_line, line, self.optimizer)
+
+    async def start_tcp(self, host, port):
+        """
+        :return: the listening server. Port 0 picks a free port, the server's
+            sockets have the one picked
+        :rtype: asyncio.base_events.Server
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self, path):
+        """
+        :rtype: asyncio.base_events.Server
+        """
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    def format_report(self):
+        """
+        :rtype: str
+        """
+        return (
+            f"server: {self.sessions} sessions, {len(self.open_sessions)} "
+            f"open, {self.lines} lines run"
+        )
+
+
+def serve(server, tcp_address=None, unix_path=None):
+    """Serves sessions until interrupted
+
+    :param ReplServer server:
+    :param str|None tcp_address: "host:port" to listen on
+    :param str|None unix_path: the path of the unix socket to listen on,
+        when there's no tcp_address
+    """
+    async def serve_forever():
+        if tcp_address is not None:
+            host, _, port = tcp_address.rpartition(':')
+            listener = await server.start_tcp(host or None, int(port))
+        else:
+            listener = await server.start_unix(unix_path)
+
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
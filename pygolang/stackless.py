@@ -0,0 +1,726 @@
+import weakref
+
+from pygolang import ast, builtin, memoization
+from pygolang.compiler import ClosureCompiler
+from pygolang.scheduler import Channel
+
+
+def run_trampolined(generator):
+    """Runs compiled code, keeping the pygo call stack on the heap
+
+    Code which calls functions is compiled into generators. When such code
+    calls a function, it yields the generator of the function's body, and
+    gets sent back the value the function returned. This loop is the one
+    running the function bodies, so calling a function doesn't make the
+    python stack any deeper, no matter how deep the recursion goes.
+
+    :param generator: the generator of the code to run
+    :return: the value the code evaluated to
+    """
+    # The callers waiting for the function currently running to return
+    stack = []
+    value = None
+
+    while True:
+        try:
+            callee = generator.send(value)
+        except StopIteration as stop:
+            if not stack:
+                return stop.value
+
+            generator = stack.pop()
+            value = stop.value
+        else:
+            stack.append(generator)
+            generator = callee
+            value = None
+
+
+def _as_generator(body, frame):
+    """Runs the compiled body of a function which doesn't call functions,
+    as the generator the scheduler expects goroutines to be
+    """
+    return body(frame)
+    yield
+
+
+class StacklessCompiler(ClosureCompiler):
+    """Compiles the code so that function calls don't use the python stack
+
+    Only the code which (directly, or through its children) calls functions
+    is affected. It's compiled into generator functions, which yield the
+    bodies of the called functions to `run_trampolined`.
+    Everything else is compiled into the same plain closures as the closure
+    engine uses, and functions which don't call other functions are run
+    directly, without going through the trampoline.
+
+    Channel operations and builtin calls, which can block, are compiled into
+    generators too. This lets the code run in goroutines: the programs which
+    call functions, use channels or do I/O are run by the runner's
+    `pygolang.scheduler.Scheduler`, which trampolines the generators of
+    every goroutine on its own.
+    """
+
+    COMPILE_METHODS = {
+        **ClosureCompiler.COMPILE_METHODS,
+        ast.Go: 'compile_go',
+        ast.MakeChannel: 'compile_make_channel',
+        ast.Close: 'compile_close',
+    }
+
+    # {ast node class: name of the method that compiles it into a generator}
+    # Wrappers (Root, Statement, Expression, Return) don't need their own
+    # generator methods, they compile to whatever their child compiles to
+    GENERATOR_METHODS = {
+        ast.Program: 'generate_program_statements',
+        ast.InterpreterStart: 'generate_interpreter_start',
+        ast.Block: 'generate_block',
+        ast.Conditional: 'generate_conditional',
+        ast.For: 'generate_for',
+        ast.ForRange: 'generate_for',
+        ast.FuncBody: 'generate_func_body',
+        ast.Declaration: 'generate_declaration',
+        ast.Assignment: 'generate_assignment',
+        ast.Operator: 'generate_operator',
+        ast.LogicalOperator: 'generate_logical_operator',
+        ast.FuncCall: 'generate_func_call',
+        ast.Go: 'generate_go',
+        ast.MakeChannel: 'generate_make_channel',
+        ast.Receive: 'generate_receive',
+        ast.Send: 'generate_send',
+        ast.Close: 'generate_close',
+        ast.Select: 'generate_select',
+        ast.BuiltinCall: 'generate_builtin_call',
+    }
+
+    # The nodes which yield to the scheduler: calls, and the channel and I/O
+    # operations which can block
+    YIELDING_NODES = (
+        ast.FuncCall, ast.Receive, ast.Send, ast.Select, ast.BuiltinCall,
+    )
+
+    def __init__(self, runner):
+        super(StacklessCompiler, self).__init__(runner)
+
+        self.scheduler = runner.scheduler
+
+        # {ast node: whether running it calls functions}
+        self._makes_calls = weakref.WeakKeyDictionary()
+
+    def makes_calls(self, node):
+        """
+        :param node: any ast node
+        :return: True if running the node might call a function, or block
+            on a channel
+        """
+        if node is None or isinstance(node, ast.Value):
+            return False
+
+        if isinstance(node, list):
+            return any(self.makes_calls(elem) for elem in node)
+
+        try:
+            return self._makes_calls[node]
+        except KeyError:
+            pass
+
+        if isinstance(node, ast.Go):
+            # The function runs in the new goroutine, only its arguments are
+            # evaluated here
+            result = self.makes_calls(node.call.arguments)
+        else:
+            result = isinstance(node, self.YIELDING_NODES) or any(
+                self.makes_calls(child) for child in ast.iter_child_nodes(node)
+            )
+        self._makes_calls[node] = result
+        return result
+
+    def compile_program(self, node):
+        if not self.makes_calls(node):
+            return super(StacklessCompiler, self).compile_program(node)
+
+        code = self.compile(node)
+        frame_size = getattr(node, 'frame_size', 0)
+        scheduler = self.scheduler
+
+        def program():
+            # The program runs as the main goroutine
+            return scheduler.run(code([ast.ValueNotSet] * frame_size))
+
+        return program
+
+    def compile(self, node):
+        if not self.makes_calls(node):
+            return super(StacklessCompiler, self).compile(node)
+
+        for klass in type(node).__mro__:
+            method_name = self.GENERATOR_METHODS.get(klass)
+            if method_name is not None:
+                return getattr(self, method_name)(node)
+
+        # wrappers
+        return super(StacklessCompiler, self).compile(node)
+
+    def compile_statement_in_body(self, node):
+        if not self.makes_calls(node) or ast.is_control_flow_statement(node):
+            return super(StacklessCompiler, self).compile_statement_in_body(node)
+
+        code = self.compile(node)
+
+        def discard_value(frame):
+            yield from code(frame)
+
+        return discard_value
+
+    def compile_with_flag(self, node):
+        """
+        :return: a pair of (compiled node, whether it's a generator function)
+        """
+        return self.compile(node), self.makes_calls(node)
+
+    def generate_program_statements(self, node):
+        statements = [self.compile_with_flag(stmt) for stmt in node.statements]
+        io = self.runner.io
+
+        def program_statements(frame):
+            for stmt, is_generator in statements:
+                if is_generator:
+                    value = yield from stmt(frame)
+                else:
+                    value = stmt(frame)
+                if value is not None:
+                    io.newline()
+
+        return program_statements
+
+    def generate_interpreter_start(self, node):
+        child = self.compile(node.value)
+        io = self.runner.io
+
+        def interpreter_start(frame):
+            value = yield from child(frame)
+            if value is not None:
+                io.to_stdout(value.to_pygo_repr())
+            return value
+
+        return interpreter_start
+
+    def generate_block(self, node):
+        statements = [
+            (self.compile_statement_in_body(stmt), self.makes_calls(stmt))
+            for stmt in node.statements
+        ]
+
+        def block(frame):
+            for stmt, is_generator in statements:
+                if is_generator:
+                    value = yield from stmt(frame)
+                else:
+                    value = stmt(frame)
+                if value is not None:
+                    return value
+
+        return block
+
+    def generate_conditional(self, node):
+        branches = [
+            self.compile_with_flag(expression) + self.compile_with_flag(block)
+            for expression, block in node.expression_block_pairs
+        ]
+        final_block, final_is_generator = self.compile_with_flag(node.final_block)
+        true = ast.BoolLiteralTrue
+
+        def conditional(frame):
+            for condition, condition_is_generator, block, block_is_generator in branches:
+                if condition_is_generator:
+                    condition_value = yield from condition(frame)
+                else:
+                    condition_value = condition(frame)
+
+                # In go, there's no true-ish value, only true/false
+                if condition_value == true:
+                    if block_is_generator:
+                        return (yield from block(frame))
+                    return block(frame)
+
+            if final_is_generator:
+                return (yield from final_block(frame))
+            return final_block(frame)
+
+        return conditional
+
+    def generate_for(self, node):
+        counting_loop = ast.get_counting_loop(node)
+        if counting_loop is not None:
+            return self.generate_counting_loop(counting_loop, node.body)
+
+        init, init_is_generator = self.compile_with_flag(node.init)
+        condition, condition_is_generator = self.compile_with_flag(node.condition)
+        post, post_is_generator = self.compile_with_flag(node.post)
+        body, body_is_generator = self.compile_with_flag(node.body)
+        has_condition = node.condition is not None
+        true = ast.BoolLiteralTrue
+        loop_break, loop_continue = ast.LoopBreak, ast.LoopContinue
+
+        def for_loop(frame):
+            if init_is_generator:
+                yield from init(frame)
+            else:
+                init(frame)
+
+            while True:
+                if has_condition:
+                    if condition_is_generator:
+                        condition_value = yield from condition(frame)
+                    else:
+                        condition_value = condition(frame)
+                    if condition_value is not true:
+                        break
+
+                if body_is_generator:
+                    value = yield from body(frame)
+                else:
+                    value = body(frame)
+                if value is not None:
+                    if value is loop_break:
+                        break
+                    if value is not loop_continue:
+                        return value
+
+                if post_is_generator:
+                    yield from post(frame)
+                else:
+                    post(frame)
+
+        return for_loop
+
+    def generate_counting_loop(self, counting_loop, body):
+        start, start_is_generator = self.compile_with_flag(counting_loop.start)
+        stop, stop_is_generator = self.compile_with_flag(counting_loop.stop)
+        get_range = counting_loop.get_range
+        slot = counting_loop.slot
+        body, body_is_generator = self.compile_with_flag(body)
+        box_int = self.box_int
+        loop_break, loop_continue = ast.LoopBreak, ast.LoopContinue
+
+        def counting_loop(frame):
+            if start_is_generator:
+                start_value = yield from start(frame)
+            else:
+                start_value = start(frame)
+            if stop_is_generator:
+                stop_value = yield from stop(frame)
+            else:
+                stop_value = stop(frame)
+
+            for counter in get_range(start_value.value, stop_value.value):
+                frame[slot] = box_int(counter)
+                if body_is_generator:
+                    value = yield from body(frame)
+                else:
+                    value = body(frame)
+                if value is not None:
+                    if value is loop_break:
+                        break
+                    if value is not loop_continue:
+                        return value
+
+        return counting_loop
+
+    def generate_func_body(self, node):
+        statements = [
+            self.compile_with_flag(stmt) + (ast.is_control_flow_statement(stmt),)
+            for stmt in node.statements
+        ]
+
+        def func_body(frame):
+            value = None
+            for stmt, is_generator, is_control_flow in statements:
+                if is_generator:
+                    stmt_value = yield from stmt(frame)
+                else:
+                    stmt_value = stmt(frame)
+
+                value = stmt_value
+                if is_control_flow and value is not None:
+                    break
+            return value
+
+        return func_body
+
+    def generate_declaration(self, node):
+        name, type_, slot = node.name, node.type, node.slot
+        globals_ = self.globals
+        value, value_is_generator = self.compile_with_flag(node.value)
+
+        def declaration(frame):
+            if value_is_generator:
+                declared_value = yield from value(frame)
+            else:
+                declared_value = value(frame)
+
+            if slot is None:
+                globals_[name] = [declared_value, type_]
+            else:
+                frame[slot] = declared_value
+
+        return declaration
+
+    def generate_assignment(self, node):
+        name, slot = node.name, node.slot
+        globals_ = self.globals
+        value, value_is_generator = self.compile_with_flag(node.value)
+
+        def assignment(frame):
+            if value_is_generator:
+                assigned_value = yield from value(frame)
+            else:
+                assigned_value = value(frame)
+
+            if slot is None:
+                globals_[name][0] = assigned_value
+            else:
+                frame[slot] = assigned_value
+
+        return assignment
+
+    def generate_operator(self, node):
+        pyfunc = node.operator_pyfunc
+        operands = [self.compile_with_flag(arg) for arg in node.args_list]
+
+        def operator(frame):
+            values = []
+            for operand, is_generator in operands:
+                if is_generator:
+                    values.append((yield from operand(frame)))
+                else:
+                    values.append(operand(frame))
+            return pyfunc(*values)
+
+        return operator
+
+    def generate_logical_operator(self, node):
+        (left, left_is_generator), (right, right_is_generator) = [
+            self.compile_with_flag(arg) for arg in node.args_list
+        ]
+        short_circuit_value = node.short_circuit_value
+
+        def logical_operator(frame):
+            if left_is_generator:
+                left_value = yield from left(frame)
+            else:
+                left_value = left(frame)
+
+            if left_value == short_circuit_value:
+                return left_value
+            if right_is_generator:
+                return (yield from right(frame))
+            return right(frame)
+
+        return logical_operator
+
+    def generate_func_call(self, node):
+        if self.runner.memoizer is not None:
+            return self.generate_memoized_func_call(node)
+
+        func_name = node.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(node.arguments))
+
+        arguments = [self.compile_with_flag(arg) for arg in node.arguments]
+
+        def func_call(frame):
+            padding, body, body_is_generator = get_callee(globals_[func_name][0])
+
+            # The parameters are the first slots of the function's frame
+            func_frame = []
+            for argument, is_generator in arguments:
+                if is_generator:
+                    func_frame.append((yield from argument(frame)))
+                else:
+                    func_frame.append(argument(frame))
+            func_frame += padding
+
+            if body_is_generator:
+                # Let run_trampolined run the body, instead of the python stack
+                return (yield body(func_frame))
+            return body(func_frame)
+
+        return func_call
+
+    def generate_memoized_func_call(self, node):
+        func_name = node.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(node.arguments))
+        memoizer = self.runner.memoizer
+        cache = memoizer.cache
+        missing = memoization.MISSING
+
+        arguments = [self.compile_with_flag(arg) for arg in node.arguments]
+
+        def memoized_func_call(frame):
+            func = globals_[func_name][0]
+            padding, body, body_is_generator = get_callee(func)
+
+            func_frame = []
+            for argument, is_generator in arguments:
+                if is_generator:
+                    func_frame.append((yield from argument(frame)))
+                else:
+                    func_frame.append(argument(frame))
+
+            key = None
+            if memoizer.is_pure(func, globals_):
+                key = memoizer.get_key(func, func_frame)
+                result = cache.get(key)
+                if result is not missing:
+                    return result
+
+            func_frame += padding
+            if body_is_generator:
+                result = yield body(func_frame)
+            else:
+                result = body(func_frame)
+
+            if key is not None:
+                cache.put(key, result)
+            return result
+
+        return memoized_func_call
+
+    def compile_go(self, node):
+        call = node.call
+        func_name = call.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(call.arguments))
+        spawn = self.scheduler.spawn
+
+        arguments = [self.compile(arg) for arg in call.arguments]
+
+        def go(frame):
+            padding, body, body_is_generator = get_callee(globals_[func_name][0])
+
+            # The arguments are evaluated by the goroutine running `go`
+            func_frame = [argument(frame) for argument in arguments]
+            func_frame += padding
+
+            if body_is_generator:
+                spawn(body(func_frame))
+            else:
+                spawn(_as_generator(body, func_frame))
+
+        return go
+
+    def generate_go(self, node):
+        call = node.call
+        func_name = call.func_name
+        globals_ = self.globals
+        get_callee = self.make_callee_cache(func_name, len(call.arguments))
+        spawn = self.scheduler.spawn
+
+        arguments = [self.compile_with_flag(arg) for arg in call.arguments]
+
+        def go(frame):
+            padding, body, body_is_generator = get_callee(globals_[func_name][0])
+
+            func_frame = []
+            for argument, is_generator in arguments:
+                if is_generator:
+                    func_frame.append((yield from argument(frame)))
+                else:
+                    func_frame.append(argument(frame))
+            func_frame += padding
+
+            if body_is_generator:
+                spawn(body(func_frame))
+            else:
+                spawn(_as_generator(body, func_frame))
+
+        return go
+
+    def compile_make_channel(self, node):
+        type_ = node.type
+        if node.capacity is None:
+            def make_channel(frame):
+                return Channel(type_)
+
+            return make_channel
+
+        capacity = self.compile(node.capacity)
+
+        def make_buffered_channel(frame):
+            return Channel(type_, capacity(frame).value)
+
+        return make_buffered_channel
+
+    def generate_make_channel(self, node):
+        type_ = node.type
+        capacity = self.compile(node.capacity)
+
+        def make_buffered_channel(frame):
+            capacity_value = yield from capacity(frame)
+            return Channel(type_, capacity_value.value)
+
+        return make_buffered_channel
+
+    def compile_close(self, node):
+        channel = self.compile(node.channel)
+        close = self.scheduler.close
+
+        def close_channel(frame):
+            close(channel(frame))
+
+        return close_channel
+
+    def generate_close(self, node):
+        channel = self.compile(node.channel)
+        close = self.scheduler.close
+
+        def close_channel(frame):
+            close((yield from channel(frame)))
+
+        return close_channel
+
+    def generate_builtin_call(self, node):
+        function = builtin.BUILTINS[node.name].function
+        runner = self.runner
+        arguments = [self.compile_with_flag(arg) for arg in node.arguments]
+
+        def builtin_call(frame):
+            values = []
+            for argument, is_generator in arguments:
+                if is_generator:
+                    values.append((yield from argument(frame)))
+                else:
+                    values.append(argument(frame))
+            return (yield from function(runner, *values))
+
+        return builtin_call
+
+    def generate_receive(self, node):
+        channel, channel_is_generator = self.compile_with_flag(node.channel)
+        receive = self.scheduler.receive
+
+        def receive_value(frame):
+            if channel_is_generator:
+                channel_value = yield from channel(frame)
+            else:
+                channel_value = channel(frame)
+            return (yield from receive(channel_value))
+
+        return receive_value
+
+    def generate_send(self, node):
+        channel, channel_is_generator = self.compile_with_flag(node.channel)
+        value, value_is_generator = self.compile_with_flag(node.value)
+        send = self.scheduler.send
+
+        def send_value(frame):
+            if channel_is_generator:
+                channel_value = yield from channel(frame)
+            else:
+                channel_value = channel(frame)
+            if value_is_generator:
+                sent_value = yield from value(frame)
+            else:
+                sent_value = value(frame)
+            yield from send(channel_value, sent_value)
+
+        return send_value
+
+    def generate_select(self, node):
+        # Every case is compiled into (channel, whether it's a send, value to
+        # send, function storing the value received, block), the compiled
+        # nodes each followed by whether they're generators
+        cases = []
+        for case in node.cases:
+            operation = case.get_channel_operation()
+            is_send = isinstance(operation, ast.Send)
+
+            store = None
+            if isinstance(case.communication, (ast.Declaration, ast.Assignment)):
+                store = self.make_store(case.communication)
+
+            cases.append(
+                self.compile_with_flag(operation.channel) + (is_send,) +
+                self.compile_with_flag(operation.value if is_send else None) +
+                (store,) + self.compile_with_flag(case.block)
+            )
+
+        has_default = node.default is not None
+        default_block, default_is_generator = self.compile_with_flag(node.default)
+        select = self.scheduler.select
+        loop_break = ast.LoopBreak
+
+        def select_statement(frame):
+            # Like in go, all the channels and values to send are evaluated
+            # once, in order, before choosing a case
+            operations = []
+            for channel, channel_is_generator, is_send, value, value_is_generator, \
+                    _, _, _ in cases:
+                if channel_is_generator:
+                    channel_value = yield from channel(frame)
+                else:
+                    channel_value = channel(frame)
+
+                if value_is_generator:
+                    sent_value = yield from value(frame)
+                else:
+                    sent_value = value(frame)
+                operations.append((channel_value, is_send, sent_value))
+
+            index, received_value = yield from select(operations, has_default)
+
+            if index is None:
+                block, block_is_generator = default_block, default_is_generator
+            else:
+                *_, store, block, block_is_generator = cases[index]
+                if store is not None:
+                    store(frame, received_value)
+
+            # Selects evaluate to the value of the `return` or `continue`
+            # executed in them. `break` only ends the select
+            if block_is_generator:
+                value = yield from block(frame)
+            else:
+                value = block(frame)
+            return None if value is loop_break else value
+
+        return select_statement
+
+    def make_store(self, node):
+        """
+        :param ast.Declaration|ast.Assignment node:
+        :return: a function storing a value in the name of the node, taking
+            the frame and the value
+        """
+        name, slot = node.name, node.slot
+        globals_ = self.globals
+
+        if slot is None:
+            def store_global(frame, value):
+                globals_[name][0] = value
+
+            return store_global
+
+        def store_local(frame, value):
+            frame[slot] = value
+
+        return store_local
+
+    def get_compiled_function(self, func):
+        """
+        :param ast.FuncCreation func:
+        :return: a tuple of (number of params, list to pad the frame with,
+            after the params, compiled body, whether the body is a generator)
+        """
+        try:
+            return self._functions[func]
+        except KeyError:
+            param_count = len(func.get_params_and_types())
+            padding = [ast.ValueNotSet] * (func.frame_size - param_count)
+            compiled = self._functions[func] = (
+                param_count, padding, self.compile(func.body),
+                self.makes_calls(func.body)
+            )
+            return compiled
@@ -0,0 +1,222 @@
+import operator
+
+from pygolang import ast
+from pygolang.compiler import ClosureCompiler
+
+# {python type: the pygo value class boxing it}
+# bool is a subclass of int, so the exact type is used to look them up
+BOX_CLASSES = {
+    int: ast.Int,
+    str: ast.String,
+    bool: ast.BoolValue,
+    memoryview: ast.ByteSlice,
+    ast.Slice: ast.SliceValue,
+}
+
+# {boxed operator function: the same operator, on python values}
+# The rest of the functions of `ast.OPERATOR_TYPE_MAP` come from the
+# `operator` module, and work on python values as they are
+_UNBOXED_OPERATORS = {
+    ast.OperatorDelegatorMixin.not_: operator.not_,
+    ast._boxed_index: ast.index_bytes,
+    ast._boxed_slice: ast.slice_bytes,
+    ast._boxed_string_length: ast.string_length,
+    ast._boxed_slice_length: ast.slice_length,
+    ast._boxed_slice_capacity: ast.slice_capacity,
+    ast._boxed_reslice: ast.reslice,
+}
+for _elements in ast.SLICE_ELEMENTS.values():
+    _UNBOXED_OPERATORS.update({
+        _elements.boxed_make: _elements.make,
+        _elements.boxed_index: _elements.index,
+        _elements.boxed_set_index: _elements.set_index,
+        _elements.boxed_append: _elements.append,
+    })
+
+
+def box(value):
+    """
+    :param value: a python value, as the unboxed code produces it
+    :return: the pygo value for it. Values which are not python ints, strs,
+        bools, memoryviews or slices (functions, `ast.ValueNotSet`, None)
+        are returned as they are
+    """
+    box_class = BOX_CLASSES.get(type(value))
+    if box_class is None:
+        return value
+    return box_class(value)
+
+
+def unbox(value):
+    """
+    :param value: a pygo value, or `ast.ValueNotSet`
+    :return: the python value it boxes
+    """
+    if value is ast.ValueNotSet:
+        return value
+    return value.value
+
+
+def _get_memo_key(func, arguments):
+    return (func,) + tuple(arguments)
+
+
+class UnboxedCompiler(ClosureCompiler):
+    """Compiles the code into closures working on plain python values
+
+    The closure engine computes with pygo values (`ast.Int`, `ast.String`,
+    `ast.BoolValue`), so every operation allocates a new one. Here, the
+    closures compute with the python ints, strs and bools these box.
+    Values are only boxed when they leave the compiled code:
+    - when printed, or returned from running the program
+    - when stored in the module scope, which the interpreter, the parser
+      and the users of `pygolang.run_source` see as well
+
+    Function frames hold python values.
+    """
+
+    # Python values are hashable as they are
+    get_memo_key = staticmethod(_get_memo_key)
+
+    def compile_program(self, node):
+        program = super(UnboxedCompiler, self).compile_program(node)
+
+        def boxed_program():
+            return box(program())
+
+        return boxed_program
+
+    def compile_interpreter_start(self, node):
+        child = self.compile(node.value)
+        io = self.runner.io
+
+        def interpreter_start(frame):
+            value = box(child(frame))
+            if value is not None:
+                io.to_stdout(value.to_pygo_repr())
+            return value
+
+        return interpreter_start
+
+    def compile_conditional(self, node):
+        branches = [
+            (self.compile(expression), self.compile(block))
+            for expression, block in node.expression_block_pairs
+        ]
+        final_block = self.compile(node.final_block)
+
+        def conditional(frame):
+            for condition, block in branches:
+                # Conditions are python bools, nothing else type checks
+                if condition(frame):
+                    return block(frame)
+            return final_block(frame)
+
+        return conditional
+
+    def compile_test(self, node):
+        if node is None:
+            return super(UnboxedCompiler, self).compile_test(node)
+        # Conditions are python bools already
+        return self.compile(node)
+
+    def compile_counting_loop(self, counting_loop, body):
+        # The counter is stored in its slot as the python int it is
+        start = self.compile(counting_loop.start)
+        stop = self.compile(counting_loop.stop)
+        get_range = counting_loop.get_range
+        slot = counting_loop.slot
+
+        if not ast.can_jump(body):
+            statement = self.compile_plain_body(body)
+
+            def plain_counting_loop(frame):
+                for frame[slot] in get_range(start(frame), stop(frame)):
+                    statement(frame)
+
+            return plain_counting_loop
+
+        body = self.compile(body)
+        loop_break, loop_continue = ast.LoopBreak, ast.LoopContinue
+
+        def counting_loop(frame):
+            for frame[slot] in get_range(start(frame), stop(frame)):
+                value = body(frame)
+                if value is not None:
+                    if value is loop_break:
+                        break
+                    if value is not loop_continue:
+                        return value
+
+        return counting_loop
+
+    def compile_declaration(self, node):
+        if node.slot is not None or node.value is ast.ValueNotSet:
+            return super(UnboxedCompiler, self).compile_declaration(node)
+
+        name, type_ = node.name, node.type
+        globals_ = self.globals
+        value = self.compile(node.value)
+
+        def declare_global_with_value(frame):
+            globals_[name] = [box(value(frame)), type_]
+
+        return declare_global_with_value
+
+    def compile_assignment(self, node):
+        if node.slot is not None:
+            return super(UnboxedCompiler, self).compile_assignment(node)
+
+        name = node.name
+        globals_ = self.globals
+        value = self.compile(node.value)
+
+        def assign_global(frame):
+            globals_[name][0] = box(value(frame))
+
+        return assign_global
+
+    def compile_name(self, node):
+        if node.slot is not None:
+            return super(UnboxedCompiler, self).compile_name(node)
+
+        name = node.value
+        globals_ = self.globals
+
+        def load_global(frame):
+            try:
+                return unbox(globals_[name][0])
+            except KeyError:
+                # The parser should have prevented this
+                return None
+
+        return load_global
+
+    def compile_value(self, node):
+        value = node.value
+
+        def python_value(frame):
+            return value
+
+        return python_value
+
+    @staticmethod
+    def get_operator_pyfunc(node):
+        pyfunc = node.operator_pyfunc
+        return _UNBOXED_OPERATORS.get(pyfunc, pyfunc)
+
+    @staticmethod
+    def get_kernel_function(node):
+        return node.kernel.run
+
+    def compile_logical_operator(self, node):
+        left, right = [self.compile(arg) for arg in node.args_list]
+        short_circuit_value = node.short_circuit_value.value
+
+        def logical_operator(frame):
+            left_value = left(frame)
+            if left_value is short_circuit_value:
+                return left_value
+            return right(frame)
+
+        return logical_operator
@@ -0,0 +1,249 @@
+"""Running element-wise loops over `[]int` slices as NumPy operations
+
+A loop like
+    for i := range a {
+        b[i] = a[i] * k + c
+    }
+only does arithmetic on the i-th elements of slices, so its iterations
+don't depend on each other. The `VectorizeLoops` optimization pass replaces
+such loops with `ast.VectorizedLoop`s, which run them as NumPy operations
+on whole buffers at once: `b = a * k + c`, without a pygo value for any
+element.
+
+The loops which can be vectorized:
+- count ints (see `ast.get_counting_loop`), from a start to a stop
+  computed without side effects
+- have a body made only of `s[i] = expression` statements, `s` being a
+  `[]int` and `i` the counter
+- whose expressions are made of `+`, `-` and `*`, int literals, int
+  names, the counter, and elements `s[i]` of `[]int` slices
+
+NumPy's int64 operations wrap around like go's, and so do the elements of
+`[]int`s, so the results are the same as running the loop. At run-time, the
+loop still runs as it is when it's short, when a slice is nil or too
+short for the counter, or when slices sharing a buffer start at different
+offsets, so one could read what another changed in an earlier iteration.
+
+NumPy is optional: without it, the loops are left as they are.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pygolang import ast
+
+# Loops running fewer iterations than this run as they are: starting a
+# NumPy operation takes about as long as a few dozen iterations
+MIN_LENGTH = 64
+
+_ARITHMETIC = ('+', '-', '*')
+
+if numpy is not None:
+    _UFUNCS = {'+': numpy.add, '-': numpy.subtract, '*': numpy.multiply}
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+class VectorKernel:
+    """The body of a vectorized loop, as NumPy operations
+
+    Its expressions are tuples, so it can be pickled:
+    - ('const', value): an int literal
+    - ('counter',): the counter of the loop
+    - ('scalar', index): an int operand
+    - ('vector', index): the element of a slice operand
+    - (operator, left, right): `+`, `-` or `*` on 2 expressions
+    """
+
+    def __init__(self, counting_loop, slice_count, assignments):
+        """
+        :param ast.CountingLoop counting_loop:
+        :param int slice_count: the number of slices among the operands.
+            They come first, then the ints
+        :param list[tuple] assignments: (index of the slice, expression),
+            for the `s[i] = expression` statements of the body
+        """
+        self.counting_loop = counting_loop
+        self.slice_count = slice_count
+        self.assignments = assignments
+
+    def run(self, start, stop, *operands):
+        """Runs all the iterations of the loop, on python values
+
+        :param int start: the value of the start of the counter
+        :param int stop: the value of the stop of the counter
+        :param operands: the `Slice`s, then the ints
+        :return: whether the loop ran. When it didn't, nothing was changed,
+            and the loop has to run as it is
+        :rtype: bool
+        """
+        if type(start) is not int or type(stop) is not int:
+            return False
+        indexes = self.counting_loop.get_range(start, stop)
+        if len(indexes) < MIN_LENGTH:
+            return False
+        # The order of the iterations doesn't matter
+        if indexes.step < 0:
+            indexes = indexes[::-1]
+
+        slices = operands[:self.slice_count]
+        scalars = operands[self.slice_count:]
+        if any(type(scalar) is not int for scalar in scalars):
+            return False
+
+        offsets = {}
+        for sequence in slices:
+            if sequence is ast.ValueNotSet or indexes[0] < 0 or \
+                    indexes[-1] >= sequence.length:
+                return False
+            # Slices sharing a buffer at different offsets would see the
+            # elements changed by the other ones in earlier iterations
+            if offsets.setdefault(id(sequence.buffer), sequence.offset) != sequence.offset:
+                return False
+
+        vectors = [
+            numpy.frombuffer(sequence.buffer, dtype=numpy.int64)[
+                sequence.offset + indexes.start:
+                sequence.offset + indexes.stop:
+                indexes.step]
+            for sequence in slices
+        ]
+        with numpy.errstate(over='ignore'):
+            for target, expression in self.assignments:
+                vectors[target][...] = self.evaluate(
+                    expression, indexes, vectors, scalars)
+        return True
+
+    def boxed_run(self, start, stop, *operands):
+        """`run`, on pygo values"""
+        return self.run(*[
+            operand if operand is ast.ValueNotSet else operand.value
+            for operand in (start, stop) + operands
+        ])
+
+    def evaluate(self, expression, indexes, vectors, scalars):
+        """
+        :return: the values of the expression, for all the iterations: an
+            int64 array, or a single int64 when they're all the same
+        """
+        kind = expression[0]
+        if kind == 'vector':
+            return vectors[expression[1]]
+        if kind == 'scalar':
+            return numpy.int64(ast.wrap_int64(scalars[expression[1]]))
+        if kind == 'const':
+            return numpy.int64(expression[1])
+        if kind == 'counter':
+            return numpy.arange(
+                indexes.start, indexes.stop, indexes.step, dtype=numpy.int64)
+
+        operator, left, right = expression
+        return _UFUNCS[operator](
+            self.evaluate(left, indexes, vectors, scalars),
+            self.evaluate(right, indexes, vectors, scalars))
+
+
+class _KernelBuilder:
+    """Translates the body of a loop into the expressions of a kernel,
+    collecting the names they use as operands
+    """
+
+    def __init__(self, counter_slot):
+        self.counter_slot = counter_slot
+        # {name node: index}, for the slices, and for the ints
+        self.slices = {}
+        self.scalars = {}
+
+    def is_counter(self, node):
+        return isinstance(node, ast.Name) and node.slot == self.counter_slot
+
+    def build_assignment(self, statement):
+        if not isinstance(statement, ast.SetIndex) or \
+                statement.operator_pyfunc != ast.INT_ELEMENTS.boxed_set_index:
+            raise NotVectorizable()
+        sequence, index, value = [
+            ast.unwrap_expression(arg) for arg in statement.args_list]
+        return self.build_slice(sequence, index), self.build_expression(value)
+
+    def build_slice(self, sequence, index):
+        if not isinstance(sequence, ast.Name) or self.is_counter(sequence) or \
+                not self.is_counter(index):
+            raise NotVectorizable()
+        return self.slices.setdefault(sequence, len(self.slices))
+
+    def build_expression(self, node):
+        """
+        :param node: an int expression
+        """
+        node = ast.unwrap_expression(node)
+        if isinstance(node, ast.Int):
+            return 'const', ast.wrap_int64(node.value)
+
+        if isinstance(node, ast.Name):
+            if self.is_counter(node):
+                return 'counter',
+            return 'scalar', self.scalars.setdefault(node, len(self.scalars))
+
+        if isinstance(node, ast.Index) and \
+                node.operator_pyfunc == ast.INT_ELEMENTS.boxed_index:
+            sequence, index = [ast.unwrap_expression(arg) for arg in node.args_list]
+            return 'vector', self.build_slice(sequence, index)
+
+        if type(node) is ast.Operator and node.operator in _ARITHMETIC and \
+                node.type == ast.IntType:
+            left, right = node.args_list
+            return node.operator, self.build_expression(left), self.build_expression(right)
+
+        raise NotVectorizable()
+
+
+def _is_side_effect_free(node, counter_slot):
+    """
+    :return: whether evaluating the expression only computes a value, which
+        doesn't depend on the counter of the loop, so it can be evaluated
+        again when the loop runs as it is
+    """
+    node = ast.unwrap_expression(node)
+    if isinstance(node, ast.Value):
+        return True
+    if isinstance(node, ast.Name):
+        return node.slot != counter_slot
+    if isinstance(node, ast.Operator) and \
+            not isinstance(node, (ast.Append, ast.MakeSlice, ast.SetIndex)):
+        return all(_is_side_effect_free(arg, counter_slot) for arg in node.args_list)
+    return False
+
+
+def vectorize_loop(loop):
+    """
+    :param ast.For|ast.ForRange loop:
+    :return: the loop, vectorized, or None if it can't be
+    :rtype: ast.VectorizedLoop|None
+    """
+    if numpy is None:
+        return None
+
+    counting_loop = ast.get_counting_loop(loop)
+    if counting_loop is None or counting_loop.slot is None:
+        return None
+    bounds = [counting_loop.start, counting_loop.stop]
+    if not all(_is_side_effect_free(bound, counting_loop.slot) for bound in bounds):
+        return None
+
+    statements = [ast.unwrap_statement(stmt) for stmt in loop.body.statements]
+    builder = _KernelBuilder(counting_loop.slot)
+    try:
+        assignments = [builder.build_assignment(stmt) for stmt in statements]
+    except NotVectorizable:
+        return None
+    if not assignments:
+        return None
+
+    kernel = VectorKernel(counting_loop, len(builder.slices), assignments)
+    # The dicts keep the order the names were found in, which is the order
+    # of their indexes
+    operands = bounds + list(builder.slices) + list(builder.scalars)
+    return ast.VectorizedLoop(loop, operands, kernel)
@@ -0,0 +1,17 @@
+import pytest
+
+from pygolang import ast_runner, optimizer
+
+
+@pytest.fixture(autouse=True, params=ast_runner.ENGINES)
+def engine(request, monkeypatch):
+    """Runs every integration test against all the execution engines"""
+    monkeypatch.setattr(ast_runner, 'DEFAULT_ENGINE', request.param)
+    return request.param
+
+
+@pytest.fixture(autouse=True, params=[0, 3], ids=['O0', 'O3'])
+def optimization_level(request, monkeypatch):
+    """...with the code unoptimized, and with all the optimizations"""
+    monkeypatch.setattr(optimizer, 'DEFAULT_LEVEL', request.param)
+    return request.param
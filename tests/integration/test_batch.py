@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from pygolang.__main__ import main as cli_main
+from pygolang.batch import run_batch
+
+FIB = """
+func fib(n int) int {
+    if n < 2 {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+fib(%d)
+"""
+
+
+def test_results_come_in_the_order_of_the_programs():
+    sources = [FIB % n for n in range(10)]
+
+    results = list(run_batch(sources, max_workers=2, chunksize=3))
+
+    assert [index for index, _ in results] == list(range(10))
+    assert [result.stdout for _, result in results] == [
+        '0\n', '1\n', '1\n', '2\n', '3\n', '5\n', '8\n', '13\n', '21\n', '34\n',
+    ]
+
+
+def test_unordered_results_cover_all_the_programs():
+    results = run_batch(
+        ['x := 1', '"a" + 1', 'y := "b"'], max_workers=2, chunksize=1,
+        ordered=False)
+
+    by_index = dict(results)
+
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0].names == {'x': '1'}
+    assert by_index[1].error.startswith("Invalid operation (+)")
+    assert by_index[2].names == {'y': '"b"'}
+
+
+def test_programs_running_for_too_long_are_stopped(engine):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine recurses without limits")
+
+    [(_, looping), (_, next_one)] = run_batch(
+        ['func f(n int) int { return f(n) }\nf(1)', '2'], max_workers=1,
+        timeout=0.3)
+
+    assert looping.error == "The program ran for more than 0.3s"
+    assert next_one.stdout == '2\n'
+
+
+def test_cli_prints_a_json_line_for_every_file(tmp_path, capsys):
+    paths = []
+    for name, source in [('a.go', 'x := 2\nx * 3'), ('b.go', '1 +')]:
+        (tmp_path / name).write_text(source)
+        paths.append(str(tmp_path / name))
+
+    assert cli_main(['batch', *paths, '--workers', '2']) == 1
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line['path'] for line in lines] == paths
+    assert lines[0]['stdout'] == '6\n'
+    assert lines[1]['error'] == "Syntax error: unexpected end of file"
@@ -0,0 +1,102 @@
+import pytest
+
+import pygolang
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from tests.integration.io_callback_fixture import FakeIO
+
+COUNT_BYTE = """
+func count(data []byte, byte int, total int) int {
+    if len(data) == 0 {
+        return total
+    }
+    if data[0] == byte {
+        return count(data[1:], byte, total + 1)
+    }
+    return count(data[1:], byte, total)
+}
+"""
+
+
+@pytest.fixture
+def stackless_only(engine):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine can do I/O")
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_files_are_read_as_byte_slices(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_bytes(b'a,b\nc,d\n')
+    io = FakeIO([])
+
+    pygolang.run_source(COUNT_BYTE + f"""
+data := readfile("{path}")
+len(data)
+data[0]
+data[2:5]
+data[:2]
+data[6:]
+count(data, 44, 0)
+""", io=io)
+
+    assert io.stdout == ['8', '97', '[98 10 99]', '[97 44]', '[100 10]', '2']
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_byte_slices_share_the_mapped_file(tmp_path):
+    path, empty = tmp_path / 'data.txt', tmp_path / 'empty.txt'
+    path.write_bytes(b'0123456789')
+    empty.touch()
+    io = FakeIO([])
+
+    names = pygolang.run_source(f"""
+f := open("{path}")
+data := mapfile(f)
+closefd(f)
+tail := data[4:][2:]
+tail
+len(readfile("{empty}"))
+""", io=io)
+
+    assert io.stdout == ['[54 55 56 57]', '0']
+    # Sub slices are views of the mapping, not copies
+    (tail, _), (data, _) = names['tail'], names['data']
+    assert tail.value.obj is data.value.obj
+    assert tail.value.readonly
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_out_of_range_indexes_stop_the_program(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_bytes(b'abc')
+
+    with pytest.raises(PyLangRuntimeError, match=r"index out of range \[3\] with length 3"):
+        pygolang.run_source(f'readfile("{path}")[3]', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match=r"slice bounds out of range \[2:1\]"):
+        pygolang.run_source(f'readfile("{path}")[2:1]', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match="readfile: No such file"):
+        pygolang.run_source(f'readfile("{tmp_path / "missing"}")', io=FakeIO([]))
+
+
+def test_nil_byte_slices_are_empty():
+    io = FakeIO([])
+
+    pygolang.run_source('var data []byte\nlen(data)\nlen(data[:])\nlen("αβ")', io=io)
+
+    assert io.stdout == ['0', '0', '4']
+
+
+def test_slice_operations_are_type_checked():
+    with pytest.raises(PyGoGrammarError, match="index of non-slice type"):
+        pygolang.run_source('x := 3\nx[0]', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match="index with non-int type"):
+        pygolang.run_source('var data []byte\ndata["a"]', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match="len of non-slice type"):
+        pygolang.run_source('len(3)', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match=r"not implemented: \[\]float"):
+        pygolang.run_source('var data []float', io=FakeIO([]))
@@ -92,3 +92,31 @@ def test_function_that_uses_global_scope_and_arguments_to_produce_result_qm7():
     assert not io.stderr, io.format_stderr_for_debugging()
 
     assert io.stdout == ['7']
+
+
+def test_calling_function_with_many_params():
+    io = FakeIO([
+        "func digits(a int, b int, c int, d int) int {return a * 1000 + b * 100 + c * 10 + d}",
+        "func join(a, b int, c, d string) string {return c + d}",
+        "digits(1, 2, 3, 4)",
+        'join(1, 2, "x", "y")',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1234', '"xy"']
+
+
+def test_functions_dont_see_the_variables_of_their_callers():
+    io = FakeIO([
+        "var x int = 1",
+        "func get_x() int {return x}",
+        "func shadow(x int) int {return get_x() + x}",
+        "shadow(10)",
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['11']
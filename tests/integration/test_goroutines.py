@@ -0,0 +1,327 @@
+import pytest
+
+import pygolang
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from pygolang.interpreter import main
+from pygolang.scheduler import Scheduler
+from tests.integration.io_callback_fixture import FakeIO
+
+PIPELINE = """
+func produce(out chan int, n int) int {
+    if n > 0 {
+        out <- n
+        return produce(out, n - 1)
+    }
+    close(out)
+    return 0
+}
+
+func square(in chan int, out chan int) int {
+    v := <-in
+    if v == 0 {
+        close(out)
+        return 0
+    }
+    out <- v * v
+    return square(in, out)
+}
+
+func sum(in chan int, total int) int {
+    v := <-in
+    if v == 0 {
+        return total
+    }
+    return sum(in, total + v)
+}
+
+numbers := make(chan int)
+squares := make(chan int, 3)
+go produce(numbers, 10)
+go square(numbers, squares)
+sum(squares, 0)
+"""
+
+
+@pytest.fixture(autouse=True)
+def stackless_only(engine):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine has goroutines")
+
+
+def test_goroutines_communicate_through_channels():
+    io = FakeIO([])
+    scheduler = Scheduler()
+
+    pygolang.run_source(PIPELINE, io=io, scheduler=scheduler)
+
+    assert io.stdout == ['385']
+    assert scheduler.spawned == 2
+    assert scheduler.alive == 0
+    assert scheduler.blocked == 0
+    assert scheduler.waits > 0
+
+
+def test_receiving_at_the_start_of_a_line_doesnt_send_the_line_before():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+func work(done chan int) int {
+    done <- 1
+    return 0
+}
+func wait(done chan int) int {
+    go work(done)
+    len("statement")
+    <-done
+    return 2
+}
+done := make(chan int)
+go work(done)
+len("statement")
+<-done
+wait(done)
+""", io=io)
+
+    assert io.stdout == ['9', '1', '2']
+
+
+def test_goroutines_keep_running_on_the_next_lines():
+    io = FakeIO([
+        'ch := make(chan int)',
+        'func double(c chan int, v int) int { c <- v * 2 return 0 }',
+        'go double(ch, 21)',
+        '<-ch',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['42']
+
+
+def test_buffered_channels_only_block_when_full():
+    io = FakeIO([
+        'ch := make(chan string, 2)',
+        'ch <- "a"',
+        'ch <- "b"',
+        '<-ch + <-ch',
+        'ch <- "a"',
+        'ch <- "b"',
+        'ch <- "c"',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['"ab"', 'Error: all goroutines are asleep - deadlock!']
+
+
+def test_receiving_from_closed_channels_gives_the_zero_value():
+    io = FakeIO([
+        'ch := make(chan int, 1)',
+        'ch <- 5',
+        'close(ch)',
+        '<-ch',
+        '<-ch',
+        'ch <- 1',
+        'close(ch)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == [
+        '5', '0', 'Error: send on closed channel', 'Error: close of closed channel',
+    ]
+
+
+def test_closing_a_channel_wakes_up_its_receivers():
+    io = FakeIO([
+        'ch := make(chan bool)',
+        'done := make(chan int)',
+        'func wait(c chan bool, d chan int) int { v := <-c if v { return 0 } d <- 1 return 0 }',
+        'go wait(ch, done)',
+        'go wait(ch, done)',
+        'close(ch)',
+        '<-done + <-done',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['2']
+
+
+def test_nil_channels_block_forever():
+    io = FakeIO([
+        'var ch chan int',
+        '<-ch',
+        'close(ch)',
+    ])
+
+    main(io)
+
+    assert io.stdout == [
+        'Error: all goroutines are asleep - deadlock!', 'Error: close of nil channel',
+    ]
+
+
+def test_select_runs_a_ready_case():
+    io = FakeIO([
+        'func pick(a chan int, b chan string) int {'
+        '    select { case v := <-a: return v case s := <-b: return 0 - 1 } '
+        '    return 0 }',
+        'a := make(chan int, 1)',
+        'b := make(chan string, 1)',
+        'a <- 7',
+        'pick(a, b)',
+        'b <- "x"',
+        'pick(a, b)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['7', '-1']
+
+
+def test_select_waits_for_a_case_to_be_ready():
+    io = FakeIO([
+        'func send(c chan int) int { c <- 3 return 0 }',
+        'func receive(a chan int, b chan int, out chan int) int {'
+        '    select { case a <- 1: out <- 0 case v := <-b: out <- v }'
+        '    return 0 }',
+        'a := make(chan int)',
+        'b := make(chan int)',
+        'out := make(chan int)',
+        'go receive(a, b, out)',
+        'go send(b)',
+        '<-out',
+        # The case sending to `a` didn't run, so a's receivers wait
+        'go receive(a, b, out)',
+        '<-a',
+        '<-out',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['3', '1', '0']
+
+
+def test_select_default_runs_when_nothing_is_ready():
+    io = FakeIO([
+        'x := 0',
+        'ch := make(chan int)',
+        'select { case x = <-ch: x = x + 1 default: x = 10 }',
+        'x',
+        'select {}',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['10', 'Error: all goroutines are asleep - deadlock!']
+
+
+def test_break_only_ends_the_select():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+ch := make(chan int, 3)
+ch <- 1
+ch <- 2
+ch <- 3
+received := 0
+skipped := 0
+for i := 0; i < 4; i++ {
+    select {
+    case v := <-ch:
+        if v == 2 {
+            continue
+        }
+        received += v
+        break
+        received = 100
+    default:
+        skipped++
+        break
+    }
+    skipped += 10
+}
+received
+skipped
+select {
+default:
+    break
+}
+""", io=io)
+
+    assert io.stdout == ['4', '31']
+
+
+def test_thousands_of_goroutines():
+    io = FakeIO([])
+    source = """
+func worker(in chan int, out chan int) int {
+    out <- <-in + 1
+    return 0
+}
+
+func chain(in chan int, n int) chan int {
+    if n == 0 {
+        return in
+    }
+    out := make(chan int)
+    go worker(in, out)
+    return chain(out, n - 1)
+}
+
+first := make(chan int)
+last := chain(first, 5000)
+first <- 0
+<-last
+"""
+    scheduler = Scheduler()
+
+    pygolang.run_source(source, io=io, scheduler=scheduler)
+
+    assert io.stdout == ['5000']
+    assert scheduler.spawned == 5000
+
+
+def test_channel_operations_are_type_checked():
+    with pytest.raises(PyGoGrammarError, match="Can't send type"):
+        pygolang.run_source('ch := make(chan int, 1)\nch <- "a"', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match="non-chan type"):
+        pygolang.run_source('x := 1\n<-x', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match="must be a function call"):
+        pygolang.run_source('go 1', io=FakeIO([]))
+
+
+def test_goroutine_errors_stop_the_program():
+    scheduler = Scheduler()
+    source = """
+func send(c chan int) int {
+    c <- 1
+    return 0
+}
+closed := make(chan int)
+close(closed)
+go send(closed)
+go send(make(chan int))
+<-make(chan int)
+"""
+
+    with pytest.raises(PyLangRuntimeError, match="send on closed channel"):
+        pygolang.run_source(source, io=FakeIO([]), scheduler=scheduler)
+
+    assert scheduler.alive == 0
+
+
+def test_other_engines_raise_errors():
+    for engine in ('tree', 'closure', 'unboxed'):
+        with pytest.raises(PyLangRuntimeError, match="stackless engine"):
+            pygolang.run_source('ch := make(chan int)', io=FakeIO([]), engine=engine)
@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 from pygolang import ast
 from pygolang.interpreter import main
 from tests.integration.io_callback_fixture import FakeIO
@@ -72,3 +75,12 @@ def test_operators_and_expressions():
     assert not io.stderr, io.format_stderr_for_debugging()
     assert io.stdout == ['4']
 
+
+
+def test_runs_as_a_module_without_warnings():
+    process = subprocess.run(
+        [sys.executable, '-W', 'error', '-m', 'pygolang.interpreter'],
+        input='1 + 2\n', capture_output=True, text=True, timeout=60)
+
+    assert process.stderr == ''
+    assert process.stdout == 'pygo> 3\npygo> '
@@ -0,0 +1,183 @@
+import pytest
+
+import pygolang
+from pygolang import builtin, interpreter
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from pygolang.scheduler import Scheduler
+from tests.integration.io_callback_fixture import FakeIO
+
+ECHO_SERVER = """
+func echo(conn int) int {
+    s := read(conn, 1024)
+    if s == "" {
+        closefd(conn)
+        return 0
+    }
+    write(conn, s)
+    return echo(conn)
+}
+
+func serve(listener int, connections int) int {
+    if connections == 0 {
+        return 0
+    }
+    go echo(accept(listener))
+    return serve(listener, connections - 1)
+}
+
+func client(path string, message string, out chan string) int {
+    conn := dial("unix", path)
+    write(conn, message)
+    reply := read(conn, 1024)
+    closefd(conn)
+    out <- reply
+    return 0
+}
+
+listener := listen("unix", "{path}")
+replies := make(chan string)
+go serve(listener, 2)
+go client("{path}", "ping", replies)
+go client("{path}", "ping", replies)
+<-replies + <-replies
+"""
+
+
+@pytest.fixture
+def stackless_only(engine):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine can do I/O")
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_goroutines_wait_for_sockets_without_blocking_each_other(tmp_path):
+    io = FakeIO([])
+    scheduler = Scheduler()
+    source = ECHO_SERVER.replace('{path}', str(tmp_path / 'echo.sock'))
+
+    try:
+        pygolang.run_source(source, io=io, scheduler=scheduler)
+    finally:
+        scheduler.shutdown()
+
+    assert io.stdout == ['"pingping"']
+    # The echo goroutines hadn't seen their clients close yet, when main returned
+    assert scheduler.alive > 0
+    assert scheduler.event_loop is None
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_files_are_read_and_written_by_worker_threads(tmp_path):
+    io = FakeIO([])
+    scheduler = Scheduler()
+    path = tmp_path / 'file.txt'
+    source = f"""
+f := create("{path}")
+write(f, "hello, file")
+closefd(f)
+f = open("{path}")
+read(f, 5)
+read(f, 100)
+read(f, 100)
+closefd(f)
+"""
+
+    pygolang.run_source(source, io=io, scheduler=scheduler)
+
+    assert io.stdout == ['"hello"', '", file"', '""']
+    assert path.read_text() == 'hello, file'
+    assert scheduler.event_loop.thread_calls == 6
+    scheduler.shutdown()
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_readline_reads_stdin():
+    io = FakeIO(['first line'])
+
+    pygolang.run_source('readline()\nreadline()', io=io)
+
+    assert io.stdout == ['"first line"', '""']
+
+
+JOIN_TOKENS = """
+func join(fd int, joined string) string {
+    if scan(fd) {
+        return join(fd, joined + "|" + scantext(fd))
+    }
+    return joined
+}
+"""
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_scanners_split_stdin_into_lines():
+    io = FakeIO(['first line', 'second line'])
+
+    pygolang.run_source(JOIN_TOKENS + 'join(0, "")\nscan(0)', io=io)
+
+    assert io.stdout == ['"|first line|second line"', 'false']
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_programs_run_unattended_scan_an_empty_stdin(engine):
+    result = interpreter.run_program('scan(0)\nscantext(0)\nreadline()', engine=engine)
+
+    assert result.error is None
+    assert result.stdout == 'false\n""\n""\n'
+
+
+@pytest.mark.usefixtures('stackless_only')
+@pytest.mark.parametrize('chunk_size', [3, builtin.SCAN_CHUNK_SIZE])
+def test_scanners_read_files_in_chunks(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(builtin, 'SCAN_CHUNK_SIZE', chunk_size)
+    lines, words = tmp_path / 'lines.txt', tmp_path / 'words.txt'
+    lines.write_bytes('αβγ\r\n\nlast, no newline'.encode())
+    words.write_text('  one two\n\tthree   four\n')
+    io = FakeIO([])
+    scheduler = Scheduler()
+
+    pygolang.run_source(JOIN_TOKENS + f"""
+join(open("{lines}"), "")
+f := open("{words}")
+scanner(f, "words")
+join(f, "")
+""", io=io, scheduler=scheduler)
+
+    assert io.stdout == ['"|αβγ||last, no newline"', '"|one|two|three|four"']
+    if chunk_size == 3:
+        assert scheduler.event_loop.thread_calls > 10
+    else:
+        # 2 opens, then a read of the whole file, and one telling its end
+        assert scheduler.event_loop.thread_calls == 6
+    scheduler.shutdown()
+
+
+@pytest.mark.usefixtures('stackless_only')
+def test_os_errors_stop_the_program(tmp_path):
+    with pytest.raises(PyLangRuntimeError, match="open: No such file"):
+        pygolang.run_source(f'open("{tmp_path / "missing"}")', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match="Unknown network"):
+        pygolang.run_source('listen("udp", ":80")', io=FakeIO([]))
+
+
+def test_builtin_calls_are_type_checked():
+    with pytest.raises(PyGoGrammarError, match="takes 2 arguments, not 1"):
+        pygolang.run_source('read(0)', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match=r"Can't pass type \(int\)"):
+        pygolang.run_source('write(1, 2)', io=FakeIO([]))
+
+
+def test_declared_functions_hide_builtins():
+    io = FakeIO([])
+
+    pygolang.run_source('func read(x int) int { return x * 2 }\nread(21)', io=io)
+
+    assert io.stdout == ['42']
+
+
+def test_other_engines_raise_errors():
+    for engine in ('tree', 'closure', 'unboxed'):
+        with pytest.raises(PyLangRuntimeError, match=r"readline\(\) needs the stackless"):
+            pygolang.run_source('readline()', io=FakeIO([]), engine=engine)
@@ -0,0 +1,174 @@
+import pytest
+
+import pygolang
+from pygolang.errors import PyGoGrammarError
+from tests.integration.io_callback_fixture import FakeIO
+
+
+def run(source):
+    io = FakeIO([])
+    pygolang.run_source(source, io=io)
+    return io.stdout
+
+
+def test_three_clause_loops():
+    assert run("""
+sum := 0
+for i := 0; i < 10; i++ {
+    sum += i
+}
+sum
+for i := 10; i >= 0; i -= 3 {
+    sum = sum * 10 + i
+}
+sum
+""") == ['45', '460741']
+
+
+def test_condition_only_loops():
+    assert run("""
+n := 1
+for n < 1000 {
+    n = n * 3
+}
+n
+""") == ['2187']
+
+
+def test_infinite_loops_end_with_break_and_skip_with_continue():
+    assert run("""
+n := 0
+skipped := 0
+for {
+    n++
+    if n % 3 == 0 {
+        skipped++
+        continue
+    }
+    if n > 10 {
+        break
+    }
+}
+n
+skipped
+""") == ['11', '3']
+
+
+def test_range_loops_count_from_zero():
+    assert run("""
+sum := 0
+n := 4
+for i := range n {
+    n = 100
+    sum = sum * 10 + i
+}
+sum
+for i := range 0 {
+    sum = i
+}
+sum
+""") == ['123', '123']
+
+
+def test_returns_end_the_loop_and_the_function():
+    assert run("""
+func first_square_above(n int) int {
+    for i := 0; i < n; i++ {
+        if i * i > n {
+            return i
+        }
+    }
+    return 1000
+}
+first_square_above(50)
+first_square_above(0)
+""") == ['8', '1000']
+
+
+def test_break_and_continue_apply_to_the_innermost_loop():
+    assert run("""
+pairs := 0
+for i := 0; i < 5; i++ {
+    for j := 0; j < 5; j++ {
+        if j > i {
+            break
+        }
+        if j == 1 {
+            continue
+        }
+        pairs++
+    }
+}
+pairs
+""") == ['11']
+
+
+def test_loops_changing_their_counter_or_bound():
+    # These don't count ints on a python range: the condition is evaluated
+    # every time
+    assert run("""
+steps := 0
+for i := 0; i < 20; i++ {
+    i = i * 2
+    steps++
+}
+limit := 10
+for i := 0; i < limit; i++ {
+    limit = limit - 1
+    steps++
+}
+steps
+""") == ['10']
+
+
+def test_loops_changing_the_slice_elements_of_their_bound():
+    assert run("""
+func steps(s []int) int {
+    c := 0
+    for i := 0; i < s[0]; i++ {
+        s[0] = s[0] - 1
+        c += 1
+    }
+    return c
+}
+s := make([]int, 1)
+s[0] = 10
+steps(s)
+""") == ['5']
+
+
+def test_loops_calling_functions():
+    assert run("""
+func square(x int) int {
+    return x * x
+}
+func sum_squares(n int) int {
+    total := 0
+    for i := 1; i <= n; i++ {
+        total += square(i)
+    }
+    j := 0
+    for square(j) < n {
+        j++
+    }
+    return total + j * 1000
+}
+sum_squares(10)
+""") == ['4385']
+
+
+def test_loop_variables_are_scoped_to_the_loop():
+    with pytest.raises(PyGoGrammarError, match="Invalid operation"):
+        run('for i := 0; i < 3; i++ {\n    i\n}\ni + 1')
+
+
+@pytest.mark.parametrize('source, message', [
+    ('break', 'break is not in a loop'),
+    ('func f() int {\n    if true {\n        continue\n    }\n    return 1\n}',
+     'continue is not in a loop'),
+    ('for 1 {\n    break\n}', 'Non-bool used as for condition'),
+    ('for i := range "abc" {\n    break\n}', r"Can't range over type \(string\)"),
+])
+def test_invalid_loops(source, message):
+    with pytest.raises(PyGoGrammarError, match=message):
+        run(source)
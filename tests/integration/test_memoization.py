@@ -0,0 +1,60 @@
+from pygolang.interpreter import main
+from pygolang.memoization import Memoizer
+from tests.integration.io_callback_fixture import FakeIO
+
+FIB = 'func fib(n int) int { if n < 2 { return n }\n return fib(n - 1) + fib(n - 2) }'
+
+
+def test_pure_functions_are_called_once_per_argument():
+    memoizer = Memoizer()
+    io = FakeIO([FIB, 'fib(80)', 'fib(80)'])
+
+    main(io, memoizer=memoizer)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['23416728348467685', '23416728348467685']
+    assert memoizer.cache.misses == 81
+    assert memoizer.cache.hits == 78 + 1
+
+
+def test_impure_functions_are_not_memoized():
+    memoizer = Memoizer()
+    io = FakeIO([
+        'var calls int = 0',
+        'func count(n int) int { calls = calls + 1\n return n }',
+        'count(1)',
+        'count(1)',
+        'calls',
+    ])
+
+    main(io, memoizer=memoizer)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '1', '2']
+    assert memoizer.cache.hits == 0
+
+
+def test_redefining_functions_forgets_the_results():
+    memoizer = Memoizer()
+    io = FakeIO([
+        'func f(n int) int { return n }',
+        'f(1)',
+        'func f(n int) int { return n + 1 }',
+        'f(1)',
+    ])
+
+    main(io, memoizer=memoizer)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '2']
+
+
+def test_the_cache_is_bounded():
+    memoizer = Memoizer(maxsize=10)
+    io = FakeIO([FIB, 'fib(30)'])
+
+    main(io, memoizer=memoizer)
+
+    assert io.stdout == ['832040']
+    assert len(memoizer.cache) == 10
+    assert memoizer.cache.evictions == memoizer.cache.misses - 10
@@ -0,0 +1,106 @@
+import pytest
+
+import pygolang
+from pygolang import ast
+from pygolang.__main__ import main as cli_main
+from pygolang.errors import PyGoGrammarError
+from pygolang.lexer_setup import PyGoLexer
+from pygolang.multifile import parse_files, scan_declarations
+from tests.integration.io_callback_fixture import FakeIO
+
+MAIN = """
+var total int = 0
+if double(21) == 42 {
+    total = addAll(1, 2, 3)
+}
+total
+greeting(true)
+"""
+
+MATH = """
+func double(n int) int {
+    return addAll(n, n, 0)
+}
+
+func addAll(a, b int, c int) int {
+    return a + b + c
+}
+"""
+
+STRINGS = """
+func greeting(loud bool) string {
+    if loud {
+        return "HELLO"
+    }
+    return "hello"
+}
+"""
+
+
+@pytest.fixture
+def program_files(tmp_path):
+    paths = []
+    for name, source in [('main.go', MAIN), ('math.go', MATH), ('strings.go', STRINGS)]:
+        path = tmp_path / name
+        path.write_text(source)
+        paths.append(str(path))
+    return paths
+
+
+def test_declarations_are_found_without_parsing():
+    lexer = PyGoLexer(FakeIO([])).lexer
+
+    declarations = scan_declarations(
+        MATH + 'var ch chan int\nx := 1\nfunc f() bool { var inner int\n return true }',
+        lexer)
+
+    assert declarations == {
+        'double': ast.Type('func (int) int'),
+        'addAll': ast.Type('func (int, int, int) int'),
+        'ch': ast.ChanType(ast.IntType),
+        'f': ast.Type('func () bool'),
+    }
+    assert declarations['addAll'].rtype == ast.IntType
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_files_call_the_functions_of_the_other_files(program_files, max_workers):
+    io = FakeIO([])
+
+    state = pygolang.run_files(program_files, io=io, max_workers=max_workers)
+
+    assert io.stdout == ['6', '"HELLO"']
+    assert state['total'][0].value == 6
+
+
+def test_the_results_of_other_files_functions_are_type_checked(tmp_path):
+    (tmp_path / 'a.go').write_text('x := name() + 1')
+    (tmp_path / 'b.go').write_text('func name() string { return "a" }')
+
+    with pytest.raises(PyGoGrammarError, match="Invalid operation"):
+        parse_files([str(tmp_path / 'a.go'), str(tmp_path / 'b.go')], max_workers=2)
+
+
+def test_errors_tell_the_file(tmp_path):
+    (tmp_path / 'a.go').write_text('x := 1')
+    (tmp_path / 'b.go').write_text('\n\ny := )')
+
+    with pytest.raises(PyGoGrammarError, match=r"b\.go: Syntax error at line 3"):
+        parse_files([str(tmp_path / 'a.go'), str(tmp_path / 'b.go')], max_workers=2)
+
+    with pytest.raises(PyGoGrammarError, match=r"Can't read .*missing\.go"):
+        parse_files([str(tmp_path / 'a.go'), str(tmp_path / 'missing.go')])
+
+
+def test_names_can_only_be_declared_in_one_file(tmp_path):
+    (tmp_path / 'a.go').write_text('func f() int { return 1 }')
+    (tmp_path / 'b.go').write_text('var f int')
+
+    with pytest.raises(PyGoGrammarError, match=r"f is declared in both .*a\.go and .*b\.go"):
+        parse_files([str(tmp_path / 'a.go'), str(tmp_path / 'b.go')], max_workers=1)
+
+
+def test_command_line(program_files, capsys):
+    assert cli_main(['run', *program_files, '--workers', '2']) == 0
+
+    assert capsys.readouterr().out == '6\n"HELLO"\n'
@@ -73,3 +73,35 @@ def test_not_operator_fails_like_in_golang():
     assert 'Invalid operation (!)' in io.stderr[1]
     assert io.stdout == ['1']
 
+
+
+def test_logical_operators_short_circuit():
+    io = FakeIO([
+        # Fails when x is 0
+        'func check(x int) bool { return 10 / x > 1 }',
+        'true || check(0)',
+        'false && check(0)',
+        'false || check(1)',
+        'true && check(20)',
+        'x := 0',
+        'x != 0 && check(x)',
+        'x == 0 || check(x)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['true', 'false', 'true', 'false', 'false', 'true']
+
+
+def test_comparisons_bind_tighter_than_logical_operators():
+    io = FakeIO([
+        '1 < 2 && 2 > 1',
+        '1 >= 2 || 2 <= 1',
+        '7 % 4 * 2',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['true', 'false', '6']
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from pygolang.prefork import PreforkPool
+
+
+@pytest.fixture
+def pool(engine):
+    with PreforkPool(size=2, engine=engine) as pool:
+        yield pool
+
+
+def test_programs_run_in_workers(pool):
+    result = pool.run('x := 3\nfunc double(n int) int { return n * 2 }\ndouble(x)')
+
+    assert result.stdout == '6\n'
+    assert result.error is None
+    assert result.names == {'x': '3'}
+
+
+def test_every_program_gets_a_fresh_worker(pool):
+    pool.run('x := 1')
+
+    result = pool.run('x := "again"\nx')
+
+    assert result.stdout == '"again"\n'
+    assert pool.forked == 4
+    assert len(pool.ready) == 2
+    assert pool.format_report() == "prefork: 2 programs run, 4 workers forked, 0 killed"
+
+
+def test_errors_are_returned(pool):
+    assert pool.run('1 +').error == "Syntax error: unexpected end of file"
+    assert pool.run('"a" + 1').error.startswith("Invalid operation (+)")
+
+
+def test_programs_running_for_too_long_are_killed(engine, tmp_path):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine can block on sockets")
+
+    with PreforkPool(size=1, engine=engine) as pool:
+        path = tmp_path / 'nobody.sock'
+        result = pool.run(f'accept(listen("unix", "{path}"))', timeout=0.5)
+
+        assert result.error == "The program ran for more than 0.5s"
+        assert pool.killed == 1
+        assert pool.run('1').stdout == '1\n'
+
+    with pytest.raises(ChildProcessError):
+        os.waitpid(-1, os.WNOHANG)
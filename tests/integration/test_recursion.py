@@ -0,0 +1,63 @@
+from pygolang.interpreter import main
+from tests.integration.io_callback_fixture import FakeIO
+
+
+def test_recursive_function():
+    io = FakeIO([
+        'func fib(n int) int { if n < 2 { return n } return fib(n - 1) + fib(n - 2) }',
+        'fib(15)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['610']
+
+
+def test_return_from_nested_blocks_ends_the_function():
+    io = FakeIO([
+        'func sign(n int) int { if n > 0 { return 1 } else if n == 0 { return 0 } return 0 - 1 }',
+        'sign(5)',
+        'sign(0)',
+        'sign(0 - 5)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '0', '-1']
+
+
+def test_declarations_in_function_bodies():
+    io = FakeIO([
+        'func f(n int) int { x := n * 2 var y int = x + 1 return y }',
+        'f(4)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['9']
+
+
+def test_return_outside_of_a_function_is_an_error():
+    io = FakeIO([
+        'if true { return 1 }',
+    ])
+
+    main(io)
+
+    assert "Can't return outside of a function" in str(io.stderr)
+    assert not io.stdout
+
+
+def test_stackless_engine_recursion_is_not_limited_by_the_python_stack():
+    io = FakeIO([
+        'func down(n int) int { if n == 0 { return 0 } return down(n - 1) + 1 }',
+        'down(20000)',
+    ])
+
+    main(io, engine='stackless')
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['20000']
@@ -0,0 +1,97 @@
+import pytest
+
+import pygolang
+from pygolang import ast
+from pygolang.__main__ import main as cli_main
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from pygolang.program_cache import ProgramCache
+from tests.integration.io_callback_fixture import FakeIO
+
+PROGRAM = """
+func fib(n int) int {
+    if n < 2 {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+
+func twice(n int) int {
+    return n * 2
+}
+
+var x int = fib(10)
+y := twice(x)
+if y > 100 {
+    y = y - 100
+}
+y
+"done"
+"""
+
+
+def test_runs_all_the_statements_of_a_program():
+    io = FakeIO([])
+
+    state = pygolang.run_source(PROGRAM, io=io)
+
+    assert io.stdout == ['10', '"done"']
+    assert state['x'][0].value == 55
+    assert state['y'][1] == ast.IntType
+
+
+def test_runs_files(tmp_path):
+    path = tmp_path / 'prog.go'
+    path.write_text(PROGRAM)
+    io = FakeIO([])
+
+    pygolang.run_file(str(path), io=io)
+
+    assert io.stdout == ['10', '"done"']
+
+
+def test_the_whole_program_is_type_checked_before_running():
+    io = FakeIO([])
+
+    with pytest.raises(Exception):
+        pygolang.run_source('x := 1\nx\nx = "not an int"', io=io)
+
+    assert io.stdout == []
+
+
+def test_syntax_errors_tell_the_line():
+    with pytest.raises(PyGoGrammarError, match="line 3"):
+        pygolang.run_source('x := 1\n\n x := )', io=FakeIO([]))
+
+    with pytest.raises(PyGoGrammarError, match="end of file"):
+        pygolang.run_source('x := (1 + ', io=FakeIO([]))
+
+
+def test_runtime_errors_are_raised():
+    source = 'func f(a int) int {\n    return a\n}\nf(1, 2)'
+
+    with pytest.raises(PyLangRuntimeError):
+        pygolang.run_source(source, io=FakeIO([]))
+
+
+def test_programs_are_cached(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+
+    for _ in range(2):
+        io = FakeIO([])
+        pygolang.run_source(PROGRAM, io=io, program_cache=cache)
+        assert io.stdout == ['10', '"done"']
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_command_line(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('PYGOLANG_CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'prog.go'
+
+    path.write_text('1 + 2\n"three"')
+    assert cli_main(['run', str(path)]) == 0
+    assert capsys.readouterr().out == '3\n"three"\n'
+
+    path.write_text('x := )')
+    assert cli_main(['run', str(path)]) == 1
+    assert 'Syntax error' in capsys.readouterr().err
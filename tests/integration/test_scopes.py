@@ -0,0 +1,100 @@
+from pygolang.interpreter import main
+from tests.integration.io_callback_fixture import FakeIO
+
+
+def test_variables_declared_in_a_block_live_until_the_block_ends():
+    io = FakeIO([
+        'x := 1',
+        'if true { y := 5  x = y }',
+        'x',
+    ])
+    state = {}
+
+    main(io, state)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['5']
+    assert 'y' not in state
+
+
+def test_block_variables_shadow_module_variables():
+    io = FakeIO([
+        'x := 1',
+        'y := 0',
+        'if true { x := 7  y = x }',
+        'x',
+        'y',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '7']
+
+
+def test_functions_can_only_be_declared_at_the_top_level():
+    io = FakeIO([
+        'if true { func f() int { return 1 } }',
+    ])
+    state = {}
+
+    main(io, state)
+
+    assert 'Functions can only be declared at the top level' in str(io.stderr)
+    assert not state
+
+
+def test_parameters_shadow_module_variables():
+    io = FakeIO([
+        'x := 100',
+        'func f(x int) int { return x + 1 }',
+        'f(1)',
+        'x',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['2', '100']
+
+
+def test_nested_blocks_in_functions_see_the_names_of_enclosing_blocks():
+    io = FakeIO([
+        'func f(a int) int {'
+        ' x := a '
+        ' if a > 1 { y := x * 10  if y > 15 { x := y + 1  y = x }  x = y } '
+        ' return x }',
+        'f(1)',
+        'f(2)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '21']
+
+
+def test_loop_bodies_declare_their_names_again_every_iteration():
+    io = FakeIO([
+        'total := 0',
+        'for i := range 3 { x := 1  if i > 0 { x = total }  total = total + x + 1 }',
+        'total',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['11']
+
+
+def test_parameters_can_be_assigned_to():
+    io = FakeIO([
+        'func f(x int) int { if x > 1 { x = x * 2 }  return x }',
+        'f(1)',
+        'f(3)',
+    ])
+
+    main(io)
+
+    assert not io.stderr, io.format_stderr_for_debugging()
+    assert io.stdout == ['1', '6']
@@ -0,0 +1,151 @@
+import asyncio
+import socket
+
+import pytest
+
+from pygolang.server import ReplServer
+
+PROMPT = ReplServer.PROMPT.encode()
+
+
+async def open_session(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    await reader.readuntil(PROMPT)
+    return reader, writer
+
+
+async def read_output(reader):
+    output = await asyncio.wait_for(reader.readuntil(PROMPT), 5)
+    return output[:-len(PROMPT)].decode().strip()
+
+
+def serve(server, *sessions):
+    """Runs the lines of every session, one session after the other
+
+    :param ReplServer server:
+    :param sessions: lists of lines, one list for every connection. They're
+        all connected before any line runs
+    :return: what every line printed, for every session
+    """
+    async def run():
+        listener = await server.start_tcp('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        connections = [await open_session(port) for _ in sessions]
+
+        outputs = []
+        for (reader, writer), lines in zip(connections, sessions):
+            outputs.append([])
+            for line in lines:
+                writer.write(line.encode() + b'\n')
+                outputs[-1].append(await read_output(reader))
+
+        for _, writer in connections:
+            writer.close()
+        while server.open_sessions:
+            await asyncio.sleep(0.01)
+        listener.close()
+        return outputs
+
+    return asyncio.run(run())
+
+
+def test_sessions_have_their_own_names():
+    server = ReplServer()
+
+    outputs = serve(
+        server,
+        ['x := 4', 'func f(a int) int { return a * 10 }', 'f(x)'],
+        ['x := "other"', 'x'],
+    )
+
+    assert outputs == [['', '', '40'], ['', '"other"']]
+    assert server.format_report() == "server: 2 sessions, 0 open, 5 lines run"
+
+
+def test_errors_dont_end_the_session():
+    [outputs] = serve(ReplServer(), ['1 +', '"a" + 1', '', '2 + 3'])
+
+    assert outputs[0] == ''
+    assert outputs[1].startswith("Error: Invalid operation (+)")
+    assert outputs[2:] == ['', '5']
+
+
+def test_goroutines_run_in_sessions(engine):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine has goroutines")
+
+    [outputs] = serve(ReplServer(), [
+        'ch := make(chan int)',
+        'func send(c chan int) int { c <- 7 return 0 }',
+        'go send(ch)',
+        '<-ch',
+        'readline()',
+    ])
+
+    assert outputs == ['', '', '', '7', '""']
+
+
+def test_blocked_sessions_dont_hold_up_the_others(engine, tmp_path):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine can do I/O")
+    path = tmp_path / 'pygo.sock'
+
+    async def run():
+        server = ReplServer(engine=engine)
+        listener = await server.start_tcp('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        (blocked_reader, blocked), (other_reader, other) = [
+            await open_session(port) for _ in range(2)]
+
+        blocked.write(f'accept(listen("unix", "{path}"))\n'.encode())
+        while not path.exists():
+            await asyncio.sleep(0.01)
+        other.write(b'1 + 1\n')
+        other_output = await read_output(other_reader)
+
+        _, client = await asyncio.open_unix_connection(str(path))
+        blocked_output = await read_output(blocked_reader)
+
+        for writer in (client, blocked, other):
+            writer.close()
+        listener.close()
+        return other_output, blocked_output
+
+    other_output, blocked_output = asyncio.run(run())
+
+    assert other_output == '2'
+    assert blocked_output.isdigit()
+
+
+def test_lines_of_disconnected_sessions_are_cancelled(engine, tmp_path):
+    if engine != 'stackless':
+        pytest.skip("Only the stackless engine can do I/O")
+    path = tmp_path / 'pygo.sock'
+
+    async def run():
+        server = ReplServer(engine=engine, max_workers=1)
+        listener = await server.start_tcp('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        _, blocked = await open_session(port)
+
+        blocked.write(f'accept(listen("unix", "{path}"))\n'.encode())
+        while not path.exists():
+            await asyncio.sleep(0.01)
+        blocked.close()
+
+        # The only worker is free again, once the line is cancelled
+        reader, writer = await open_session(port)
+        writer.write(b'1 + 1\n')
+        output = await read_output(reader)
+
+        writer.close()
+        while server.open_sessions:
+            await asyncio.sleep(0.01)
+        listener.close()
+        return output
+
+    assert asyncio.run(run()) == '2'
+    # The program's socket was closed with its session
+    with socket.socket(socket.AF_UNIX) as client, \
+            pytest.raises(ConnectionRefusedError):
+        client.connect(str(path))
@@ -0,0 +1,178 @@
+import array
+
+import pytest
+
+import pygolang
+from pygolang.errors import PyGoGrammarError, PyLangRuntimeError
+from tests.integration.io_callback_fixture import FakeIO
+
+SUM = """
+func sum(a []int) int {
+    total := 0
+    for i := range a {
+        total += a[i]
+    }
+    return total
+}
+"""
+
+
+def test_made_slices_hold_zero_values():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+ints := make([]int, 3)
+ints
+make([]bool, 2)
+make([]string, 1, 4)
+len(ints)
+cap(make([]int, 2, 10))
+""", io=io)
+
+    assert io.stdout == ['[0 0 0]', '[false false]', '[""]', '3', '10']
+
+
+def test_elements_are_assigned():
+    io = FakeIO([])
+
+    pygolang.run_source(SUM + """
+s := make([]int, 3)
+s[0] = 4
+s[2] = s[0] * 10
+s
+sum(s)
+flags := make([]bool, 2)
+flags[1] = true
+flags[1]
+words := make([]string, 2)
+words[0] = "go"
+words
+""", io=io)
+
+    assert io.stdout == ['[4 0 40]', '44', 'true', '["go" ""]']
+
+
+def test_append_doubles_the_capacity():
+    io = FakeIO([])
+
+    pygolang.run_source(SUM + """
+var s []int
+len(s)
+func fill(s []int, n int) []int {
+    for i := 0; i < n; i++ {
+        s = append(s, i)
+    }
+    return s
+}
+s = fill(s, 5)
+s
+cap(s)
+cap(fill(s, 4))
+append(s, 5, 6, 7)
+sum(s)
+""", io=io)
+
+    assert io.stdout == ['0', '[0 1 2 3 4]', '8', '16', '[0 1 2 3 4 5 6 7]', '10']
+
+
+def test_sub_slices_share_the_buffer():
+    io = FakeIO([])
+
+    names = pygolang.run_source("""
+s := make([]int, 4, 6)
+t := s[1:3]
+t[0] = 5
+s
+len(t)
+cap(t)
+u := append(t, 8)
+s
+longer := t[:4]
+longer
+""", io=io)
+
+    assert io.stdout == ['[0 5 0 0]', '2', '5', '[0 5 0 8]', '[5 0 8 0]']
+    (s, _), (u, _) = names['s'], names['u']
+    assert s.value.buffer is u.value.buffer
+
+
+def test_appending_past_the_capacity_copies():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+s := make([]int, 2)
+t := append(s, 1)
+t[0] = 9
+s
+t
+""", io=io)
+
+    assert io.stdout == ['[0 0]', '[9 0 1]']
+
+
+def test_ints_and_bools_are_stored_in_arrays():
+    names = pygolang.run_source("""
+ints := append(make([]int, 0), 1, 2)
+bools := append(make([]bool, 0), true)
+strings := append(make([]string, 0), "a")
+""", io=FakeIO([]))
+
+    ints, bools, strings = [names[name][0].value for name in ('ints', 'bools', 'strings')]
+    assert isinstance(ints.buffer, array.array) and ints.buffer.itemsize == 8
+    assert isinstance(bools.buffer, array.array) and bools.buffer.itemsize == 1
+    assert strings.buffer == ['a']
+
+
+def test_ints_wrap_around_when_stored():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+s := make([]int, 1)
+s[0] = 9223372036854775807 + 2
+s
+""", io=io)
+
+    assert io.stdout == ['[-9223372036854775807]']
+
+
+def test_ranging_over_a_slice_counts_its_indexes():
+    io = FakeIO([])
+
+    pygolang.run_source("""
+func double(a []int) []int {
+    b := make([]int, len(a))
+    for i := range a {
+        b[i] = a[i] * 2
+    }
+    return b
+}
+double(append(make([]int, 0), 1, 2, 3))
+""", io=io)
+
+    assert io.stdout == ['[2 4 6]']
+
+
+def test_bounds_are_checked():
+    with pytest.raises(PyLangRuntimeError, match=r"index out of range \[3\] with length 3"):
+        pygolang.run_source('make([]int, 3)[3]', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match=r"index out of range \[0\] with length 0"):
+        pygolang.run_source('var s []int\ns[0] = 1', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match=r"slice bounds out of range \[0:5\] with capacity 4"):
+        pygolang.run_source('make([]bool, 2, 4)[:5]', io=FakeIO([]))
+
+    with pytest.raises(PyLangRuntimeError, match="makeslice: cap out of range"):
+        pygolang.run_source('make([]int, 3, 2)', io=FakeIO([]))
+
+
+@pytest.mark.parametrize('source, message', [
+    ('make([]int)', r"Missing len argument to make\(\[\]int\)"),
+    ('append(make([]int, 1), "a")', r"Can't append type \(string\) to slice of type \(\[\]int\)"),
+    ('s := make([]bool, 1)\ns[0] = 1', r"Can't assign type \(int\) to element"),
+    ('append(1, 2)', r"append to non-slice type \(int\)"),
+    ('var s []chan int', r"The type specified is not implemented: \[\]chan int"),
+])
+def test_invalid_operations_are_grammar_errors(source, message):
+    with pytest.raises(PyGoGrammarError, match=message):
+        pygolang.run_source(source, io=FakeIO([]))
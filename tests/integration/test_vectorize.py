@@ -0,0 +1,101 @@
+"""Loops which are vectorized at -O3 give the same results as when they run
+as they are, at -O0
+"""
+import pytest
+
+import pygolang
+from pygolang.errors import PyLangRuntimeError
+from tests.integration.io_callback_fixture import FakeIO
+
+COUNT = """
+func count(n int) []int {
+    s := make([]int, n)
+    for i := range s {
+        s[i] = i
+    }
+    return s
+}
+"""
+
+
+def test_element_wise_loops():
+    io = FakeIO([])
+
+    pygolang.run_source(COUNT + """
+a := count(200)
+b := make([]int, 200)
+k := 3
+for i := range a {
+    b[i] = a[i] * k + 7 - i
+}
+b[:4]
+b[99]
+for i := 10; i < 190; i += 2 {
+    b[i] = b[i] * a[i]
+    a[i] = 0
+}
+b[10:13]
+a[10:13]
+""", io=io)
+
+    assert io.stdout == ['[7 9 11 13]', '205', '[270 29 372]', '[0 11 0]']
+
+
+def test_ints_wrap_around():
+    io = FakeIO([])
+
+    pygolang.run_source(COUNT + """
+a := count(100)
+for i := range a {
+    a[i] = a[i] * 4611686018427387904 + 9223372036854775807
+}
+a[:4]
+""", io=io)
+
+    assert io.stdout == [
+        '[9223372036854775807 -4611686018427387905 -1 4611686018427387903]']
+
+
+def test_overlapping_slices_run_in_order():
+    io = FakeIO([])
+
+    pygolang.run_source(COUNT + """
+a := count(101)
+shifted := a[1:]
+for i := range shifted {
+    shifted[i] = a[i]
+}
+a[:3]
+a[100]
+""", io=io)
+
+    # Every element is copied to the next one, after it got the first one
+    assert io.stdout == ['[0 0 0]', '0']
+
+
+def test_out_of_range_indexes_fail_after_the_iterations_before():
+    io = FakeIO([])
+
+    with pytest.raises(PyLangRuntimeError, match=r"index out of range \[80\] with length 80"):
+        pygolang.run_source(COUNT + """
+a := count(100)
+short := make([]int, 80)
+for i := range a {
+    short[i] = a[i] + 1
+}
+""", io=io)
+
+    names = pygolang.run_source(COUNT + """
+a := count(100)
+short := make([]int, 80)
+func copy(from []int, to []int) int {
+    for i := range from {
+        to[i] = from[i] + 1
+    }
+    return 0
+}
+""", io=io)
+    short = names['short'][0].value
+    with pytest.raises(PyLangRuntimeError):
+        pygolang.run_source('copy(a, short)', io=io, program_state=names)
+    assert list(short) == list(range(1, 81))
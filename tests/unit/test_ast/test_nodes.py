@@ -0,0 +1,91 @@
+import gc
+import pickle
+
+from pygolang import ast, lexer_setup, optimizer, parser_setup
+from tests.integration.io_callback_fixture import FakeIO
+
+
+def parse(source):
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io)
+    return parser_setup.PyGoProgramParser(io, {}).parse(source)
+
+
+class TestName:
+    def test_names_are_interned(self):
+        assert ast.Name('x') is ast.Name('x')
+        assert ast.Name('x', slot=1) is not ast.Name('x')
+        assert pickle.loads(pickle.dumps(ast.Name('x', slot=1))) is ast.Name('x', slot=1)
+
+    def test_names_are_dropped_with_the_code_using_them(self):
+        code = parse('only_in_this_program := 1\nonly_in_this_program')
+        assert ('only_in_this_program', None) in ast.Name._instance_cache
+
+        del code
+        gc.collect()
+
+        assert ('only_in_this_program', None) not in ast.Name._instance_cache
+
+    def test_parsed_names_are_shared(self):
+        code = optimizer.Optimizer(1).optimize(parse('var x int = 1\nx + x * x'))
+
+        operator = code.value.statements[1].value
+        left, (right, _) = operator.args_list[0], operator.args_list[1].args_list
+
+        assert left is right
+
+
+class TestNodes:
+    def test_nodes_have_no_dict(self):
+        code = parse('func f(a int) int { if a > 1 { return a }\nreturn f(a + 1) }\nf(2)')
+
+        stack = [code]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            assert not hasattr(node, '__dict__'), node
+            stack.extend(optimizer.iter_all_child_nodes(node))
+
+    def test_parse_time_data_is_not_kept(self):
+        code = parse('var x int = 1\nx = 2\nfunc f(a, b int) int { return a }')
+        declaration, assignment, func = [
+            ast.unwrap_statement(stmt.value) for stmt in code.value.statements]
+
+        assert not hasattr(declaration, 'type_scope')
+        assert not hasattr(assignment, 'type_scope')
+        assert not hasattr(func, 'params')
+        assert func.param_names == ['a', 'b']
+        assert str(func.type) == 'func (int, int) int'
+
+
+class TestCountingLoop:
+    def get_counting_loop(self, source):
+        loop = ast.unwrap_statement(parse(source).value.statements[-1].value)
+        return ast.get_counting_loop(loop)
+
+    def test_loops_counting_to_an_unchanged_bound(self):
+        loop = self.get_counting_loop('n := 10\nfor i := 2; i <= n * 2; i += 3 {\n    n = 1\n}')
+        assert loop is None  # n is a module level name: it could change
+
+        loop = self.get_counting_loop('for i := 2; i <= 20; i += 3 {\n    i + 1\n}')
+        assert (loop.name, loop.step) == ('i', 3)
+        assert list(loop.get_range(2, 20)) == list(range(2, 21, 3))
+
+        loop = self.get_counting_loop('for i := 5; i > 0; i-- {\n    break\n}')
+        assert list(loop.get_range(5, 0)) == [5, 4, 3, 2, 1]
+
+        loop = self.get_counting_loop('for i := range 4 {\n    break\n}')
+        assert list(loop.get_range(0, 4)) == [0, 1, 2, 3]
+
+    def test_loops_which_dont_count(self):
+        for source in [
+            'for i := 0; i < 10; i++ {\n    i = 2\n}',
+            'for i := 0; i < 10; i-- {\n    break\n}',
+            'for i := 0; i > 10; i = i * 2 {\n    break\n}',
+            'for i := 0; i != 10; i++ {\n    break\n}',
+            'x := 0\nfor i := 0; x < 10; i++ {\n    x++\n}',
+            'for true {\n    break\n}',
+        ]:
+            assert self.get_counting_loop(source) is None, source
@@ -0,0 +1,46 @@
+from pygolang import ast
+
+
+class TestTypeScopeSlots:
+    def test_module_level_names_have_no_slot(self):
+        stack = ast.TypeScopeStack()
+
+        slot = stack.get_current_scope().declare_variable_type('x', ast.IntType)
+
+        assert slot is None
+        assert stack.get_current_scope().get_variable_slot('x') is None
+
+    def test_function_params_get_consecutive_slots(self):
+        stack = ast.TypeScopeStack()
+        func_scope = stack.create_scope(owns_frame=True)
+
+        assert func_scope.declare_variable_type('a', ast.IntType) == 0
+        assert func_scope.declare_variable_type('b', ast.IntType) == 1
+        assert func_scope.frame_size == 2
+
+    def test_blocks_allocate_slots_in_their_functions_frame(self):
+        stack = ast.TypeScopeStack()
+        func_scope = stack.create_scope(owns_frame=True)
+        func_scope.declare_variable_type('x', ast.IntType)
+
+        block_scope = stack.create_scope()
+        # shadowing gets a new slot
+        assert block_scope.declare_variable_type('x', ast.IntType) == 1
+        assert block_scope.get_variable_slot('x') == 1
+        stack.pop_scope()
+
+        assert func_scope.get_variable_slot('x') == 0
+        assert func_scope.frame_size == 2
+
+    def test_module_level_blocks_use_the_root_frame(self):
+        stack = ast.TypeScopeStack()
+        stack.get_current_scope().declare_variable_type('g', ast.IntType)
+        block_scope = stack.create_scope()
+
+        assert block_scope.declare_variable_type('x', ast.IntType) == 0
+        assert block_scope.get_variable_slot('g') is None
+        assert stack.get_root_scope().frame_size == 1
+
+        stack.reset()
+        assert stack.scopes == [stack.get_root_scope()]
+        assert stack.get_root_scope().frame_size == 0
@@ -0,0 +1,28 @@
+import pickle
+
+from pygolang import ast
+
+
+class TestInt:
+    def test_small_ints_are_created_once(self):
+        assert ast.Int(5) is ast.Int(5)
+        assert ast.Int(2) + ast.Int(3) is ast.Int(5)
+
+    def test_big_ints_are_not_cached(self):
+        big = ast.SMALL_INT_RANGE.stop + 1
+
+        assert ast.Int(big) is not ast.Int(big)
+        assert ast.Int(big).value == big
+        assert ast.Int(big).type == ast.IntType
+
+    def test_values_have_no_dict(self):
+        for value in [ast.Int(1), ast.Int(10 ** 6), ast.String('x'), ast.BoolLiteralTrue]:
+            assert not hasattr(value, '__dict__')
+
+    def test_pickling_keeps_small_ints_cached(self):
+        assert pickle.loads(pickle.dumps(ast.Int(7))) is ast.Int(7)
+        assert pickle.loads(pickle.dumps(ast.Int(10 ** 6))).value == 10 ** 6
+
+    def test_pickling_keeps_singletons(self):
+        for value in [ast.BoolLiteralTrue, ast.BoolLiteralFalse, ast.ValueNotSet]:
+            assert pickle.loads(pickle.dumps(value)) is value
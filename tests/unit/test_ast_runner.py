@@ -0,0 +1,57 @@
+import pytest
+
+import pygolang
+from pygolang import ast, ast_runner
+from tests.integration.io_callback_fixture import FakeIO
+
+
+class TestRunnerEngines:
+    def test_unknown_engine_is_rejected(self):
+        with pytest.raises(ValueError):
+            ast_runner.Runner(FakeIO([]), {}, engine='no-such-engine')
+
+    def test_closure_engine_compiles_code_only_once(self):
+        runner = ast_runner.Runner(
+            FakeIO([]), {}, engine=ast_runner.ENGINE_CLOSURE)
+        code = ast.Root(ast.InterpreterStart(ast.Statement(ast.Int(3))))
+
+        runner.run(code)
+        compiled = runner._compiled_code[code]
+        runner.run(code)
+
+        assert runner._compiled_code[code] is compiled
+        assert runner.io.stdout == ['3', '3']
+
+    @pytest.mark.parametrize('engine', ast_runner.ENGINES)
+    def test_engines_evaluate_operators(self, engine):
+        runner = ast_runner.Runner(FakeIO([]), {}, engine=engine)
+        operator = ast.Operator('+', 'PLUS', [ast.Int(1), ast.Int(2)])
+
+        assert runner.run(operator).value == 3
+
+
+class TestTreeEngineScopes:
+    def test_only_blocks_declaring_names_get_a_scope(self, monkeypatch):
+        created = []
+
+        class CountedScope(ast.BlockRuntimeScope):
+            def __init__(self, scope_dict):
+                created.append(self)
+                super().__init__(scope_dict)
+
+        monkeypatch.setattr(ast, 'BlockRuntimeScope', CountedScope)
+        io = FakeIO([])
+        state = {}
+
+        pygolang.run_source(
+            'x := 0\n'
+            'if true {\n    x = 1\n    x = x + 1\n    x = x * 3\n}\n'
+            'if x > 1 {\n    y := x\n    x = y + 1\n}\n'
+            'for i := 0; i < 3; i++ {\n    x = x + i\n}\n'
+            'x',
+            io=io, program_state=state, engine=ast_runner.ENGINE_TREE)
+
+        assert io.stdout == ['10']
+        # The block declaring y, and the loop declaring i
+        assert len(created) == 2
+        assert 'y' not in state and 'i' not in state
@@ -0,0 +1,91 @@
+import socket
+import threading
+
+import pytest
+
+from pygolang.errors import PyLangRuntimeError
+from pygolang.scheduler import Scheduler
+
+
+def test_the_scheduler_waits_for_sockets_when_nothing_else_can_run():
+    scheduler = Scheduler()
+    event_loop = scheduler.get_event_loop()
+    left, right = socket.socketpair()
+    event_loop.add_socket(left)
+    event_loop.add_socket(right)
+
+    def send_later():
+        # Only runs once main is blocked on the socket
+        yield from event_loop.sendall(right, b'ping')
+
+    def main():
+        scheduler.spawn(send_later())
+        return (yield from event_loop.recv(left, 100))
+
+    assert scheduler.run(main()) == b'ping'
+    assert (scheduler.blocked, event_loop.waiting, event_loop.io_waits) == (0, 0, 1)
+    scheduler.shutdown()
+    assert left.fileno() == -1
+
+
+def test_goroutines_keep_running_during_calls_in_threads():
+    scheduler = Scheduler()
+    event_loop = scheduler.get_event_loop()
+    steps = []
+
+    def count():
+        for step in range(3):
+            steps.append(step)
+            yield from event_loop.run_in_thread(lambda: None)
+
+    def main():
+        scheduler.spawn(count())
+        return (yield from event_loop.run_in_thread(sum, [1, 2, 3]))
+
+    assert scheduler.run(main()) == 6
+    assert steps[0] == 0
+    assert event_loop.thread_calls >= 2
+    scheduler.shutdown()
+
+
+def test_killed_goroutines_stop_waiting():
+    scheduler = Scheduler()
+    event_loop = scheduler.get_event_loop()
+    left, right = socket.socketpair()
+    event_loop.add_socket(left)
+
+    def wait_forever():
+        yield from event_loop.recv(left, 100)
+
+    def main():
+        scheduler.spawn(wait_forever())
+        yield from event_loop.run_in_thread(lambda: None)
+        raise ValueError
+
+    try:
+        scheduler.run(main())
+    except ValueError:
+        pass
+
+    assert event_loop.waiting == 0
+    assert not event_loop.selector.get_map().get(left)
+    scheduler.shutdown()
+    right.close()
+
+
+def test_cancelling_stops_waiting_for_sockets():
+    scheduler = Scheduler()
+    event_loop = scheduler.get_event_loop()
+    left, right = socket.socketpair()
+    event_loop.add_socket(left)
+
+    def main():
+        # Cancelled from another thread, once main waits
+        threading.Timer(0.05, scheduler.cancel).start()
+        return (yield from event_loop.recv(left, 100))
+
+    with pytest.raises(PyLangRuntimeError, match="cancelled"):
+        scheduler.run(main())
+    assert event_loop.waiting == 0
+    scheduler.shutdown()
+    right.close()
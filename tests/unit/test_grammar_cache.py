@@ -0,0 +1,103 @@
+import os
+
+import ply.yacc as yacc
+import pytest
+
+from pygolang import ast, grammar_cache, lexer_setup, parser_setup
+from tests.integration.io_callback_fixture import FakeIO
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(grammar_cache.CACHE_DIR_ENV_VAR, str(tmp_path))
+    return tmp_path
+
+
+def parse(parser, code):
+    return ast.unwrap_statement(parser.parse(code).value.value)
+
+
+def build(optimize=True):
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io, optimize=optimize)
+    return parser_setup.PyGoParser(io, {}, optimize=optimize)
+
+
+class TestGrammarCache:
+    def test_tables_are_written_to_the_cache_dir(self, cache_dir):
+        build()
+
+        names = os.listdir(cache_dir)
+        assert any(n.startswith('parsetab_') for n in names)
+        assert any(n.startswith('lextab_') for n in names)
+        assert not any(n.startswith(('.tmp-', '_tmp_')) for n in names)
+
+    def test_cached_tables_are_loaded_without_generating_them(
+            self, cache_dir, monkeypatch):
+        build()
+
+        def fail(*a, **kw):
+            raise AssertionError("the tables should have been loaded")
+
+        monkeypatch.setattr(yacc, 'yacc', fail)
+        parser = build()
+
+        assert parse(parser, '1 + 2').type.repr == 'int'
+
+    def test_parsers_with_other_start_symbols_build_quietly(self, cache_dir, capsys):
+        io = FakeIO([])
+        lexer_setup.PyGoLexer(io)
+        parser_setup.PyGoProgramParser(io, {})
+        parser_setup.PyGoProgramParser(io, {}, optimize=False)
+
+        assert capsys.readouterr().err == ''
+
+    def test_cached_parser_parses_like_a_generated_one(self, cache_dir):
+        build()
+        cached = build()
+        generated = build(optimize=False)
+
+        for parser in (cached, generated):
+            statement = parse(parser, 'x := 1 + 2 * 3')
+            assert statement.name == 'x'
+            assert statement.value.args_list[1].operator == '*'
+
+    def test_broken_cache_files_are_rebuilt(self, cache_dir):
+        build()
+        for name in os.listdir(cache_dir):
+            with open(os.path.join(cache_dir, name), 'w') as broken:
+                broken.write('garbage')
+
+        parser = build()
+
+        assert parse(parser, 'true').value is True
+
+    def test_unusable_cache_dir_still_builds_the_tables(
+            self, tmp_path, monkeypatch):
+        not_a_dir = tmp_path / 'file'
+        not_a_dir.write_text('')
+        monkeypatch.setenv(
+            grammar_cache.CACHE_DIR_ENV_VAR, str(not_a_dir / 'cache'))
+
+        assert grammar_cache.get_cache_dir() is None
+        assert build().parse('1') is not None
+
+    def test_parsers_of_a_process_share_the_tables(self, cache_dir):
+        first, second = build(), build()
+
+        assert first.parser.action is second.parser.action
+        assert first.parser.goto is second.parser.goto
+        assert parse(second, 'x := 2').name == 'x'
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_signature_changes_with_the_grammar(self):
+        class ChangedParser(parser_setup.PyGoParser):
+            def p_expression_string(self, t):
+                """expression : STRING STRING"""
+
+        signature = grammar_cache.grammar_signature(
+            parser_setup.PyGoParser, 'p_')
+
+        assert signature == grammar_cache.grammar_signature(
+            parser_setup.PyGoParser, 'p_')
+        assert signature != grammar_cache.grammar_signature(ChangedParser, 'p_')
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+import pygolang
+from pygolang.errors import PyLangRuntimeError
+from pygolang.io_callback import BufferedIO
+
+
+class Stream(io.StringIO):
+    """Remembers what was on it at every flush"""
+
+    def __init__(self, tty=False):
+        super().__init__()
+        self.tty = tty
+        self.flushed = []
+
+    def isatty(self):
+        return self.tty
+
+    def flush(self):
+        self.flushed.append(self.getvalue())
+
+
+def test_batch_mode_only_writes_full_buffers():
+    stdout = Stream()
+    buffered = BufferedIO(stdout=stdout, buffer_size=8)
+
+    for value in range(6):
+        buffered.to_stdout(value)
+        buffered.newline()
+
+    assert stdout.flushed == ['0\n1\n2\n3\n']
+    buffered.flush()
+    assert stdout.flushed[-1] == '0\n1\n2\n3\n4\n5\n'
+    assert buffered.flushes == 2
+
+
+def test_interactive_mode_writes_every_line_and_the_prompt():
+    stdout = Stream(tty=True)
+    buffered = BufferedIO(stdout=stdout, stdin=io.StringIO('1 + 1\n'))
+
+    buffered.interpreter_prompt()
+    assert stdout.flushed == []
+    assert buffered.from_stdin() == '1 + 1\n'
+    assert stdout.flushed == ['pygo> ']
+
+    buffered.to_stdout('2')
+    buffered.newline()
+    assert stdout.flushed[-1] == 'pygo> 2\n'
+
+
+def test_stdout_is_written_before_stderr():
+    stdout, stderr = Stream(), Stream()
+    buffered = BufferedIO(stdout=stdout, stderr=stderr)
+
+    buffered.to_stdout('out')
+    buffered.to_stderr('err')
+
+    assert stdout.flushed == ['out']
+    assert stderr.flushed == ['err']
+
+
+def test_programs_flush_when_they_end():
+    stdout = Stream()
+
+    pygolang.run_source('1\n2', io=BufferedIO(stdout=stdout))
+    assert stdout.getvalue() == '1\n2\n'
+
+    stdout = Stream()
+    with pytest.raises(PyLangRuntimeError):
+        pygolang.run_source(
+            '1\nfunc f(a int) int {\n    return a\n}\nf(1, 2)',
+            io=BufferedIO(stdout=stdout))
+    assert stdout.getvalue() == '1\n'
@@ -0,0 +1,98 @@
+import pytest
+
+from pygolang import ast, lexer_setup, parser_setup
+from pygolang.memoization import LRUCache, Memoizer, MISSING
+from tests.integration.io_callback_fixture import FakeIO
+
+
+@pytest.fixture
+def parse():
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, {})
+    globals_ = {}
+
+    def parse_func(code):
+        func = ast.unwrap_statement(parser.parse(code).value.value)
+        globals_[func.name] = [func, func.type]
+        return func, globals_
+
+    return parse_func
+
+
+class TestLRUCache:
+    def test_least_recently_used_items_are_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+
+        cache.put('c', 3)
+
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+        assert len(cache) == 2
+
+
+class TestPurity:
+    def test_functions_using_only_their_params_are_pure(self, parse):
+        func, globals_ = parse(
+            'func f(a int, b int) int { c := a * b\n if c > 2 { return c }\n return a }')
+
+        assert Memoizer().is_pure(func, globals_)
+
+    def test_recursive_functions_can_be_pure(self, parse):
+        func, globals_ = parse(
+            'func fib(n int) int { if n < 2 { return n }\n return fib(n - 1) + fib(n - 2) }')
+
+        assert Memoizer().is_pure(func, globals_)
+
+    def test_functions_with_loops_can_be_pure(self, parse):
+        func, globals_ = parse(
+            'func f(n int) int { total := 0\n for i := range n { total += i }\n return total }')
+
+        assert Memoizer().is_pure(func, globals_)
+
+    def test_functions_using_module_level_names_are_impure(self, parse):
+        parse('var x int = 1')
+
+        reader, globals_ = parse('func read() int { return x }')
+        writer, globals_ = parse('func write(a int) int { x = a\n return a }')
+
+        memoizer = Memoizer()
+        assert not memoizer.is_pure(reader, globals_)
+        assert not memoizer.is_pure(writer, globals_)
+
+    def test_functions_calling_impure_functions_are_impure(self, parse):
+        parse('var x int = 1')
+        parse('func read() int { return x }')
+        caller, globals_ = parse('func caller(a int) int { return a + read() }')
+        undefined, globals_ = parse('func undefined() int { return nowhere() }')
+
+        memoizer = Memoizer()
+        assert not memoizer.is_pure(caller, globals_)
+        assert not memoizer.is_pure(undefined, globals_)
+
+    def test_impure_callees_make_recursive_callers_impure(self, parse):
+        parse('var x int = 1')
+        parse('func read() int { return x }')
+        even, globals_ = parse(
+            'func even(n int) bool { if n == 0 { return true }\n return odd(n - 1) }')
+        odd, globals_ = parse(
+            'func odd(n int) bool { if n == read() { return true }\n return even(n - 1) }')
+
+        memoizer = Memoizer()
+        assert not memoizer.is_pure(even, globals_)
+        assert not memoizer.is_pure(odd, globals_)
+
+    def test_functions_using_the_elements_of_slices_are_impure(self, parse):
+        reader, globals_ = parse('func first(s []int) int { return s[0] }')
+        maker, globals_ = parse('func make3() []int { return make([]int, 3) }')
+        counter, globals_ = parse('func count(s []int) int { return len(s[1:]) }')
+
+        memoizer = Memoizer()
+        assert not memoizer.is_pure(reader, globals_)
+        assert not memoizer.is_pure(maker, globals_)
+        assert memoizer.is_pure(counter, globals_)
@@ -0,0 +1,132 @@
+import pytest
+
+from pygolang import ast, lexer_setup, optimizer, parser_setup
+from tests.integration.io_callback_fixture import FakeIO
+
+
+@pytest.fixture
+def parser():
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io)
+    return parser_setup.PyGoParser(io, {})
+
+
+def optimize(parser, code, level=2):
+    root = optimizer.Optimizer(level).optimize(parser.parse(code))
+    return root.value.value
+
+
+class TestCollapseWrappers:
+    def test_statements_and_expressions_are_collapsed(self, parser):
+        statement = optimize(parser, 'var x int = 1', level=1)
+        assert isinstance(statement, ast.Declaration)
+
+        operator = optimize(parser, 'x + x', level=1)
+        assert isinstance(operator, ast.Operator)
+        assert all(isinstance(arg, ast.Name) for arg in operator.args_list)
+
+    def test_function_arguments_are_collapsed(self, parser):
+        parser.parse('func f(a int, b int) int { return a }')
+        parser.parse('var x int = 1')
+
+        call = optimize(parser, 'f((x), 2 + 3)', level=1)
+
+        assert isinstance(call.arguments[0], ast.Name)
+        assert call.get_flat_arguments()[1].value == 5
+
+
+class TestFoldConstants:
+    def test_operators_on_literals_are_evaluated(self, parser):
+        assert optimize(parser, '(2 * 3 + 4) * 5 - 1').value == 49
+        assert optimize(parser, '!(1 > 2)') is ast.BoolLiteralTrue
+
+    def test_operators_on_names_are_kept(self, parser):
+        parser.parse('var x int = 1')
+
+        operator = optimize(parser, 'x + 2 * 3')
+
+        assert isinstance(operator, ast.Operator)
+        assert operator.args_list[1].value == 6
+
+    def test_logical_operators_with_a_literal_left_operand(self, parser):
+        parser.parse('var x bool = true')
+
+        assert optimize(parser, 'false && x') is ast.BoolLiteralFalse
+        assert isinstance(optimize(parser, 'true && x'), ast.Name)
+        assert isinstance(optimize(parser, 'x || true'), ast.LogicalOperator)
+
+    def test_operators_failing_at_run_time_are_kept(self, parser):
+        assert isinstance(optimize(parser, '1 / 0'), ast.Operator)
+
+    def test_only_operators_themselves_are_evaluated(self, parser):
+        # Making slices at parse time would share them between evaluations
+        assert isinstance(optimize(parser, 'make([]int, 2 + 1)'), ast.MakeSlice)
+
+
+class TestEliminateDeadCode:
+    def test_always_false_branches_are_removed(self, parser):
+        parser.parse('var x int = 1')
+
+        conditional = optimize(
+            parser, 'if 1 > 2 { x = 2 } else if x > 0 { x = 3 } else { x = 4 }')
+
+        assert len(conditional.expression_block_pairs) == 1
+        assert isinstance(conditional.expression_block_pairs[0][0], ast.Operator)
+
+    def test_always_true_branches_replace_the_conditional(self, parser):
+        parser.parse('var x int = 1')
+
+        block = optimize(parser, 'if x > 2 { x = 2 } else if true { x = 3 } else { x = 4 }')
+        assert isinstance(block, ast.Conditional)
+        assert block.final_block.statements[0].value.value == 3
+
+        block = optimize(parser, 'if 2 > 1 { x = 2 } else { x = 4 }')
+        assert isinstance(block, ast.Block)
+        assert block.statements[0].value.value == 2
+
+    def test_statements_after_return_are_removed(self, parser):
+        func = optimize(parser, 'func f() int { return 1\n 2\n 3 }')
+
+        assert len(func.body.statements) == 1
+
+    def test_statements_after_break_are_removed(self, parser):
+        loop = optimize(parser, 'for { 1\n break\n 2 }')
+
+        assert len(loop.body.statements) == 2
+
+
+class TestOptimizer:
+    def test_report_has_the_nodes_removed_by_each_pass(self, parser):
+        code_optimizer = optimizer.Optimizer(2)
+        code = parser.parse('if 1 > 2 { 5 } else { 1 + 2 }')
+        node_count = optimizer.count_nodes(code)
+
+        code = code_optimizer.optimize(code)
+
+        names = [name for name, _ in code_optimizer.report]
+        assert names == ['collapse-wrappers', 'fold-constants', 'eliminate-dead-code']
+        assert all(removed > 0 for _, removed in code_optimizer.report)
+        assert node_count - sum(removed for _, removed in code_optimizer.report) \
+            == optimizer.count_nodes(code)
+
+    def test_level_0_leaves_the_code_alone(self, parser):
+        code = parser.parse('1 + 2')
+        code_optimizer = optimizer.Optimizer(0)
+
+        code = code_optimizer.optimize(code)
+
+        assert isinstance(code.value.value, ast.Statement)
+        assert isinstance(ast.unwrap_statement(code.value.value), ast.Operator)
+        assert code_optimizer.report == []
+
+    def test_custom_passes(self, parser):
+        code_optimizer = optimizer.Optimizer(passes=[optimizer.FoldConstants()])
+
+        code = code_optimizer.optimize(parser.parse('1 + 2'))
+
+        assert ast.unwrap_statement(code.value.value).value == 3
+        assert code_optimizer.report == [('fold-constants', 2)]
+
+    def test_unknown_levels_are_rejected(self):
+        with pytest.raises(ValueError):
+            optimizer.Optimizer(4)
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from pygolang import ast, interpreter, lexer_setup, parser_setup, program_cache
+from tests.integration.io_callback_fixture import FakeIO
+
+FUNC_SOURCE = """func add(a int, b int) int {
+    var c int = a + b
+    if c > 10 {
+        return c - 10
+    }
+    return c
+}"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return program_cache.ProgramCache(str(tmp_path))
+
+
+def build():
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io)
+    return parser_setup.PyGoParser(io, {})
+
+
+def parse_unwrapped(cache, parser, source):
+    return ast.unwrap_statement(cache.parse(parser, source).value.value)
+
+
+class TestProgramCache:
+    def test_programs_are_parsed_once(self, cache, monkeypatch):
+        parse_unwrapped(cache, build(), FUNC_SOURCE)
+
+        parser = build()
+
+        def fail(*a, **kw):
+            raise AssertionError("the program should have been loaded")
+
+        monkeypatch.setattr(parser, 'parse', fail)
+        func = parse_unwrapped(cache, parser, FUNC_SOURCE)
+
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert func.name == 'add'
+        assert [(name, str(type_)) for name, type_ in func.get_params_and_types()] == [
+            ('a', 'int'), ('b', 'int')]
+
+    def test_singletons_keep_their_identity(self, cache):
+        parse_unwrapped(cache, build(), 'var x int')
+        declaration = parse_unwrapped(cache, build(), 'var x int')
+
+        assert cache.hits == 1
+        assert declaration.value is ast.ValueNotSet
+
+        parse_unwrapped(cache, build(), 'true')
+        assert parse_unwrapped(cache, build(), 'true') is ast.BoolLiteralTrue
+
+        parse_unwrapped(cache, build(), 'make([]int, 2)')
+        make = parse_unwrapped(cache, build(), 'make([]int, 2)')
+        assert make.operator_pyfunc == ast.INT_ELEMENTS.boxed_make
+
+    def test_loading_declares_the_names_in_the_parser(self, cache):
+        parse_unwrapped(cache, build(), 'var x int = 1')
+
+        parser = build()
+        parse_unwrapped(cache, parser, 'var x int = 1')
+
+        assert cache.hits == 1
+        assert parse_unwrapped(cache, parser, 'x + 1').type == ast.IntType
+
+    def test_key_depends_on_the_names_known_before_parsing(self, cache):
+        parser = build()
+        key = cache.get_key(parser, 'x')
+
+        parser.parse('var y int')
+        assert key == cache.get_key(parser, 'x')
+
+        parser.parse('var x int')
+
+        assert key != cache.get_key(parser, 'x')
+        assert key == cache.get_key(build(), 'x')
+
+    def test_key_depends_on_the_interpreter_version(self, cache, monkeypatch):
+        parser = build()
+        key = cache.get_key(parser, '1')
+
+        monkeypatch.setattr(program_cache, 'interpreter_version', lambda: 'v2')
+
+        assert key != cache.get_key(parser, '1')
+
+    def test_broken_cache_files_are_replaced(self, cache):
+        parse_unwrapped(cache, build(), '1 + 2')
+        for name in os.listdir(cache.cache_dir):
+            with open(os.path.join(cache.cache_dir, name), 'w') as broken:
+                broken.write('garbage')
+
+        assert parse_unwrapped(cache, build(), '1 + 2').type == ast.IntType
+        assert parse_unwrapped(cache, build(), '1 + 2').type == ast.IntType
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_interpreter_runs_cached_programs(self, cache):
+        for _ in range(2):
+            io = FakeIO([FUNC_SOURCE, 'add(2, 3)', 'add(20, 3)'])
+            interpreter.main(io, program_cache=cache)
+
+            assert io.stdout == ['5', '13']
+
+        assert (cache.hits, cache.misses) == (3, 3)
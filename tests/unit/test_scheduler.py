@@ -0,0 +1,69 @@
+import pytest
+
+from pygolang import ast
+from pygolang.errors import PyLangRuntimeError
+from pygolang.scheduler import Channel, Scheduler
+
+INT_CHAN = ast.ChanType(ast.IntType)
+
+
+def test_goroutines_take_turns_when_blocking():
+    scheduler = Scheduler()
+    channel = Channel(INT_CHAN)
+    received = []
+
+    def receive(count):
+        for _ in range(count):
+            received.append((yield from scheduler.receive(channel)).value)
+
+    def main():
+        scheduler.spawn(receive(3))
+        for n in range(3):
+            yield from scheduler.send(channel, ast.Int(n))
+        return ast.Int(10)
+
+    assert scheduler.run(main()).value == 10
+    assert received == [0, 1, 2]
+    assert (scheduler.spawned, scheduler.alive, scheduler.blocked) == (1, 0, 0)
+    assert scheduler.switches > 3
+
+
+def test_select_drops_the_waiters_of_the_cases_not_chosen():
+    scheduler = Scheduler()
+    first, second = Channel(INT_CHAN), Channel(INT_CHAN)
+
+    def send():
+        yield from scheduler.send(second, ast.Int(5))
+
+    def main():
+        scheduler.spawn(send())
+        return (yield from scheduler.select(
+            [(first, False, None), (second, False, None)], has_default=False))
+
+    index, value = scheduler.run(main())
+
+    assert (index, value.value) == (1, 5)
+    assert not first.recvq and not second.recvq
+
+
+def test_deadlocks_kill_all_the_goroutines():
+    scheduler = Scheduler()
+    channel = Channel(INT_CHAN)
+
+    def receive():
+        yield from scheduler.receive(channel)
+
+    def main():
+        scheduler.spawn(receive())
+        yield from scheduler.receive(channel)
+
+    with pytest.raises(PyLangRuntimeError, match="deadlock"):
+        scheduler.run(main())
+
+    assert (scheduler.alive, scheduler.blocked) == (0, 0)
+    assert "0 alive, 0 blocked" in scheduler.format_report()
+
+
+def test_negative_capacities_are_rejected():
+    with pytest.raises(PyLangRuntimeError):
+        Channel(INT_CHAN, -1)
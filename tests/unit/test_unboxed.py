@@ -0,0 +1,30 @@
+from pygolang import ast, ast_runner, lexer_setup, parser_setup
+from pygolang.unboxed import box, unbox
+from tests.integration.io_callback_fixture import FakeIO
+
+
+def test_box_and_unbox():
+    assert box(3) is ast.Int(3)
+    assert box(True) is ast.BoolLiteralTrue
+    assert box('x').value == 'x'
+    assert box(ast.ValueNotSet) is ast.ValueNotSet
+
+    assert unbox(ast.Int(3)) == 3
+    assert unbox(ast.ValueNotSet) is ast.ValueNotSet
+
+
+def test_module_scope_holds_boxed_values():
+    io = FakeIO([])
+    state = {}
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoParser(io, state)
+    runner = ast_runner.Runner(io, state, engine=ast_runner.ENGINE_UNBOXED)
+
+    runner.run(parser.parse('var x int = 2'))
+    runner.run(parser.parse('x = x * 2000'))
+    result = runner.run(parser.parse('x > 1 && !false'))
+
+    assert isinstance(state['x'][0], ast.Int)
+    assert state['x'][0].value == 4000
+    assert result is ast.BoolLiteralTrue
+    assert io.stdout == ['true']
@@ -0,0 +1,118 @@
+import pytest
+
+from pygolang import ast, ast_runner, lexer_setup, optimizer, parser_setup, vectorize
+from tests.integration.io_callback_fixture import FakeIO
+
+pytest.importorskip('numpy')
+
+SLICES = """
+a := make([]int, 100)
+b := make([]int, 100)
+words := make([]string, 100)
+k := 2
+"""
+
+
+@pytest.fixture
+def parser():
+    io = FakeIO([])
+    lexer_setup.PyGoLexer(io)
+    parser = parser_setup.PyGoProgramParser(io, {})
+    return lambda code: optimizer.Optimizer(3).optimize(parser.parse(SLICES + code))
+
+
+def last_statement(program):
+    return program.value.statements[-1].value
+
+
+class TestVectorizeLoops:
+    @pytest.mark.parametrize('loop', [
+        'for i := range a { b[i] = a[i] * k + 1 }',
+        'for i := 0; i < 100; i++ { b[i] = i - k\n a[i] = b[i] }',
+        'for i := 99; i >= 0; i-- { b[i] = 5 }',
+    ])
+    def test_element_wise_loops_are_vectorized(self, parser, loop):
+        node = last_statement(parser(loop))
+
+        assert isinstance(node, ast.VectorizedLoop)
+        assert isinstance(node.loop, (ast.For, ast.ForRange))
+
+    @pytest.mark.parametrize('loop', [
+        # Neighbouring elements
+        'for i := range a { b[i] = a[i + 1] }',
+        # Side effects
+        'for i := range a { b[i] = a[i]\n k = 3 }',
+        'for i := range a { b[i] = len(append(b, 1)) }',
+        # Not []int
+        'for i := range words { words[i] = "x" }',
+        # Not counting ints
+        'for i := 0; i < 100; i += k { b[i] = 1 }',
+        'for i := range a { if k > 1 { b[i] = 1 } }',
+        'for i := range a { break }',
+    ])
+    def test_other_loops_are_left_alone(self, parser, loop):
+        node = last_statement(parser(loop))
+
+        assert isinstance(node, (ast.For, ast.ForRange))
+
+    def test_loops_are_left_alone_without_numpy(self, parser, monkeypatch):
+        monkeypatch.setattr(vectorize, 'numpy', None)
+
+        node = last_statement(parser('for i := range a { b[i] = a[i] }'))
+
+        assert isinstance(node, ast.ForRange)
+
+
+class TestVectorKernel:
+    @pytest.fixture
+    def run(self):
+        """Runs programs at -O3 on the unboxed engine, counting the
+        iterations which ran as they are
+        """
+        io = FakeIO([])
+        state = {}
+        lexer_setup.PyGoLexer(io)
+        parser = parser_setup.PyGoProgramParser(io, state)
+        runner = ast_runner.Runner(io, state, engine=ast_runner.ENGINE_UNBOXED)
+        code_optimizer = optimizer.Optimizer(3)
+
+        def run_code(code):
+            runner.run(code_optimizer.optimize(parser.parse(code)))
+            return state
+
+        return run_code
+
+    def test_loops_run_vectorized(self, run, monkeypatch):
+        index_calls = []
+        monkeypatch.setattr(
+            ast.SliceElements, 'set_index',
+            lambda *args: index_calls.append(args))
+
+        state = run(SLICES + 'for i := range a { a[i] = i * k }')
+
+        assert index_calls == []
+        assert list(state['a'][0].value)[:4] == [0, 2, 4, 6]
+
+    @pytest.mark.parametrize('code', [
+        # Too short to be worth it
+        'for i := 0; i < 10; i++ { a[i] = 1 }',
+        # Nil slices
+        'var nil []int\nfor i := range a { nil[i] = 1 }',
+        # Sharing a buffer at different offsets
+        'c := a[1:]\nfor i := range c { c[i] = a[i] }',
+    ])
+    def test_loops_the_kernel_cant_run_run_as_they_are(self, run, code, monkeypatch):
+        runs = []
+        original_run = vectorize.VectorKernel.run
+
+        def spy_run(kernel, *operands):
+            runs.append(original_run(kernel, *operands))
+            return runs[-1]
+
+        monkeypatch.setattr(vectorize.VectorKernel, 'run', spy_run)
+
+        try:
+            run(SLICES + code)
+        except Exception:
+            pass
+        assert runs == [False]